@@ -0,0 +1,352 @@
+"""
+Benchmark des requêtes de l'application Streamlit (SpotifyBackend) sur la base du .env
+Latences p50/p95 de chaque variante, mesurées côté client
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'streamlit'))
+from async_backend import AsyncReadRunner
+from backend import TRACK_FEATURES_QUERY, QueryCache, SpotifyBackend, encode_cursor, records_to_frame
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+def latency_stats(latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        'calls': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 1),
+        'p95_ms': round(percentile(latencies_ms, 95), 1),
+        'mean_ms': round(sum(latencies_ms) / len(latencies_ms), 1),
+    }
+
+
+def timed(fn: Callable, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def sample_search_terms(backend: SpotifyBackend, count: int, seed: int) -> List[str]:
+    """Termes réalistes : mot d'un titre, nom d'artiste, début d'album, préfixe de 3 lettres (saisie en cours)"""
+    with backend.driver.session() as session:
+        titles = [r['name'] for r in session.run("MATCH (t:Track) RETURN t.name as name LIMIT 5000") if r['name']]
+        artists = [r['name'] for r in session.run("MATCH (a:Artist) RETURN a.name as name LIMIT 5000") if r['name']]
+        albums = [r['name'] for r in session.run("MATCH (al:Album) RETURN al.name as name LIMIT 5000") if r['name']]
+
+    rng = random.Random(seed)
+    terms = []
+    for attempt in range(count * 10):
+        if len(terms) == count:
+            break
+        kind = attempt % 4
+        if kind == 0 and titles:
+            words = [word for word in rng.choice(titles).split() if len(word) > 2]
+            if words:
+                terms.append(rng.choice(words))
+        elif kind == 1 and artists:
+            terms.append(rng.choice(artists))
+        elif kind == 2 and albums:
+            terms.append(' '.join(rng.choice(albums).split()[:2]))
+        elif titles:
+            terms.append(rng.choice(titles)[:3])
+    return terms
+
+
+def bench_search(backend: SpotifyBackend, args) -> Dict:
+    """search_songs : scan CONTAINS (ancien) vs index full-text"""
+    backend.ensure_fulltext_indexes()
+    with backend.driver.session() as session:
+        session.run("CALL db.awaitIndexes(300)").consume()
+
+    terms = sample_search_terms(backend, args.terms, args.seed)
+    print(f"{len(terms)} termes de recherche (ex. {', '.join(repr(term) for term in terms[:4])})")
+
+    results = {}
+    for mode in ('contains', 'fulltext'):
+        latencies = []
+        empty = 0
+        backend.search_songs(terms[0], limit=15, mode=mode)  # Préchauffage (plan de requête en cache)
+        for _ in range(args.repeat):
+            for term in terms:
+                songs, elapsed_ms = timed(backend.search_songs, term, limit=15, mode=mode)
+                latencies.append(elapsed_ms)
+                empty += not songs
+        results[mode] = {**latency_stats(latencies), 'empty_results': empty // args.repeat}
+        print(f"- {mode}: p50 {results[mode]['p50_ms']:.1f} ms, p95 {results[mode]['p95_ms']:.1f} ms, "
+              f"{results[mode]['empty_results']} terme(s) sans résultat")
+
+    if results['fulltext']['p50_ms']:
+        print(f"Gain p50: x{results['contains']['p50_ms'] / results['fulltext']['p50_ms']:.1f}")
+    return results
+
+
+def bench_pagination(backend: SpotifyBackend, args) -> Dict:
+    """Page N de "Toutes les chansons" : SKIP/LIMIT (get_all_songs) vs curseur (get_songs_page)"""
+    page_size = 20
+    results = {}
+    for page in args.pages:
+        offset = (page - 1) * page_size
+        cursor = None
+        if offset:
+            # Curseur de la page demandée, construit hors mesure (dernière chanson de la page précédente)
+            with backend.driver.session() as session:
+                record = session.run(
+                    "MATCH (t:Track) WHERE t.popularity IS NOT NULL AND t.track_id IS NOT NULL "
+                    "RETURN t.popularity as popularity, t.track_id as track_id "
+                    "ORDER BY t.popularity DESC, t.track_id DESC SKIP $skip LIMIT 1",
+                    skip=offset - 1,
+                ).single()
+            if record is None:
+                print(f"- page {page}: au-delà du catalogue")
+                break
+            cursor = encode_cursor(record['popularity'], record['track_id'])
+
+        skip_latencies, keyset_latencies = [], []
+        for _ in range(args.repeat):
+            _, elapsed_ms = timed(backend.get_all_songs, limit=page_size, offset=offset)
+            skip_latencies.append(elapsed_ms)
+            _, elapsed_ms = timed(backend.get_songs_page, page_size=page_size, cursor=cursor)
+            keyset_latencies.append(elapsed_ms)
+
+        results[page] = {'skip': latency_stats(skip_latencies), 'keyset': latency_stats(keyset_latencies)}
+        print(f"- page {page:,}: SKIP p50 {results[page]['skip']['p50_ms']:.1f} ms, "
+              f"curseur p50 {results[page]['keyset']['p50_ms']:.1f} ms")
+    return results
+
+
+# Lectures de rendu des pages : Vue d'ensemble (analytics.py) et accueil (main.py)
+PAGE_READS = {
+    'analytics': {
+        'genre_stats': lambda b: b.get_genre_statistics(),
+        'artist_stats': lambda b: b.get_artist_statistics(),
+    },
+    'main': {
+        'quick_stats': lambda b: b.get_quick_stats(),
+        'popular_songs': lambda b: b.get_popular_songs(limit=5),
+    },
+}
+
+
+def bench_fanout(backend: SpotifyBackend, args) -> Dict:
+    """Rendu d'une page : lectures enchaînées (SpotifyBackend) vs en parallèle (AsyncReadRunner.gather)"""
+    runner = AsyncReadRunner(cache=QueryCache(0))
+    results = {}
+    try:
+        for page, reads in PAGE_READS.items():
+            runner.gather(**reads)  # Préchauffage (connexions du pool async)
+            sequential, concurrent, single = [], [], {name: [] for name in reads}
+            for _ in range(args.repeat * 5):
+                total = 0.0
+                for name, read in reads.items():
+                    _, elapsed_ms = timed(read, backend)
+                    single[name].append(elapsed_ms)
+                    total += elapsed_ms
+                sequential.append(total)
+                _, elapsed_ms = timed(runner.gather, **reads)
+                concurrent.append(elapsed_ms)
+
+            results[page] = {
+                'sequential': latency_stats(sequential),
+                'concurrent': latency_stats(concurrent),
+                'queries': {name: latency_stats(latencies) for name, latencies in single.items()},
+            }
+            slowest = max(stats['p50_ms'] for stats in results[page]['queries'].values())
+            print(f"- {page}: enchaîné p50 {results[page]['sequential']['p50_ms']:.1f} ms, "
+                  f"parallèle p50 {results[page]['concurrent']['p50_ms']:.1f} ms "
+                  f"(requête la plus lente p50 {slowest:.1f} ms)")
+    finally:
+        runner.close()
+    return results
+
+
+def extract_dicts(backend: SpotifyBackend, limit: int) -> pd.DataFrame:
+    """Chemin actuel des pages : un dictionnaire par ligne, puis pd.DataFrame(liste)"""
+    with backend.driver.session() as session:
+        rows = [dict(record) for record in session.run(TRACK_FEATURES_QUERY, limit=limit)]
+    return pd.DataFrame(rows)
+
+
+def extract_to_df(backend: SpotifyBackend, limit: int) -> pd.DataFrame:
+    """Result.to_df() du driver neo4j"""
+    with backend.driver.session() as session:
+        return session.run(TRACK_FEATURES_QUERY, limit=limit).to_df()
+
+
+def bench_columnar(backend: SpotifyBackend, args) -> Dict:
+    """Extraction analytique de N lignes : dictionnaires -> DataFrame vs colonnes typées (pandas / Arrow)"""
+    limit = args.extract_rows
+    variants = {
+        'dicts': lambda: extract_dicts(backend, limit),
+        'driver_to_df': lambda: extract_to_df(backend, limit),
+        'frame_pandas': lambda: backend.fetch_frame(TRACK_FEATURES_QUERY, 'pandas', limit=limit),
+        'frame_arrow': lambda: backend.fetch_frame(TRACK_FEATURES_QUERY, 'arrow', limit=limit),
+    }
+
+    # Conversion seule (sans réseau) sur des enregistrements déjà reçus
+    with backend.driver.session() as session:
+        result = session.run(TRACK_FEATURES_QUERY, limit=limit)
+        keys = result.keys()
+        records = list(result)
+    conversions = {
+        'dicts': lambda: pd.DataFrame([dict(record) for record in records]),
+        'frame_pandas': lambda: records_to_frame(keys, records, 'pandas'),
+        'frame_arrow': lambda: records_to_frame(keys, records, 'arrow'),
+    }
+    print(f"{len(records):,} lignes extraites")
+
+    results = {'rows': len(records), 'end_to_end': {}, 'conversion': {}}
+    for name, extract in variants.items():
+        latencies = [timed(extract)[1] for _ in range(args.repeat)]
+        results['end_to_end'][name] = latency_stats(latencies)
+    for name, convert in conversions.items():
+        latencies = [timed(convert)[1] for _ in range(args.repeat)]
+        results['conversion'][name] = latency_stats(latencies)
+
+    for name, stats in results['end_to_end'].items():
+        conversion = results['conversion'].get(name)
+        suffix = f", conversion seule p50 {conversion['p50_ms']:.1f} ms" if conversion else ""
+        print(f"- {name}: p50 {stats['p50_ms']:.1f} ms{suffix}")
+    return results
+
+
+CRUD_PREFIX = 'bench-crud'
+
+
+def bench_song(index: int, run: str) -> Dict:
+    return {
+        'track_id': f"{CRUD_PREFIX}-{run}-{index}",
+        'track_name': f"{CRUD_PREFIX} song {index}",
+        'album_name': f"{CRUD_PREFIX} album {index % 10}",
+        'track_genre': CRUD_PREFIX,
+        'artists': f"{CRUD_PREFIX} artist {index % 20};{CRUD_PREFIX} artist {(index + 7) % 20}",
+        'popularity': index % 100,
+        'duration_ms': 180000,
+        'danceability': 0.5,
+        'energy': 0.5,
+        'tempo': 120.0,
+    }
+
+
+def cleanup_crud(backend: SpotifyBackend):
+    """Supprime les chansons de test et les artistes / albums / genre créés pour elles"""
+    with backend.driver.session() as session:
+        session.run(
+            "MATCH (n) WHERE (n:Track AND n.track_id STARTS WITH $prefix) "
+            "OR ((n:Artist OR n:Album OR n:Genre) AND n.name STARTS WITH $prefix) DETACH DELETE n",
+            prefix=CRUD_PREFIX,
+        ).consume()
+
+
+def bench_crud(backend: SpotifyBackend, args) -> Dict:
+    """Écritures (base modifiée, données de test supprimées à la fin) : boucle unitaire vs opérations par lot"""
+    count = args.songs
+    results = {}
+    try:
+        cleanup_crud(backend)
+        for variant in ('single', 'batch'):
+            songs = [bench_song(index, variant) for index in range(count)]
+            track_ids = [song['track_id'] for song in songs]
+            updates = [{'track_id': track_id, 'popularity': 50, 'energy': 0.9} for track_id in track_ids]
+
+            if variant == 'single':
+                _, create_ms = timed(lambda: [backend.create_song(song) for song in songs])
+                _, update_ms = timed(lambda: [backend.update_song(u['track_id'], u) for u in updates])
+                _, delete_ms = timed(lambda: [backend.delete_song(track_id) for track_id in track_ids])
+            else:
+                created, create_ms = timed(backend.create_songs, songs)
+                updated, update_ms = timed(backend.update_songs, updates)
+                deleted, delete_ms = timed(backend.delete_songs, track_ids)
+                for report in (created, updated, deleted):
+                    if not report['success']:
+                        raise RuntimeError(f"Opération par lot incomplète: {report['message']}")
+
+            results[variant] = {
+                operation: {'ms': round(elapsed_ms, 1), 'songs_per_s': round(count / elapsed_ms * 1000)}
+                for operation, elapsed_ms in (('create', create_ms), ('update', update_ms), ('delete', delete_ms))
+            }
+            print(f"- {variant}: " + ', '.join(
+                f"{operation} {stats['songs_per_s']:,} chansons/s" for operation, stats in results[variant].items()
+            ))
+    finally:
+        cleanup_crud(backend)
+
+    for operation in ('create', 'update', 'delete'):
+        print(f"Gain {operation}: x{results['single'][operation]['ms'] / results['batch'][operation]['ms']:.1f}")
+    return results
+
+
+SUITES = {
+    'search': bench_search,
+    'pagination': bench_pagination,
+    'fanout': bench_fanout,
+    'columnar': bench_columnar,
+    'crud': bench_crud,
+}
+
+# Suites lancées par défaut : lecture seule et requêtes légères
+DEFAULT_SUITES = ['search', 'pagination', 'fanout']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark des requêtes SpotifyBackend (lecture seule sauf mention)")
+    parser.add_argument('--suites', nargs='+', choices=list(SUITES), default=DEFAULT_SUITES,
+                        help="columnar lit --extract-rows tracks ; crud écrit dans la base (données de test supprimées)")
+    parser.add_argument('--terms', type=int, default=40, help="Nombre de termes de recherche échantillonnés")
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100, 1000],
+                        help="Pages (de 20 chansons) mesurées par la suite pagination")
+    parser.add_argument('--repeat', type=int, default=3, help="Répétitions de chaque mesure")
+    parser.add_argument('--extract-rows', type=int, default=100000,
+                        help="Lignes de l'extraction analytique de la suite columnar")
+    parser.add_argument('--songs', type=int, default=200, help="Nombre de chansons écrites par la suite crud")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default="../data/benchmark/backend_results.json", help="Fichier JSON des résultats")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    backend = SpotifyBackend()
+    backend.cache = QueryCache(0)  # Mesure des requêtes, pas du cache des lectures
+
+    results = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'neo4j_uri': backend.uri,
+        'suites': {},
+    }
+    try:
+        stats = backend.get_quick_stats()
+        print(f"=== Base: {backend.uri} ({stats.get('total_tracks', 0):,} tracks) ===")
+        for suite in args.suites:
+            print(f"\n======== {suite} ========")
+            results['suites'][suite] = SUITES[suite](backend, args)
+        # Vue serveur des mêmes appels : durée client vs temps d'exécution Neo4j, par méthode
+        results['query_stats'] = backend.query_stats()
+        print("\n=== Latences par méthode (ms : p50 / p95 / p99, serveur moyen) ===")
+        for method, stats in results['query_stats']['methods'].items():
+            print(f"  {method}: {stats['p50_ms']} / {stats['p95_ms']} / {stats['p99_ms']} "
+                  f"(serveur {stats['server_available_ms']} + {stats['server_consumed_ms']}, {stats['count']} appels)")
+    finally:
+        backend.close()
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats écrits dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Benchmark de l'import : génération de datasets synthétiques au format Spotify
+et mesure de l'import (temps par phase, lignes/s, pic mémoire) sur un Neo4j local
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from dataset_consolidation import consolidate_dataset, consolidated_path
+from neo4j_async_import import SpotifyAsyncImporter
+from neo4j_import import SpotifyUltraFastImporter
+
+try:
+    import resource  # Absent sous Windows : pic mémoire non mesuré
+except ImportError:
+    resource = None
+
+# Proportions observées sur le dataset Kaggle (~114k lignes)
+DUPLICATE_RATE = 0.22      # Lignes répétant une track déjà vue (même track, autre genre)
+ARTISTS_PER_ROW = 0.27     # Nombre d'artistes distincts / nombre de lignes
+ALBUMS_PER_ROW = 0.40      # Nombre d'albums distincts / nombre de lignes
+GENRE_COUNT = 114
+# Nombre d'artistes par track (1 à 6), tiré de la distribution réelle
+ARTIST_COUNT_WEIGHTS = [0.74, 0.16, 0.06, 0.02, 0.01, 0.01]
+# Titres partagés par plusieurs artistes : albums distincts de même nom
+COMMON_ALBUM_TITLES = ['Greatest Hits', 'Live', 'Remixes', 'Acoustic', 'Christmas Songs', 'The Best Of']
+COMMON_ALBUM_RATE = 0.03
+
+GENERATION_CHUNK_ROWS = 100000
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def _uniform(values: np.ndarray, salt: int, seed: int) -> np.ndarray:
+    """Uniforme [0, 1) déterministe par valeur (splitmix64) : une track a toujours les mêmes propriétés"""
+    x = values.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15) + np.uint64((seed << 8) + salt)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    x = x ^ (x >> np.uint64(31))
+    return (x >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _skewed_index(u: np.ndarray, size: int, skew: float) -> np.ndarray:
+    """Index dans [0, size) concentré sur les premiers éléments (artistes/albums populaires)"""
+    return np.minimum((u ** skew * size).astype(np.int64), size - 1)
+
+
+def _track_frame(track_idx: np.ndarray, genres: np.ndarray, rows: int, seed: int) -> pd.DataFrame:
+    artist_count = max(10, int(rows * ARTISTS_PER_ROW))
+    album_count = max(10, int(rows * ALBUMS_PER_ROW))
+
+    def u(salt):
+        return _uniform(track_idx, salt, seed)
+
+    # Album réutilisé par plusieurs tracks ; son artiste principal ne dépend que de l'album
+    album_idx = _skewed_index(u(1), album_count, 1.3)
+    main_artist = _skewed_index(_uniform(album_idx, 2, seed), artist_count, 2.0)
+    album_names = np.array([f"Album {idx}" for idx in album_idx], dtype=object)
+    common = _uniform(album_idx, 3, seed) < COMMON_ALBUM_RATE
+    album_names[common] = np.array(COMMON_ALBUM_TITLES, dtype=object)[album_idx[common] % len(COMMON_ALBUM_TITLES)]
+
+    # Artistes : le principal puis les featurings
+    artists_per_track = np.searchsorted(np.cumsum(ARTIST_COUNT_WEIGHTS), u(4) * 0.999999) + 1
+    artist_columns = [main_artist] + [
+        _skewed_index(u(10 + i), artist_count, 2.0) for i in range(1, len(ARTIST_COUNT_WEIGHTS))
+    ]
+    artists = [
+        ';'.join(f"Artist {artist_columns[i][row]}" for i in range(count))
+        for row, count in enumerate(artists_per_track)
+    ]
+
+    return pd.DataFrame({
+        'track_id': [f"synth{idx:09d}" for idx in track_idx],
+        'artists': artists,
+        'album_name': album_names,
+        'track_name': [f"Track {idx}" for idx in track_idx],
+        'popularity': (u(20) ** 1.5 * 100).astype(np.int64),
+        'duration_ms': (60000 + u(21) * 300000).astype(np.int64),
+        'explicit': u(22) < 0.085,
+        'danceability': u(23).round(3),
+        'energy': u(24).round(3),
+        'key': (u(25) * 12).astype(np.int64),
+        'loudness': (-u(26) * 30).round(3),
+        'mode': (u(27) < 0.64).astype(np.int64),
+        'speechiness': (u(28) ** 3).round(4),
+        'acousticness': u(29).round(4),
+        'instrumentalness': (u(30) ** 4).round(6),
+        'liveness': (u(31) ** 2).round(4),
+        'valence': u(32).round(3),
+        'tempo': (60 + u(33) * 150).round(3),
+        'time_signature': np.array([4, 3, 5, 1])[np.searchsorted([0.9, 0.97, 0.99], u(34))],
+        'track_genre': genres,
+    })
+
+
+def generate_dataset(path: str, rows: int, seed: int = 42) -> str:
+    """Écrit un dataset synthétique de `rows` lignes, par blocs (mémoire constante jusqu'à 10M lignes)"""
+    rng = np.random.default_rng(seed)
+    genre_names = np.array([f"genre-{i:03d}" for i in range(GENRE_COUNT)], dtype=object)
+    emitted_tracks = 0
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, rows, GENERATION_CHUNK_ROWS):
+            count = min(GENERATION_CHUNK_ROWS, rows - start)
+
+            # Nouvelles tracks ou répétitions d'une track existante (dans un autre genre)
+            is_repeat = rng.random(count) < DUPLICATE_RATE
+            if emitted_tracks == 0:
+                is_repeat[0] = False
+            new_tracks = int((~is_repeat).sum())
+            track_idx = np.empty(count, dtype=np.int64)
+            track_idx[~is_repeat] = emitted_tracks + np.arange(new_tracks)
+            track_idx[is_repeat] = rng.integers(0, emitted_tracks + new_tracks, int(is_repeat.sum()))
+            emitted_tracks += new_tracks
+
+            chunk = _track_frame(track_idx, rng.choice(genre_names, count), rows, seed)
+            chunk.index = pd.RangeIndex(start, start + count)
+            chunk.to_csv(f, header=start == 0)
+
+    os.replace(tmp_path, path)
+    return path
+
+
+def dataset_path(data_dir: str, rows: int, seed: int) -> str:
+    return os.path.join(data_dir, f"synthetic_{rows}_seed{seed}.csv")
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus courant (Ko sous Linux, octets sous macOS)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class BenchmarkImporter(SpotifyUltraFastImporter):
+    """Importer instrumenté : temps de préparation et d'écriture cumulés"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = {'preparation': 0.0, 'write': 0.0}
+
+    def prepare_chunk(self, chunk_df: pd.DataFrame) -> Dict[str, list]:
+        start = time.perf_counter()
+        try:
+            return super().prepare_chunk(chunk_df)
+        finally:
+            self.timings['preparation'] += time.perf_counter() - start
+
+    def write_payload(self, payload: Dict[str, list]):
+        start = time.perf_counter()
+        try:
+            super().write_payload(payload)
+        finally:
+            self.timings['write'] += time.perf_counter() - start
+
+
+def count_entities(driver) -> Dict[str, int]:
+    with driver.session() as session:
+        nodes = session.run("MATCH (n) RETURN labels(n)[0] as label, count(*) as count")
+        counts = {record['label']: record['count'] for record in nodes}
+        rels = session.run("MATCH ()-[r]->() RETURN type(r) as type, count(*) as count")
+        counts.update({record['type']: record['count'] for record in rels})
+    return counts
+
+
+def clear_database(driver):
+    """Vide la base par lots (les contraintes et index sont conservés)"""
+    with driver.session() as session:
+        while session.run(
+            "MATCH (n) WITH n LIMIT 10000 DETACH DELETE n RETURN count(*) as deleted"
+        ).single()['deleted']:
+            pass
+
+
+def run_import(csv_path: str, connection: Dict[str, str], run: Dict, verbose: bool = False) -> Dict:
+    """Un run d'import, exécuté dans un processus dédié pour mesurer son propre pic mémoire"""
+    # sync : SpotifyUltraFastImporter instrumenté ; async : SpotifyAsyncImporter (mesure ses propres temps)
+    importer_class = SpotifyAsyncImporter if run['engine'] == 'async' else BenchmarkImporter
+    importer = importer_class(connection['uri'], connection['user'], connection['password'],
+                              workers=run['workers'])
+    try:
+        with open(os.devnull, 'w') as devnull, \
+                (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+            clear_database(importer.driver)
+            importer.create_constraints_and_indexes()
+            if run['mode'] == 'fresh':
+                importer.enable_fresh_load()
+
+            start = time.perf_counter()
+            read_start = start
+            if run['engine'] == 'async':
+                rows = asyncio.run(importer.import_csv_async(csv_path))
+                read_seconds = None
+            elif run['read'] == 'stream':
+                rows = importer.import_csv_streaming(csv_path)
+                read_seconds = None  # Lecture entrelacée avec l'import
+            else:
+                df = pd.read_csv(csv_path)
+                read_seconds = time.perf_counter() - read_start
+                rows = len(df)
+                importer.import_all_data_ultra_fast(df)
+            elapsed = time.perf_counter() - start
+
+        phases = {name: {'seconds': round(seconds, 3)} for name, seconds in importer.timings.items()}
+        if read_seconds is not None:
+            phases['read'] = {'seconds': round(read_seconds, 3)}
+        # Détail par requête UNWIND (télémétrie de l'importer)
+        for key, stats in importer.telemetry.run_phases.items():
+            phases[key] = {
+                'seconds': round(stats['wall_s'], 3),
+                'rows': stats['rows'],
+                'rows_per_s': round(stats['rows'] / stats['wall_s']) if stats['wall_s'] else None,
+                'server_ms': stats['available_after_ms'] + stats['consumed_after_ms'],
+            }
+            if key in importer.batch_sizer.stats:
+                phases[key]['batch_size'] = importer.batch_sizer.size(key)
+
+        return {
+            **run,
+            'imported_rows': rows,
+            'elapsed_s': round(elapsed, 3),
+            # Lignes du dataset source par seconde : comparable entre dataset brut et consolidé
+            'rows_per_s': round(run['rows'] / elapsed) if elapsed else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': phases,
+            'deadlock_retries': sum(importer.deadlock_retries.values()),
+            'database': count_entities(importer.driver),
+        }
+    finally:
+        importer.close()
+
+
+def run_name(run: Dict) -> str:
+    suffix = "-consolidated" if run['dataset'] == 'consolidated' else ""
+    return f"{run['rows']}-{run['engine']}-{run['mode']}-w{run['workers']}-{run['read']}{suffix}"
+
+
+def compare_with_baseline(results: Dict, baseline: Dict, max_regression: float) -> bool:
+    """Compare chaque run à son homologue du baseline ; False si une régression dépasse le seuil (%)"""
+    baseline_runs = {run['name']: run for run in baseline['runs']}
+    ok = True
+
+    print("\n=== COMPARAISON AVEC LE BASELINE ===")
+    for run in results['runs']:
+        reference = baseline_runs.get(run['name'])
+        if reference is None:
+            print(f"{run['name']}: absent du baseline")
+            continue
+
+        change = (run['rows_per_s'] - reference['rows_per_s']) / reference['rows_per_s'] * 100
+        status = "OK"
+        if change < -max_regression:
+            status = "RÉGRESSION"
+            ok = False
+        line = (f"{run['name']}: {reference['rows_per_s']:,} -> {run['rows_per_s']:,} lignes/s "
+                f"({change:+.1f}%)")
+        if run.get('peak_rss_mb') and reference.get('peak_rss_mb'):
+            line += f", RSS {reference['peak_rss_mb']:.0f} -> {run['peak_rss_mb']:.0f} Mo"
+        print(f"{line} [{status}]")
+
+        for phase, stats in run['phases'].items():
+            before = reference['phases'].get(phase, {}).get('seconds')
+            if before:
+                print(f"    {phase}: {before:.2f}s -> {stats['seconds']:.2f}s")
+
+    return ok
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark de l'import Spotify -> Neo4j sur datasets synthétiques")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000],
+                        help="Tailles de dataset à générer et importer (10k à 10M)")
+    parser.add_argument('--engines', nargs='+', choices=['sync', 'async'], default=['sync'],
+                        help="sync : SpotifyUltraFastImporter ; async : import pipeliné (merge, streaming)")
+    parser.add_argument('--modes', nargs='+', choices=['merge', 'fresh'], default=['merge'],
+                        help="merge : import par défaut ; fresh : chargement initial CREATE")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1],
+                        help="Nombres de workers à tester (mode merge)")
+    parser.add_argument('--read', choices=['stream', 'memory'], default='stream',
+                        help="Lecture streaming (--stream) ou CSV chargé en mémoire")
+    parser.add_argument('--datasets', nargs='+', choices=['raw', 'consolidated'], default=['raw'],
+                        help="Dataset généré tel quel et/ou consolidé (une ligne par track_id)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default="../data/benchmark", help="Dossier des datasets générés")
+    parser.add_argument('--out', default="../data/benchmark/results.json", help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', help="Résultats de référence à comparer (JSON produit par ce script)")
+    parser.add_argument('--max-regression', type=float, default=10.0,
+                        help="Baisse de lignes/s tolérée par rapport au baseline, en %%")
+    parser.add_argument('--generate-only', action='store_true', help="Génère les datasets sans importer")
+    parser.add_argument('--allow-remote', action='store_true',
+                        help="Autorise une base non locale (elle est VIDÉE avant chaque run)")
+    parser.add_argument('--verbose', action='store_true', help="Affiche la sortie de l'importer")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+
+    print("=== Génération des datasets ===")
+    datasets = {}
+    for rows in args.rows:
+        path = dataset_path(args.data_dir, rows, args.seed)
+        if os.path.exists(path):
+            print(f"{rows:,} lignes: {path} (existant)")
+        else:
+            start = time.time()
+            generate_dataset(path, rows, args.seed)
+            print(f"{rows:,} lignes: {path} ({time.time() - start:.1f}s)")
+        datasets[(rows, 'raw')] = path
+        if 'consolidated' in args.datasets:
+            consolidated = consolidated_path(path)
+            if not os.path.exists(consolidated):
+                consolidate_dataset(path)
+            datasets[(rows, 'consolidated')] = consolidated
+
+    if args.generate_only:
+        return
+
+    connection = {
+        'uri': os.getenv('BENCH_NEO4J_URI', 'bolt://localhost:7687'),
+        'user': os.getenv('BENCH_NEO4J_USERNAME', 'neo4j'),
+        'password': os.getenv('BENCH_NEO4J_PASSWORD', ''),
+    }
+    if urlparse(connection['uri']).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        print(f"❌ {connection['uri']} n'est pas local : la base est vidée à chaque run (--allow-remote pour forcer)")
+        return
+
+    runs: List[Dict] = []
+    for rows in args.rows:
+        for dataset in args.datasets:
+            for mode in args.modes:
+                # Le mode fresh écrit chaque chunk en une transaction : un seul worker
+                for workers in ([1] if mode == 'fresh' else args.workers):
+                    runs.append({'rows': rows, 'dataset': dataset, 'engine': 'sync', 'mode': mode,
+                                 'workers': workers, 'read': args.read})
+            if 'async' in args.engines:
+                runs.append({'rows': rows, 'dataset': dataset, 'engine': 'async', 'mode': 'merge',
+                             'workers': 1, 'read': 'stream'})
+    if 'sync' not in args.engines:
+        runs = [run for run in runs if run['engine'] == 'async']
+
+    results = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'neo4j_uri': connection['uri'],
+        'seed': args.seed,
+        'runs': [],
+    }
+
+    print(f"\n=== Benchmark sur {connection['uri']} ({len(runs)} runs) ===")
+    for run in runs:
+        run['name'] = run_name(run)
+        print(f"\n======== {run['name']} ========")
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(run_import, datasets[(run['rows'], run['dataset'])], connection, run,
+                                 args.verbose).result()
+        results['runs'].append(result)
+
+        rss = f", pic RSS {result['peak_rss_mb']:.0f} Mo" if result['peak_rss_mb'] else ""
+        print(f"{result['rows']:,} lignes ({result['imported_rows']:,} importées) en {result['elapsed_s']:.1f}s : "
+              f"{result['rows_per_s']:,} lignes/s{rss}")
+        for phase, stats in result['phases'].items():
+            print(f"- {phase}: {stats['seconds']:.2f}s")
+
+    os.makedirs(os.path.dirname(args.out) or '.', exist_ok=True)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nRésultats écrits dans {args.out}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare_with_baseline(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
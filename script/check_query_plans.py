@@ -0,0 +1,169 @@
+"""
+Vérification des plans des requêtes de liste de l'application (SpotifyBackend)
+Importe deux catalogues synthétiques de tailles différentes sur un Neo4j local et compare les db hits (PROFILE)
+des requêtes à K résultats : ils doivent rester bornés quand le catalogue grossit
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+from pathlib import Path
+from typing import Callable, Dict
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from benchmark_import import LOCAL_HOSTS, clear_database, dataset_path, generate_dataset
+from neo4j_import import SpotifyUltraFastImporter
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'streamlit'))
+from backend import (ALL_SONGS_QUERY, ARTIST_STATISTICS_QUERY, GENRE_STATISTICS_QUERY, POPULAR_SONGS_QUERY,
+                     SEARCH_CONTAINS_QUERY, SEARCH_FULLTEXT_QUERY, SONGS_BY_ARTIST_QUERY, SONGS_BY_GENRE_QUERY,
+                     SONGS_FIRST_PAGE_WHERE, SONGS_NEXT_PAGE_WHERE, SONGS_PAGE_QUERY, lucene_query)
+from query_metrics import plan_operators, total_db_hits
+
+LIMIT = 20
+
+# Ancienne forme (relations lues pour toutes les tracks avant ORDER BY/LIMIT), mesurée pour comparaison
+LEGACY_POPULAR_SONGS_QUERY = """
+MATCH (t:Track)
+OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
+OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
+WITH t, collect(DISTINCT a.name)[..2] as artists_limited, g.name as genre
+RETURN t.name as name, artists_limited as artists, genre
+ORDER BY t.popularity DESC
+LIMIT $limit
+"""
+
+
+def sample_parameters(session) -> Dict:
+    """Paramètres stables d'une taille à l'autre : curseur au milieu du top 100, genre et artiste les plus fournis"""
+    cursor = session.run(
+        "MATCH (t:Track) WHERE t.popularity IS NOT NULL AND t.track_id IS NOT NULL "
+        "RETURN t.popularity as popularity, t.track_id as track_id "
+        "ORDER BY t.popularity DESC, t.track_id DESC SKIP 50 LIMIT 1"
+    ).single()
+    genre = session.run(
+        "MATCH (g:Genre)<-[:HAS_GENRE]-() RETURN g.name as name, count(*) as tracks ORDER BY tracks DESC LIMIT 1"
+    ).single()
+    artist = session.run(
+        "MATCH (a:Artist)-[:PERFORMS]->() RETURN a.name as name, count(*) as tracks ORDER BY tracks DESC LIMIT 1"
+    ).single()
+    return {
+        'popularity': cursor['popularity'], 'track_id': cursor['track_id'],
+        'genre': genre['name'], 'artist_name': artist['name'],
+    }
+
+
+# nom -> (requête, paramètres, borné) ; borné = db hits indépendants de la taille du catalogue
+CHECKS: Dict[str, Callable[[Dict], tuple]] = {
+    'popular': lambda p: (POPULAR_SONGS_QUERY, {'limit': LIMIT}, True),
+    'all_songs_page1': lambda p: (ALL_SONGS_QUERY, {'limit': LIMIT, 'offset': 0}, True),
+    'songs_page_first': lambda p: (SONGS_PAGE_QUERY.replace('{where}', SONGS_FIRST_PAGE_WHERE),
+                                   {'limit': LIMIT}, True),
+    'songs_page_next': lambda p: (SONGS_PAGE_QUERY.replace('{where}', SONGS_NEXT_PAGE_WHERE),
+                                  {'limit': LIMIT, 'popularity': p['popularity'], 'track_id': p['track_id']}, True),
+    'search_fulltext': lambda p: (SEARCH_FULLTEXT_QUERY,
+                                  {'query': lucene_query('love'), 'limit': 15, 'candidates': 60,
+                                   'relevance_weight': 0.7}, True),
+    # Scan complet des Track (filtre CONTAINS) puis sélection : linéaire, mais l'expansion reste bornée
+    'search_contains': lambda p: (SEARCH_CONTAINS_QUERY, {'search_term': 'love', 'limit': 15}, False),
+    # Tracks du genre / de l'artiste parcourues pour le tri : proportionnel à leur taille
+    'songs_by_genre': lambda p: (SONGS_BY_GENRE_QUERY, {'genre': p['genre'], 'limit': LIMIT}, False),
+    'songs_by_artist': lambda p: (SONGS_BY_ARTIST_QUERY, {'artist_name': p['artist_name'], 'limit': LIMIT}, False),
+    # Agrégats stockés sur les noeuds : un noeud lu par genre, aucune track parcourue
+    'genre_statistics': lambda p: (GENRE_STATISTICS_QUERY, {}, True),
+    'artist_statistics': lambda p: (ARTIST_STATISTICS_QUERY, {}, False),
+    'popular_legacy': lambda p: (LEGACY_POPULAR_SONGS_QUERY, {'limit': LIMIT}, False),
+}
+
+
+def profile_queries(driver) -> Dict[str, Dict]:
+    results = {}
+    with driver.session() as session:
+        params = sample_parameters(session)
+        for name, check in CHECKS.items():
+            query, query_params, bounded = check(params)
+            session.run(query, **query_params).consume()  # Plan en cache, comme dans l'application
+            summary = session.run("PROFILE " + query, **query_params).consume()
+            results[name] = {
+                'db_hits': total_db_hits(summary.profile),
+                'bounded': bounded,
+                'sort': [op for op in plan_operators(summary.profile) if 'Sort' in op or 'Top' in op],
+            }
+    return results
+
+
+def import_catalogue(importer: SpotifyUltraFastImporter, csv_path: str, verbose: bool):
+    with open(os.devnull, 'w') as devnull, \
+            (contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)):
+        clear_database(importer.driver)
+        importer.create_constraints_and_indexes()
+        importer.enable_fresh_load()
+        importer.import_csv_streaming(csv_path)
+    with importer.driver.session() as session:
+        session.run("CALL db.awaitIndexes(300)").consume()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="db hits des requêtes SpotifyBackend sur deux tailles de catalogue")
+    parser.add_argument('--rows', type=int, nargs=2, default=[10000, 40000], help="Tailles des deux catalogues")
+    parser.add_argument('--max-growth', type=float, default=1.5,
+                        help="Croissance maximale des db hits (grand / petit) pour les requêtes bornées")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--data-dir', default="../data/benchmark", help="Dossier des datasets synthétiques")
+    parser.add_argument('--allow-remote', action='store_true',
+                        help="Autoriser une base non locale (elle est vidée avant chaque import)")
+    parser.add_argument('--verbose', action='store_true', help="Afficher les logs de l'import")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+
+    uri = os.getenv('BENCH_NEO4J_URI', 'bolt://localhost:7687')
+    if urlparse(uri).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        print(f"❌ {uri} n'est pas local : la base est vidée avant chaque import (--allow-remote pour forcer)")
+        sys.exit(1)
+
+    importer = SpotifyUltraFastImporter(uri, os.getenv('BENCH_NEO4J_USERNAME', 'neo4j'),
+                                        os.getenv('BENCH_NEO4J_PASSWORD', ''))
+    profiles = {}
+    try:
+        for rows in args.rows:
+            path = dataset_path(args.data_dir, rows, args.seed)
+            if not os.path.exists(path):
+                generate_dataset(path, rows, args.seed)
+            print(f"=== Import de {rows:,} lignes ({path}) ===")
+            import_catalogue(importer, path, args.verbose)
+            profiles[rows] = profile_queries(importer.driver)
+    finally:
+        importer.close()
+
+    small, large = args.rows
+    scale = large / small
+    print(f"\n=== db hits pour {small:,} -> {large:,} lignes (x{scale:.1f}) ===")
+    failures = []
+    for name in CHECKS:
+        before, after = profiles[small][name], profiles[large][name]
+        growth = after['db_hits'] / before['db_hits'] if before['db_hits'] else float('inf')
+        # Requêtes bornées : croissance limitée ; autres : au plus linéaire (pas d'expansion avant LIMIT)
+        allowed = args.max_growth if after['bounded'] else scale * args.max_growth
+        ok = growth <= allowed or name == 'popular_legacy'
+        if not ok:
+            failures.append(name)
+        sort = f" [{', '.join(after['sort'])}]" if after['sort'] else ""
+        status = "✅" if ok else "❌"
+        print(f"{status} {name}: {before['db_hits']:,} -> {after['db_hits']:,} (x{growth:.2f}, max x{allowed:.2f})"
+              f"{' (référence)' if name == 'popular_legacy' else ''}{sort}")
+
+    if failures:
+        print(f"\n❌ db hits non bornés: {', '.join(failures)}")
+        sys.exit(1)
+    print("\n✅ Toutes les requêtes de liste restent bornées")
+
+
+if __name__ == "__main__":
+    main()
@@ -43,26 +43,37 @@ class SpotifyAnalyzer:
     
     def top_artists(self):
         """1. Top 10 des artistes les plus populaires"""
+        # Moyenne lue dans les agrégats de l'artiste ; seules les tracks du top 10 sont parcourues (maximum)
         query = """
-        MATCH (a:Artist)-[:PERFORMS]->(t:Track)
-        RETURN a.name as artist, 
-               COUNT(t) as nb_tracks, 
-               AVG(t.popularity) as avg_popularity,
-               MAX(t.popularity) as max_popularity
+        MATCH (a:Artist)
+        WHERE a.stats_popularity_count > 0
+        WITH a, a.stats_track_count as nb_tracks,
+             toFloat(a.stats_popularity_sum) / a.stats_popularity_count as avg_popularity
         ORDER BY avg_popularity DESC
         LIMIT 10
+        CALL (a) {
+            MATCH (a)-[:PERFORMS]->(t:Track)
+            RETURN MAX(t.popularity) as max_popularity
+        }
+        RETURN a.name as artist, 
+               nb_tracks, 
+               avg_popularity,
+               max_popularity
+        ORDER BY avg_popularity DESC
         """
         return self.execute_query(query, "Top 10 des artistes les plus populaires")
     
     def popular_genres(self):
         """2. Genres les plus populaires"""
+        # Agrégats stockés sur les genres (voir script/rebuild_statistics.py) : aucune track parcourue
         query = """
-        MATCH (g:Genre)<-[:HAS_GENRE]-(t:Track)
+        MATCH (g:Genre)
+        WHERE g.stats_track_count > 0
         RETURN g.name as genre, 
-               COUNT(t) as nb_tracks, 
-               AVG(t.popularity) as avg_popularity,
-               AVG(t.energy) as avg_energy,
-               AVG(t.danceability) as avg_danceability
+               g.stats_track_count as nb_tracks, 
+               toFloat(g.stats_popularity_sum) / g.stats_popularity_count as avg_popularity,
+               toFloat(g.stats_energy_sum) / g.stats_energy_count as avg_energy,
+               toFloat(g.stats_danceability_sum) / g.stats_danceability_count as avg_danceability
         ORDER BY avg_popularity DESC
         """
         return self.execute_query(query, "Genres les plus populaires")
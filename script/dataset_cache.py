@@ -0,0 +1,196 @@
+"""
+Cache colonnaire (Arrow IPC) du dataset préparé, pour les imports répétés
+Tracks et paires track/artiste déjà parsées et typées, relues en mémoire mappée
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Callable, Iterator, Tuple
+
+import pyarrow as pa
+
+from neo4j_import import PreparedChunk, SpotifyUltraFastImporter, TRACK_PROPERTIES, _explode_genres, iter_raw_chunks
+
+# À incrémenter quand prepare_chunk_frames change : les anciens caches sont alors ignorés
+CACHE_VERSION = 2
+
+TRACK_TYPES = {
+    'popularity': pa.int64(), 'duration_ms': pa.int64(), 'explicit': pa.bool_(), 'key': pa.int64(),
+    'mode': pa.bool_(), 'time_signature': pa.int64(),
+}
+TRACKS_SCHEMA = pa.schema(
+    [('row', pa.int64())]
+    + [(prop, TRACK_TYPES.get(prop, pa.string() if prop in ('track_id', 'name', 'genre') else pa.float64()))
+       for prop in TRACK_PROPERTIES]
+    + [('genres', pa.string()), ('album', pa.string()), ('main_artist', pa.string())]
+)
+TRACK_ARTISTS_SCHEMA = pa.schema([
+    ('row', pa.int64()), ('artist', pa.string()), ('track_id', pa.string()), ('genre', pa.string()),
+])
+
+# (offset du chunk dans le CSV, hash SHA-1 du chunk brut, chargement(first_row) -> chunk)
+ChunkSource = Tuple[int, str, Callable]
+
+
+def file_sha256(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+class _CacheBuilder:
+    """Écrit le cache dans un dossier temporaire, publié seulement si tout le dataset a été lu"""
+
+    def __init__(self, tmp_path: str):
+        self.tmp_path = tmp_path
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        self.tracks_writer = pa.ipc.new_file(os.path.join(tmp_path, 'tracks.arrow'), TRACKS_SCHEMA)
+        self.artists_writer = pa.ipc.new_file(os.path.join(tmp_path, 'track_artists.arrow'), TRACK_ARTISTS_SCHEMA)
+        self.albums = set()
+        self.genres = set()
+        self.chunks = []
+        self.rows = 0
+
+    def add(self, offset: int, digest: str, chunk: PreparedChunk):
+        """Un chunk = un record batch dans chaque fichier (même position)"""
+        tracks = chunk.tracks.assign(row=chunk.tracks.index)
+        self.tracks_writer.write_batch(
+            pa.RecordBatch.from_pandas(tracks[TRACKS_SCHEMA.names], schema=TRACKS_SCHEMA, preserve_index=False)
+        )
+        self.artists_writer.write_batch(
+            pa.RecordBatch.from_pandas(chunk.track_artists, schema=TRACK_ARTISTS_SCHEMA, preserve_index=False)
+        )
+        self.albums.update(zip(tracks['album'], tracks['main_artist']))
+        self.genres.update(_explode_genres(tracks)['genre'])
+        self.chunks.append({'offset': offset, 'digest': digest, 'first_row': self.rows, 'rows': len(chunk)})
+        self.rows += len(chunk)
+
+    def close(self):
+        self.tracks_writer.close()
+        self.artists_writer.close()
+
+    def finish(self, meta: dict):
+        """Tables albums/genres dédupliquées puis métadonnées ; meta.json écrit en dernier"""
+        self.close()
+        albums = sorted(self.albums)
+        with pa.ipc.new_file(os.path.join(self.tmp_path, 'albums.arrow'),
+                             pa.schema([('name', pa.string()), ('artist', pa.string())])) as writer:
+            writer.write_table(pa.table({'name': [name for name, _ in albums],
+                                         'artist': [artist for _, artist in albums]}))
+        with pa.ipc.new_file(os.path.join(self.tmp_path, 'genres.arrow'),
+                             pa.schema([('name', pa.string())])) as writer:
+            writer.write_table(pa.table({'name': sorted(self.genres)}))
+
+        meta.update({'rows': self.rows, 'chunks': self.chunks,
+                     'albums': len(self.albums), 'genres': len(self.genres)})
+        with open(os.path.join(self.tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+
+    def abort(self):
+        self.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+class PreparedDatasetCache:
+    """Cache du dataset préparé, clé = SHA-256 du fichier source (invalidé dès que la source change)"""
+
+    def __init__(self, csv_path: str, chunk_size: int, cache_dir: str = None):
+        self.csv_path = csv_path
+        self.chunk_size = chunk_size
+        self.source_hash = file_sha256(csv_path)
+        self.cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(csv_path)), '.import_cache')
+        self.prefix = f"{os.path.basename(csv_path)}-"
+        self.path = os.path.join(
+            self.cache_dir, f"{self.prefix}{self.source_hash[:16]}-c{chunk_size}-v{CACHE_VERSION}"
+        )
+
+    def load_meta(self) -> dict:
+        meta_path = os.path.join(self.path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        valid = (meta.get('sha256') == self.source_hash and meta.get('version') == CACHE_VERSION
+                 and meta.get('chunk_size') == self.chunk_size)
+        return meta if valid else None
+
+    def remove_stale(self):
+        """Supprime les caches des versions précédentes du même fichier"""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(self.prefix) and path != self.path:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def iter_chunk_sources(self) -> Iterator[ChunkSource]:
+        """Chunks du cache s'il est à jour ; sinon chunks du CSV, préparés et mis en cache au passage"""
+        meta = self.load_meta()
+        if meta:
+            print(f"Cache préparé: {self.path} ({meta['rows']:,} lignes, {meta['albums']:,} albums, "
+                  f"{meta['genres']:,} genres)")
+            yield from self._iter_cached(meta)
+        else:
+            print(f"Cache absent ou périmé : construction pendant l'import ({self.path})")
+            yield from self._iter_and_build()
+
+    def _iter_cached(self, meta: dict) -> Iterator[ChunkSource]:
+        with pa.memory_map(os.path.join(self.path, 'tracks.arrow')) as tracks_source, \
+                pa.memory_map(os.path.join(self.path, 'track_artists.arrow')) as artists_source:
+            tracks_reader = pa.ipc.open_file(tracks_source)
+            artists_reader = pa.ipc.open_file(artists_source)
+
+            def load(batch_idx: int) -> PreparedChunk:
+                tracks = tracks_reader.get_batch(batch_idx).to_pandas().set_index('row')
+                tracks.index.name = None
+                return PreparedChunk(tracks, artists_reader.get_batch(batch_idx).to_pandas())
+
+            for batch_idx, chunk in enumerate(meta['chunks']):
+                # Les numéros de ligne globaux sont stockés dans le cache
+                yield chunk['offset'], chunk['digest'], lambda first_row, batch_idx=batch_idx: load(batch_idx)
+
+    def _iter_and_build(self) -> Iterator[ChunkSource]:
+        builder = _CacheBuilder(f"{self.path}.tmp")
+        try:
+            for raw_chunk in iter_raw_chunks(self.csv_path, self.chunk_size):
+                if builder is None:
+                    yield raw_chunk.offset, raw_chunk.digest, raw_chunk.to_dataframe
+                    continue
+
+                try:
+                    frames = SpotifyUltraFastImporter.prepare_chunk_frames(raw_chunk.to_dataframe())
+                except Exception as e:
+                    # Chunk non préparable en bloc : l'import isolera les lignes fautives, sans cache
+                    print(f"Cache abandonné (chunk à l'offset {raw_chunk.offset}): {e}")
+                    builder.abort()
+                    builder = None
+                    yield raw_chunk.offset, raw_chunk.digest, raw_chunk.to_dataframe
+                    continue
+
+                chunk = PreparedChunk.from_frames(frames, builder.rows)
+                builder.add(raw_chunk.offset, raw_chunk.digest, chunk)
+                yield raw_chunk.offset, raw_chunk.digest, lambda first_row, chunk=chunk: chunk
+
+            if builder is not None:
+                builder.finish({
+                    'version': CACHE_VERSION,
+                    'source': os.path.basename(self.csv_path),
+                    'sha256': self.source_hash,
+                    'chunk_size': self.chunk_size,
+                    'created_at': datetime.now().isoformat(timespec='seconds'),
+                })
+                shutil.rmtree(self.path, ignore_errors=True)
+                os.replace(builder.tmp_path, self.path)
+                builder = None
+                self.remove_stale()
+                print(f"Cache préparé écrit: {self.path}")
+        finally:
+            # Import interrompu : le cache partiel n'est jamais publié
+            if builder is not None:
+                builder.abort()
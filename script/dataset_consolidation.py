@@ -0,0 +1,172 @@
+"""
+Consolidation du dataset avant import : une ligne par track_id, avec la liste de ses genres
+Détecte aussi les quasi-doublons (même titre et mêmes artistes sous des track_id différents)
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+CONSOLIDATION_CHUNK_ROWS = 200000
+
+# Colonnes lues par la 1ère passe (regroupement et quasi-doublons)
+SCAN_COLUMNS = ['track_id', 'artists', 'album_name', 'track_name', 'popularity', 'track_genre']
+
+MAX_EXAMPLES = 5
+
+
+def consolidated_path(csv_path: str) -> str:
+    """data/dataset.csv(.gz/.zst) -> data/dataset.consolidated.csv"""
+    return re.sub(r'(\.csv)?(\.gz|\.zst|\.zstd)?$', '', csv_path, count=1) + '.consolidated.csv'
+
+
+def _artist_counts(artists: pd.Series) -> np.ndarray:
+    """Nombre d'artistes par ligne, selon les règles de parse_artists (';' prioritaire sur ',')"""
+    values = artists.fillna('')
+    separators = np.where(values.str.contains(';', regex=False), values.str.count(';'), values.str.count(','))
+    return np.where(values == '', 0, separators + 1)
+
+
+def _normalize(values: pd.Series) -> pd.Series:
+    return values.fillna('').str.strip().str.casefold().str.replace(r'\s*[;,]\s*', ';', regex=True)
+
+
+class DatasetConsolidator:
+    """2 passes en streaming : regroupement par track_id, puis écriture d'une ligne par track"""
+
+    def __init__(self, skip_rows: np.ndarray = None):
+        self.skip_rows = skip_rows if skip_rows is not None else np.array([], dtype=np.int64)
+
+    def _scan(self, csv_path: str) -> pd.DataFrame:
+        """1ère passe : (ligne, track_id, genre, titre, artistes...) de chaque ligne conservée"""
+        parts = []
+        first_row = 0
+        reader = pd.read_csv(csv_path, usecols=SCAN_COLUMNS, dtype=str, chunksize=CONSOLIDATION_CHUNK_ROWS)
+        with reader:
+            for chunk_df in reader:
+                chunk_df.index = pd.RangeIndex(first_row, first_row + len(chunk_df))
+                first_row += len(chunk_df)
+                parts.append(chunk_df[~chunk_df.index.isin(self.skip_rows)])
+        rows = pd.concat(parts) if parts else pd.DataFrame(columns=SCAN_COLUMNS)
+        # Même clé que l'import (_to_str) : un track_id manquant devient 'nan'
+        rows['track_id'] = rows['track_id'].fillna('nan')
+        rows['track_genre'] = rows['track_genre'].fillna('nan')
+        return rows
+
+    def consolidate(self, csv_path: str, out_path: str) -> Dict:
+        start = time.perf_counter()
+        rows = self._scan(csv_path)
+
+        # Dernière ligne de chaque track, comme l'import UNWIND (SET t = track) et neo4j_bulk_export.py
+        last = rows[~rows['track_id'].duplicated(keep='last')]
+        # Genres de chaque track : celui de la dernière ligne (genre principal) d'abord, puis les autres
+        # dans l'ordre d'apparition
+        pairs = pd.concat([last[['track_id', 'track_genre']], rows[['track_id', 'track_genre']]]).drop_duplicates()
+        genres = pairs.groupby('track_id', sort=False)['track_genre'].agg(';'.join)
+        genre_counts = pairs['track_id'].value_counts()
+
+        # 2ème passe : dernière ligne de chaque track uniquement, complétée par track_genres
+        keep_rows = last.index.to_numpy()
+        tmp_path = f"{out_path}.tmp"
+        written = 0
+        reader = pd.read_csv(csv_path, dtype=str, chunksize=CONSOLIDATION_CHUNK_ROWS)
+        with reader, open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+            first_row = 0
+            for chunk_df in reader:
+                chunk_df.index = pd.RangeIndex(first_row, first_row + len(chunk_df))
+                first_row += len(chunk_df)
+                kept = chunk_df[chunk_df.index.isin(keep_rows)]
+                kept = kept.assign(track_genres=genres.reindex(kept['track_id'].fillna('nan')).to_numpy())
+                kept.to_csv(out, header=written == 0, index=False)
+                written += len(kept)
+        os.replace(tmp_path, out_path)
+
+        near_duplicates = self._near_duplicates(last)
+        near_path = f"{out_path}.near_duplicates.csv"
+        if len(near_duplicates):
+            near_duplicates.to_csv(near_path, index=False)
+        elif os.path.exists(near_path):
+            os.remove(near_path)
+
+        # Volume d'écriture UNWIND (lignes de paramètres) avant / après consolidation
+        artists_before = int(_artist_counts(rows['artists']).sum())
+        artists_after = int(_artist_counts(last['artists']).sum())
+        writes_before = {'tracks': len(rows), 'performs': artists_before, 'belongs_to': len(rows),
+                         'has_genre': len(rows)}
+        writes_after = {'tracks': len(last), 'performs': artists_after, 'belongs_to': len(last),
+                        'has_genre': len(pairs)}
+
+        return {
+            'source': os.path.basename(csv_path),
+            'output': out_path,
+            'rows': len(rows),
+            'skipped_rows': len(self.skip_rows),
+            'tracks': len(last),
+            'multi_genre_tracks': int((genre_counts > 1).sum()),
+            'max_genres': int(genre_counts.max()) if len(genre_counts) else 0,
+            'writes_before': writes_before,
+            'writes_after': writes_after,
+            'near_duplicate_groups': int(near_duplicates['group'].nunique()) if len(near_duplicates) else 0,
+            'near_duplicate_tracks': len(near_duplicates),
+            'near_duplicates': near_path if len(near_duplicates) else None,
+            'seconds': round(time.perf_counter() - start, 2),
+        }
+
+    @staticmethod
+    def _near_duplicates(tracks: pd.DataFrame) -> pd.DataFrame:
+        """Tracks de même titre et mêmes artistes (casse et espaces ignorés) sous des track_id différents"""
+        key = _normalize(tracks['track_name']) + '\x1f' + _normalize(tracks['artists'])
+        in_group = key.duplicated(keep=False) & tracks['track_name'].notna()
+        candidates = tracks[in_group].assign(group=pd.factorize(key[in_group])[0])
+        return candidates.sort_values(['group', 'popularity'], kind='stable')[
+            ['group', 'track_id', 'track_name', 'artists', 'album_name', 'popularity', 'track_genre']
+        ]
+
+
+def print_report(report: Dict):
+    print("\n=== CONSOLIDATION DU DATASET ===")
+    removed = report['rows'] - report['tracks']
+    share = removed / report['rows'] if report['rows'] else 0
+    print(f"{report['rows']:,} lignes -> {report['tracks']:,} tracks ({removed:,} lignes fusionnées, -{share:.1%}) "
+          f"en {report['seconds']:.1f}s")
+    print(f"{report['multi_genre_tracks']:,} track(s) sur plusieurs genres (jusqu'à {report['max_genres']})")
+
+    before, after = report['writes_before'], report['writes_after']
+    for key in before:
+        print(f"- {key}: {before[key]:,} -> {after[key]:,} lignes UNWIND")
+    total_before, total_after = sum(before.values()), sum(after.values())
+    if total_before:
+        print(f"Écritures: {total_before:,} -> {total_after:,} (-{1 - total_after / total_before:.1%})")
+
+    if report['near_duplicates']:
+        print(f"Quasi-doublons (même titre + mêmes artistes): {report['near_duplicate_groups']:,} groupe(s), "
+              f"{report['near_duplicate_tracks']:,} tracks -> {report['near_duplicates']}")
+    print(f"Dataset consolidé: {report['output']}")
+
+
+def consolidate_dataset(csv_path: str, out_path: str = None, skip_rows: np.ndarray = None) -> Dict:
+    """Écrit le dataset consolidé (défaut <dataset>.consolidated.csv) et <sortie>.consolidation.json"""
+    out_path = out_path or consolidated_path(csv_path)
+    report = DatasetConsolidator(skip_rows).consolidate(csv_path, out_path)
+    with open(f"{out_path}.consolidation.json", 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consolidation du dataset Spotify (une ligne par track_id)")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV (.gz/.zst acceptés)")
+    parser.add_argument('--out', help="Dataset consolidé (défaut : <dataset>.consolidated.csv)")
+    args = parser.parse_args()
+    consolidate_dataset(args.csv, args.out)
+
+
+if __name__ == "__main__":
+    main()
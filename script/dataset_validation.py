@@ -0,0 +1,208 @@
+"""
+Validation colonnaire du dataset avant import : types, plages, track_id manquants ou en conflit, artistes illisibles
+Produit un rapport compact et un fichier de quarantaine des lignes rejetées
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from neo4j_import import CSV_DTYPES, coerce_csv_types
+
+VALIDATION_CHUNK_ROWS = 200000
+
+# Plages acceptées (bornes incluses, None = pas de borne)
+RANGES = {
+    'popularity': (0, 100),
+    'duration_ms': (1, None),
+    'danceability': (0, 1),
+    'energy': (0, 1),
+    'key': (0, 11),
+    'loudness': (-60, 5),
+    'mode': (0, 1),
+    'speechiness': (0, 1),
+    'acousticness': (0, 1),
+    'instrumentalness': (0, 1),
+    'liveness': (0, 1),
+    'valence': (0, 1),
+    'tempo': (0, 250),
+    'time_signature': (0, 7),
+}
+
+# Colonnes obligatoires : une valeur manquante fait échouer l'import de la ligne
+REQUIRED_COLUMNS = ['track_id', 'popularity', 'duration_ms', 'explicit', 'key', 'mode', 'time_signature']
+
+# Propriétés qui doivent être identiques entre deux lignes d'une même track (le genre peut varier)
+TRACK_COLUMNS = [column for column in list(CSV_DTYPES) + ['instrumentalness'] if column != 'track_genre']
+
+MAX_EXAMPLES = 5
+
+
+class DatasetValidator:
+    """Valide le dataset chunk par chunk ; l'état global ne garde qu'un hash par track_id"""
+
+    def __init__(self):
+        self.rows = 0
+        self.rejected = Counter()
+        self.warnings = Counter()
+        self.examples = {}
+        self.rejected_rows = []
+        self.track_hashes = {}  # hash(track_id) -> hash des propriétés de la 1ère occurrence
+
+    def _example(self, rule: str, mask: np.ndarray, rows: np.ndarray):
+        examples = self.examples.setdefault(rule, [])
+        examples.extend(rows[mask][:MAX_EXAMPLES - len(examples)].tolist())
+
+    def _flag(self, reasons: np.ndarray, mask, rule: str, rows: np.ndarray) -> np.ndarray:
+        mask = np.asarray(mask, dtype=bool)
+        count = int(mask.sum())
+        if count:
+            self.rejected[rule] += count
+            self._example(rule, mask, rows)
+            reasons = np.where(mask, reasons + rule + ';', reasons)
+        return reasons
+
+    def validate_chunk(self, raw_df: pd.DataFrame) -> np.ndarray:
+        """Raisons de rejet de chaque ligne ('' si valide), sur un chunk lu en texte"""
+        rows = raw_df.index.to_numpy()
+        typed = coerce_csv_types(raw_df)
+        typed['instrumentalness'] = pd.to_numeric(raw_df['instrumentalness'], errors='coerce')
+        reasons = np.full(len(raw_df), '', dtype=object)
+
+        # Valeurs manquantes / non typables
+        for column in REQUIRED_COLUMNS:
+            reasons = self._flag(reasons, raw_df[column].isna(), f"missing:{column}", rows)
+        for column in RANGES:
+            invalid = typed[column].isna() & raw_df[column].notna()
+            if column == 'instrumentalness':
+                # L'import remplace une valeur non numérique par 0.0 : simple avertissement
+                self.warnings['type:instrumentalness'] += int(invalid.sum())
+                continue
+            reasons = self._flag(reasons, invalid, f"type:{column}", rows)
+        invalid = typed['explicit'].isna() & raw_df['explicit'].notna()
+        reasons = self._flag(reasons, invalid, "type:explicit", rows)
+
+        # Plages
+        for column, (low, high) in RANGES.items():
+            values = typed[column].astype('float64')
+            out = pd.Series(False, index=raw_df.index)
+            if low is not None:
+                out |= values < low
+            if high is not None:
+                out |= values > high
+            reasons = self._flag(reasons, out.fillna(False), f"range:{column}", rows)
+
+        # Artistes : chaîne non vide dont le premier artiste est vide (ex. ";", " , ", "; A")
+        artists = raw_df['artists']
+        present = artists.notna() & (artists.str.strip() != '')
+        self.warnings['missing:artists'] += int((~present).sum())
+        separator_first = artists.where(artists.str.contains(';', regex=False), artists.str.replace(',', ';', regex=False))
+        first_artist = separator_first.str.split(';').str[0].str.strip()
+        reasons = self._flag(reasons, present & (first_artist == ''), "artists:unparseable", rows)
+
+        for column in ('album_name', 'track_name', 'track_genre'):
+            self.warnings[f"missing:{column}"] += int(raw_df[column].isna().sum())
+
+        # Même track_id avec des propriétés différentes de sa 1ère occurrence (tout le dataset) : simple
+        # avertissement, l'import garde la dernière ligne (SET t = track), comme la consolidation et l'export bulk
+        has_id = raw_df['track_id'].notna().to_numpy()
+        id_hashes = pd.util.hash_array(raw_df['track_id'].fillna('').to_numpy(dtype=object))
+        content = pd.util.hash_pandas_object(raw_df[TRACK_COLUMNS], index=False).to_numpy()
+        first_in_chunk = pd.Series(content).groupby(id_hashes).transform('first').to_numpy()
+        expected = np.fromiter(
+            (self.track_hashes.get(id_hash, first) for id_hash, first in zip(id_hashes.tolist(), first_in_chunk.tolist())),
+            dtype=np.uint64, count=len(raw_df),
+        )
+        conflicts = has_id & (content != expected)
+        if conflicts.any():
+            self.warnings['conflict:track_id'] += int(conflicts.sum())
+            self._example('conflict:track_id', conflicts, rows)
+
+        new_ids = has_id & ~pd.Series(id_hashes).duplicated().to_numpy()
+        for id_hash, first in zip(id_hashes[new_ids].tolist(), first_in_chunk[new_ids].tolist()):
+            self.track_hashes.setdefault(id_hash, first)
+
+        return reasons
+
+    def validate(self, csv_path: str, quarantine_path: str) -> Dict:
+        """Valide tout le fichier (lecture texte par chunks) ; écrit les lignes rejetées en quarantaine"""
+        start = time.perf_counter()
+        quarantine_written = False
+        tmp_path = f"{quarantine_path}.tmp"
+
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as quarantine:
+            reader = pd.read_csv(csv_path, dtype=str, chunksize=VALIDATION_CHUNK_ROWS, compression='infer')
+            with reader:
+                for raw_df in reader:
+                    raw_df.index = pd.RangeIndex(self.rows, self.rows + len(raw_df))
+                    self.rows += len(raw_df)
+
+                    reasons = self.validate_chunk(raw_df)
+                    rejected = reasons != ''
+                    if rejected.any():
+                        bad = raw_df[rejected].assign(reasons=[reason.rstrip(';') for reason in reasons[rejected]])
+                        bad.to_csv(quarantine, header=not quarantine_written, index_label='row')
+                        quarantine_written = True
+                        self.rejected_rows.extend(raw_df.index[rejected].tolist())
+
+        if quarantine_written:
+            os.replace(tmp_path, quarantine_path)
+        else:
+            os.remove(tmp_path)
+            if os.path.exists(quarantine_path):
+                os.remove(quarantine_path)  # Quarantaine d'un run précédent, plus d'actualité
+
+        elapsed = time.perf_counter() - start
+        return {
+            'source': os.path.basename(csv_path),
+            'rows': self.rows,
+            'rejected_rows': len(self.rejected_rows),
+            'rules': dict(self.rejected),
+            'examples': self.examples,
+            'warnings': {key: count for key, count in self.warnings.items() if count},
+            'quarantine': quarantine_path if quarantine_written else None,
+            'seconds': round(elapsed, 2),
+        }
+
+
+def print_report(report: Dict):
+    print("\n=== VALIDATION DU DATASET ===")
+    rate = report['rows'] / report['seconds'] if report['seconds'] else 0
+    print(f"{report['rows']:,} lignes en {report['seconds']:.1f}s ({rate:,.0f} lignes/s), "
+          f"{report['rejected_rows']:,} rejetée(s)")
+    for rule, count in sorted(report['rules'].items(), key=lambda item: -item[1]):
+        examples = ', '.join(str(row) for row in report['examples'].get(rule, []))
+        print(f"- {rule}: {count:,} (lignes {examples})")
+    for rule, count in report['warnings'].items():
+        examples = ', '.join(str(row) for row in report['examples'].get(rule, []))
+        print(f"- avertissement {rule}: {count:,}" + (f" (lignes {examples})" if examples else ""))
+    if report['quarantine']:
+        print(f"Quarantaine: {report['quarantine']}")
+
+
+def validate_dataset(csv_path: str) -> Dict:
+    """Valide le dataset, écrit <csv>.quarantine.csv et <csv>.validation.json ; renvoie le rapport"""
+    validator = DatasetValidator()
+    report = validator.validate(csv_path, f"{csv_path}.quarantine.csv")
+    with open(f"{csv_path}.validation.json", 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    report['rejected_row_numbers'] = np.array(validator.rejected_rows, dtype=np.int64)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validation du dataset Spotify avant import")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV (.gz/.zst acceptés)")
+    args = parser.parse_args()
+    validate_dataset(args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Import asynchrone (driver neo4j async) : la préparation du chunk N+1 se fait dans un thread
+pendant que les requêtes UNWIND du chunk N sont en cours côté serveur
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+import pandas as pd
+from dotenv import load_dotenv
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import Neo4jError, TransientError
+
+from neo4j_import import (
+    CHUNK_SIZE, IMPORT_PHASES, MAX_DEADLOCK_RETRIES, NODE_PHASE_KEYS, SpotifyUltraFastImporter, _is_overload_error,
+)
+
+# Chunks préparés en attente d'écriture (borne la mémoire)
+QUEUE_SIZE = 2
+
+
+class SpotifyAsyncImporter(SpotifyUltraFastImporter):
+    """Import MERGE pipeliné : préparation (thread) et écritures (asyncio) se recouvrent"""
+
+    def __init__(self, uri: str, user: str, password: str, queue_size: int = QUEUE_SIZE, **kwargs):
+        super().__init__(uri, user, password, **kwargs)
+        self._uri = uri
+        self._auth = (user, password)
+        self.async_driver = None  # Créé dans la boucle asyncio (import_csv_async)
+        self.queue_size = max(1, queue_size)
+        self.timings = {'preparation': 0.0, 'write': 0.0}
+
+    def enable_fresh_load(self):
+        # Le payload fresh du chunk N+1 dépend des noeuds committés par le chunk N : incompatible avec le pipeline
+        raise RuntimeError("Le mode fresh n'est pas disponible en import asynchrone (utiliser neo4j_import.py --fresh)")
+
+    async def _run_async_with_retry(self, session, key: str, query: str, rows: list):
+        """Exécute un batch, rejoué si Neo4j détecte un deadlock ; renvoie le résumé"""
+        for attempt in range(MAX_DEADLOCK_RETRIES + 1):
+            try:
+                result = await session.run(query, rows=rows)
+                return await result.consume()
+            except TransientError as e:
+                if attempt == MAX_DEADLOCK_RETRIES or _is_overload_error(e):
+                    raise
+                if 'DeadlockDetected' in (e.code or ''):
+                    with self._stats_lock:
+                        self.deadlock_retries[key] += 1
+                await asyncio.sleep(0.1 * 2 ** attempt)
+
+    async def _run_phase_async(self, key: str, query: str, rows: list):
+        """Une phase, par batches adaptatifs (même logique que _run_batched), dans sa propre session"""
+        async with self.async_driver.session() as session:
+            start = 0
+            while start < len(rows):
+                batch = rows[start:start + self.batch_sizer.size(key)]
+                batch_start = time.perf_counter()
+                try:
+                    summary = await self._run_async_with_retry(session, key, query, batch)
+                except Neo4jError as e:
+                    if not _is_overload_error(e) or len(batch) <= self.batch_sizer.min_size:
+                        raise
+                    size = self.batch_sizer.shrink(key, len(batch))
+                    print(f"Batch {key} de {len(batch):,} lignes refusé ({e.code}), nouvelle taille {size:,}")
+                    continue
+                elapsed = time.perf_counter() - batch_start
+                self.batch_sizer.record(key, len(batch), elapsed)
+                self.telemetry.record(key, len(batch), elapsed, summary)
+                start += len(batch)
+
+    async def write_payload_async(self, payload: Dict[str, list]):
+        """Noeuds : 4 phases indépendantes en parallèle ; relations ensuite, dans l'ordre (verrous partagés)"""
+        self.track_statistics(payload)
+        await asyncio.gather(*(
+            self._run_phase_async(key, query, payload[key])
+            for _, key, query in IMPORT_PHASES if key in NODE_PHASE_KEYS
+        ))
+        for _, key, query in IMPORT_PHASES:
+            if key not in NODE_PHASE_KEYS:
+                await self._run_phase_async(key, query, payload[key])
+
+    def _next_prepared(self, chunks):
+        """Thread de préparation : lit et prépare le chunk suivant (None en fin de fichier)"""
+        chunk_df = next(chunks, None)
+        if chunk_df is None:
+            return None
+
+        start = time.perf_counter()
+        try:
+            payload = self.prepare_chunk(chunk_df)
+        except Exception as e:
+            print(f"Préparation impossible (lignes {chunk_df.index[0]:,}+): {e}")
+            payload = None
+        self.timings['preparation'] += time.perf_counter() - start
+        return chunk_df, payload
+
+    async def _write_chunk(self, chunk_df: pd.DataFrame, payload: Dict[str, list], chunk_label: str) -> list:
+        """Écrit un chunk avec retry ; en échec persistant, isole les lignes fautives (chemin synchrone)"""
+        self.telemetry.start_chunk(chunk_label)
+        start = time.perf_counter()
+        retry_count = 0
+        max_retries = 3
+
+        while payload is not None and retry_count < max_retries:
+            try:
+                await self.write_payload_async(payload)
+                self.timings['write'] += time.perf_counter() - start
+                print(f"Chunk {chunk_label} terminé")
+                self.telemetry.end_chunk(len(chunk_df), [], retries=retry_count)
+                return []
+            except Exception as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    print(f"Chunk {chunk_label} échoué après {max_retries} tentatives: {e}")
+                else:
+                    print(f"Retry {retry_count} pour chunk {chunk_label}")
+                    await asyncio.sleep(3)
+
+        print(f"Découpage du chunk {chunk_label} pour isoler les lignes en erreur")
+        failed_rows = await asyncio.get_running_loop().run_in_executor(
+            None, self._import_split, chunk_df, chunk_label
+        )
+        self.timings['write'] += time.perf_counter() - start
+        print(f"Chunk {chunk_label} terminé avec {len(failed_rows)} ligne(s) rejetée(s)")
+        self.telemetry.end_chunk(len(chunk_df), failed_rows, retries=retry_count)
+        return failed_rows
+
+    async def import_csv_async(self, csv_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+        """Producteur (thread de préparation) et consommateur (écritures async) reliés par une file bornée"""
+        print(f"--- Import async par chunks de {chunk_size:,} lignes (file de {self.queue_size} chunks)")
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        chunks = self.iter_csv_chunks(csv_path, chunk_size)
+        total_rows = 0
+
+        async def produce():
+            try:
+                with ThreadPoolExecutor(max_workers=1) as prep_executor:
+                    while True:
+                        prepared = await loop.run_in_executor(prep_executor, self._next_prepared, chunks)
+                        await queue.put(prepared)  # Bloque si le consommateur a queue_size chunks de retard
+                        if prepared is None:
+                            return
+            except Exception as e:
+                # Erreur de lecture du CSV : transmise au consommateur
+                await queue.put(e)
+
+        self.async_driver = AsyncGraphDatabase.driver(self._uri, auth=self._auth)
+        producer = asyncio.create_task(produce())
+        try:
+            chunk_idx = 0
+            while True:
+                prepared = await queue.get()
+                if prepared is None:
+                    break
+                if isinstance(prepared, Exception):
+                    raise prepared
+                chunk_df, payload = prepared
+                chunk_idx += 1
+                print(f"\n======== Chunk {chunk_idx} - Lignes {total_rows:,} à {total_rows + len(chunk_df):,} ========")
+                total_rows += len(chunk_df)
+                await self._write_chunk(chunk_df, payload, f"{chunk_idx}")
+            await producer
+        finally:
+            producer.cancel()
+            await self.async_driver.close()
+
+        print(f"\nPréparation {self.timings['preparation']:.1f}s + écriture {self.timings['write']:.1f}s "
+              f"(recouvertes par le pipeline)")
+
+        print("\n=== Agrégats des statistiques... ===")
+        self.refresh_statistics()
+        return total_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import asynchrone pipeliné du dataset Spotify dans Neo4j")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV (.gz/.zst acceptés)")
+    parser.add_argument('--queue-size', type=int, default=QUEUE_SIZE,
+                        help="Chunks préparés en avance au maximum (mémoire)")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help="Taille initiale des batches UNWIND, ajustée ensuite par phase")
+    parser.add_argument('--target-latency', type=float, default=2.0,
+                        help="Latence cible d'un batch en secondes")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    NEO4J_URI = os.getenv('NEO4J_URI')
+    NEO4J_USER = os.getenv('NEO4J_USERNAME')
+    NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]):
+        print("❌ Variables d'environnement manquantes")
+        return
+
+    importer = SpotifyAsyncImporter(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, queue_size=args.queue_size,
+                                    batch_size=args.batch_size, target_latency=args.target_latency,
+                                    telemetry_path=f"{args.csv}.telemetry.ndjson")
+
+    try:
+        start_time = time.time()
+        importer.create_constraints_and_indexes()
+
+        print("\n=== IMPORT ASYNC... ===")
+        total_rows = asyncio.run(importer.import_csv_async(args.csv))
+
+        importer.get_database_stats()
+        importer.batch_sizer.report()
+        importer.telemetry.report()
+
+        elapsed = time.time() - start_time
+        importer.telemetry.end_run(rows=total_rows, elapsed_s=round(elapsed, 3), mode='async')
+        print(f"\n======== TERMINÉ en {elapsed:.1f} secondes ! ========")
+        print(f"Performance: {total_rows / elapsed:.0f} lignes/seconde (async, file de {importer.queue_size} chunks)")
+        print("Comparaison avec l'import synchrone : python benchmark_import.py --engines sync async")
+
+    except Exception as e:
+        print(f"Erreur: {e}")
+
+    finally:
+        importer.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Export du dataset au format CSV de `neo4j-admin database import`
+Reconstruction complète hors ligne, sans aucun aller-retour avec la base
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from neo4j_import import (
+    CHUNK_SIZE, TRACK_PROPERTIES, SpotifyUltraFastImporter, _artist_genres, _explode_genres, iter_raw_chunks,
+)
+
+# En-têtes typés attendus par neo4j-admin (types identiques à ceux écrits par l'import UNWIND)
+TRACK_TYPES = {
+    'popularity': 'long', 'duration_ms': 'long', 'explicit': 'boolean', 'danceability': 'double',
+    'energy': 'double', 'key': 'long', 'loudness': 'double', 'mode': 'boolean', 'speechiness': 'double',
+    'acousticness': 'double', 'instrumentalness': 'double', 'liveness': 'double', 'valence': 'double',
+    'tempo': 'double', 'time_signature': 'long',
+}
+
+NODE_FILES = {
+    'Track': ('nodes_track.csv', [':ID(Track)'] + [
+        f"{prop}:{TRACK_TYPES[prop]}" if prop in TRACK_TYPES else prop for prop in TRACK_PROPERTIES
+    ] + ['genres:string[]']),  # Tableau séparé par ';' (délimiteur par défaut de neo4j-admin)
+    'Artist': ('nodes_artist.csv', [':ID(Artist)', 'name']),
+    'Album': ('nodes_album.csv', [':ID(Album)', 'name', 'artist']),
+    'Genre': ('nodes_genre.csv', [':ID(Genre)', 'name']),
+}
+
+RELATIONSHIP_FILES = {
+    'PERFORMS': ('rels_performs.csv', [':START_ID(Artist)', ':END_ID(Track)']),
+    'BELONGS_TO': ('rels_belongs_to.csv', [':START_ID(Track)', ':END_ID(Album)']),
+    'HAS_GENRE': ('rels_has_genre.csv', [':START_ID(Track)', ':END_ID(Genre)']),
+    'PLAYS_GENRE': ('rels_plays_genre.csv', [':START_ID(Artist)', ':END_ID(Genre)']),
+    'CREATED': ('rels_created.csv', [':START_ID(Artist)', ':END_ID(Album)']),
+}
+
+
+class StableIds:
+    """Attribue des IDs entiers stables (ordre de première apparition dans le dataset)"""
+
+    def __init__(self):
+        self.ids = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self.ids
+
+    def assign(self, keys) -> tuple:
+        """Renvoie (ids de toutes les clés, masque des clés vues pour la première fois)"""
+        ids = np.empty(len(keys), dtype=np.int64)
+        is_new = np.zeros(len(keys), dtype=bool)
+        for i, key in enumerate(keys):
+            key_id = self.ids.get(key)
+            if key_id is None:
+                key_id = self.ids[key] = len(self.ids)
+                is_new[i] = True
+            ids[i] = key_id
+        return ids, is_new
+
+
+class SpotifyBulkExporter:
+    """Transforme dataset.csv en fichiers noeuds/relations pour neo4j-admin"""
+
+    def __init__(self, out_dir: str, chunk_size: int = CHUNK_SIZE):
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.track_ids = StableIds()
+        self.artist_ids = StableIds()
+        self.album_ids = StableIds()
+        self.genre_ids = StableIds()
+        # Relations déjà écrites, encodées (start << 32 | end) pour limiter la mémoire
+        self.written_relationships = {rel_type: set() for rel_type in RELATIONSHIP_FILES}
+        self.pending_created = []
+        self.counts = {name: 0 for name in list(NODE_FILES) + list(RELATIONSHIP_FILES)}
+
+    def last_rows_by_track(self, csv_path: str) -> Dict[str, int]:
+        """1ère passe : dernière ligne de chaque track_id (l'import UNWIND garde la dernière, SET t = track)"""
+        last_rows = {}
+        first_row = 0
+        reader = pd.read_csv(csv_path, usecols=['track_id'], dtype=str,
+                             chunksize=self.chunk_size, compression='infer')
+        with reader:
+            for chunk in reader:
+                track_ids = chunk['track_id'].astype(object).where(chunk['track_id'].notna(), 'nan')
+                last_rows.update(zip(track_ids, range(first_row, first_row + len(chunk))))
+                first_row += len(chunk)
+        return last_rows
+
+    def _iter_chunks(self, csv_path: str) -> Iterator[pd.DataFrame]:
+        first_row = 0
+        for raw_chunk in iter_raw_chunks(csv_path, self.chunk_size):
+            chunk_df = raw_chunk.to_dataframe(first_row)
+            first_row += len(chunk_df)
+            yield chunk_df
+
+    def _write_relationships(self, files, rel_type: str, start_ids: np.ndarray, end_ids: np.ndarray):
+        """Écrit les relations pas encore exportées (MERGE côté import UNWIND)"""
+        written = self.written_relationships[rel_type]
+        keys = (start_ids.astype(np.int64) << 32) | end_ids.astype(np.int64)
+        keys, first = np.unique(keys, return_index=True)
+        is_new = np.fromiter((int(key) not in written for key in keys), dtype=bool, count=len(keys))
+        written.update(keys[is_new].tolist())
+
+        order = np.sort(first[is_new])
+        pd.DataFrame({'start': start_ids[order], 'end': end_ids[order]}).to_csv(
+            files[rel_type], header=False, index=False
+        )
+        self.counts[rel_type] += len(order)
+
+    def export_chunk(self, files, chunk_df: pd.DataFrame, last_rows: Dict[str, int]):
+        """Exporte un chunk : mêmes règles de parsing (parse_artists, clé album) que l'import UNWIND"""
+        global_rows = chunk_df.index.to_numpy()
+        frames = SpotifyUltraFastImporter.prepare_chunk_frames(chunk_df)
+        tracks = frames['tracks']
+        track_artists = frames['track_artists']
+
+        track_keys = tracks['track_id'].tolist()
+        track_ids, _ = self.track_ids.assign(track_keys)
+        album_keys = list(zip(tracks['album'], tracks['main_artist']))
+        album_ids, new_albums = self.album_ids.assign(album_keys)
+        track_genres = _explode_genres(tracks)
+        genre_ids, new_genres = self.genre_ids.assign(track_genres['genre'].tolist())
+        artist_ids, new_artists = self.artist_ids.assign(track_artists['artist'].tolist())
+
+        # Noeuds : une ligne par entité, les propriétés de Track viennent de sa dernière ligne
+        is_last = np.fromiter((last_rows[key] == row for key, row in zip(track_keys, global_rows)),
+                              dtype=bool, count=len(track_keys))
+        track_nodes = tracks.loc[is_last, TRACK_PROPERTIES + ['genres']].copy()
+        for column in ('explicit', 'mode'):
+            track_nodes[column] = np.where(track_nodes[column], 'true', 'false')
+        track_nodes.insert(0, 'id', track_ids[is_last])
+        track_nodes.to_csv(files['Track'], header=False, index=False)
+
+        pd.DataFrame({'id': artist_ids[new_artists], 'name': track_artists['artist'][new_artists]}).to_csv(
+            files['Artist'], header=False, index=False
+        )
+        pd.DataFrame({
+            'id': album_ids[new_albums],
+            'name': tracks['album'][new_albums],
+            'artist': tracks['main_artist'][new_albums],
+        }).to_csv(files['Album'], header=False, index=False)
+        pd.DataFrame({'id': genre_ids[new_genres], 'name': track_genres['genre'][new_genres]}).to_csv(
+            files['Genre'], header=False, index=False
+        )
+        self.counts['Track'] += int(is_last.sum())
+        self.counts['Artist'] += int(new_artists.sum())
+        self.counts['Album'] += int(new_albums.sum())
+        self.counts['Genre'] += int(new_genres.sum())
+
+        # Relations
+        rows = track_artists['row'].to_numpy()
+        artist_genres = _artist_genres(track_artists, track_genres)
+        plays_artist_ids = np.array([self.artist_ids.ids[artist] for artist in artist_genres['artist']], dtype=np.int64)
+        plays_genre_ids = np.array([self.genre_ids.ids[genre] for genre in artist_genres['genre']], dtype=np.int64)
+        self._write_relationships(files, 'PERFORMS', artist_ids, track_ids[rows])
+        self._write_relationships(files, 'BELONGS_TO', track_ids, album_ids)
+        self._write_relationships(files, 'HAS_GENRE', track_ids[track_genres['row'].to_numpy()], genre_ids)
+        self._write_relationships(files, 'PLAYS_GENRE', plays_artist_ids, plays_genre_ids)
+
+        # CREATED n'existe que si l'artiste principal est un Artist (pas "Unknown" ni "")
+        for main_artist, album_id in zip(tracks['main_artist'][new_albums], album_ids[new_albums]):
+            self.pending_created.append((main_artist, int(album_id)))
+
+    def _write_created(self, files):
+        """CREATED en fin d'export, une fois tous les artistes connus"""
+        resolved = [(self.artist_ids.ids[artist], album_id)
+                    for artist, album_id in self.pending_created if artist in self.artist_ids]
+        if resolved:
+            start_ids, end_ids = (np.array(ids, dtype=np.int64) for ids in zip(*resolved))
+            self._write_relationships(files, 'CREATED', start_ids, end_ids)
+
+    def export(self, csv_path: str):
+        """Export complet en streaming (2 lectures du CSV, un seul chunk en mémoire)"""
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        print("=== Passe 1 : index des dernières occurrences ===")
+        last_rows = self.last_rows_by_track(csv_path)
+        print(f"{len(last_rows):,} tracks uniques")
+
+        print("\n=== Passe 2 : écriture des fichiers ===")
+        files = {}
+        try:
+            for name, (filename, header) in {**NODE_FILES, **RELATIONSHIP_FILES}.items():
+                files[name] = open(os.path.join(self.out_dir, filename), 'w', encoding='utf-8', newline='')
+                files[name].write(','.join(header) + '\n')
+
+            for chunk_idx, chunk_df in enumerate(self._iter_chunks(csv_path)):
+                self.export_chunk(files, chunk_df, last_rows)
+                print(f"Chunk {chunk_idx + 1} exporté ({chunk_df.index[-1] + 1:,} lignes)")
+
+            self._write_created(files)
+        finally:
+            for f in files.values():
+                f.close()
+
+        print("\n=== Fichiers générés ===")
+        for name, count in self.counts.items():
+            print(f"{name}: {count:,}")
+
+    def admin_command(self, database: str = 'neo4j') -> str:
+        """Commande neo4j-admin correspondant aux fichiers générés"""
+        args = [f"neo4j-admin database import full {database}", "--overwrite-destination", "--multiline-fields=true"]
+        args += [f"--nodes={label}={os.path.join(self.out_dir, filename)}" for label, (filename, _) in NODE_FILES.items()]
+        args += [f"--relationships={rel_type}={os.path.join(self.out_dir, filename)}"
+                 for rel_type, (filename, _) in RELATIONSHIP_FILES.items()]
+        return " \\\n    ".join(args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génère les CSV de neo4j-admin database import")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV (.gz/.zst acceptés)")
+    parser.add_argument('--out', default="../data/bulk_import", help="Dossier de sortie")
+    parser.add_argument('--database', default="neo4j", help="Base cible de neo4j-admin")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    exporter = SpotifyBulkExporter(args.out)
+    exporter.export(args.csv)
+    print(f"\n======== TERMINÉ en {time.time() - start_time:.1f} secondes ! ========")
+
+    print("\nImport hors ligne (base arrêtée) :")
+    print(exporter.admin_command(args.database))
+    print("\nPuis créer contraintes et index : python neo4j_import.py --constraints-only")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Import incrémental (delta) : seules les tracks nouvelles, modifiées ou supprimées sont écrites
+Chaque Track stocke un hash de son contenu (propriétés + liens artistes/album/genre)
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from neo4j_import import CHUNK_SIZE, IMPORT_PHASES, TRACK_PROPERTIES, SpotifyUltraFastImporter, iter_raw_chunks
+
+# Relations portées par une track, recréées quand son contenu change
+RESET_TRACK_RELATIONS_QUERY = """
+    UNWIND $rows as track_id
+    MATCH (t:Track {track_id: track_id})-[r:PERFORMS|BELONGS_TO|HAS_GENRE]-()
+    DELETE r
+    """
+
+DELETE_TRACKS_QUERY = """
+    UNWIND $rows as track_id
+    MATCH (t:Track {track_id: track_id})
+    DETACH DELETE t
+    """
+
+# Genres et artistes actuels des tracks, lus avant suppression de leurs relations
+PREVIOUS_TRACK_NODES_QUERY = """
+    UNWIND $rows as track_id
+    MATCH (t:Track {track_id: track_id})
+    OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
+    OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
+    RETURN collect(DISTINCT g.name) as genres, collect(DISTINCT a.name) as artists
+    """
+
+# PLAYS_GENRE / CREATED sont déduits des tracks : supprimés quand plus aucune track ne les justifie
+PRUNE_ARTIST_RELATIONS_QUERY = """
+    UNWIND $rows as artist_name
+    MATCH (a:Artist {name: artist_name})
+    OPTIONAL MATCH (a)-[pg:PLAYS_GENRE]->(g:Genre)
+    WHERE NOT EXISTS { (a)-[:PERFORMS]->(:Track)-[:HAS_GENRE]->(g) }
+    DELETE pg
+    WITH DISTINCT a
+    OPTIONAL MATCH (a)-[c:CREATED]->(al:Album)
+    WHERE NOT EXISTS { (:Track)-[:BELONGS_TO]->(al) }
+    DELETE c
+    """
+
+# Phases d'une transaction de mise à jour / suppression (les lignes de 'prune' sont les anciens artistes)
+RESET_PHASES = ([("Reset des relations", 'reset', RESET_TRACK_RELATIONS_QUERY)] + IMPORT_PHASES
+                + [("Nettoyage PLAYS_GENRE/CREATED", 'prune', PRUNE_ARTIST_RELATIONS_QUERY)])
+DELETE_PHASES = [(None, 'delete', DELETE_TRACKS_QUERY), (None, 'prune', PRUNE_ARTIST_RELATIONS_QUERY)]
+
+EXISTING_HASHES_QUERY = "MATCH (t:Track) RETURN t.track_id as track_id, t.content_hash as content_hash"
+
+
+def row_hashes(frames: Dict[str, pd.DataFrame]) -> np.ndarray:
+    """Hash (uint64) de chaque ligne préparée : propriétés, genres, album, artiste principal et artistes"""
+    tracks = frames['tracks']
+    track_artists = frames['track_artists']
+
+    content = pd.util.hash_pandas_object(
+        tracks[TRACK_PROPERTIES + ['genres', 'album', 'main_artist']], index=False
+    ).to_numpy()
+
+    # Artistes de chaque ligne : XOR des hash (l'ordre n'a pas d'effet sur les relations PERFORMS)
+    artists = np.zeros(len(tracks), dtype=np.uint64)
+    if len(track_artists):
+        artist_hashes = pd.util.hash_array(track_artists['artist'].to_numpy(dtype=object))
+        rows = track_artists['row'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        artists[rows[starts]] = np.bitwise_xor.reduceat(artist_hashes, starts)
+
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({'content': content, 'artists': artists}), index=False
+    ).to_numpy()
+
+
+def combine_track_hashes(track_ids: pd.Series, hashes: np.ndarray) -> Dict[str, str]:
+    """Hash par track_id ; une track sur plusieurs lignes combine ses hash dans l'ordre du fichier"""
+    # Chaque hash est mélangé à son rang d'occurrence puis sommé (modulo 2^64) par track
+    ranks = track_ids.groupby(track_ids, sort=False).cumcount().to_numpy()
+    mixed = pd.util.hash_pandas_object(pd.DataFrame({'hash': hashes, 'rank': ranks}), index=False).to_numpy()
+
+    codes, uniques = pd.factorize(track_ids)
+    combined = np.zeros(len(uniques), dtype=np.uint64)
+    np.add.at(combined, codes, mixed)
+
+    return {track_id: f"{content_hash:016x}" for track_id, content_hash in zip(uniques, combined.tolist())}
+
+
+class SpotifyDeltaImporter(SpotifyUltraFastImporter):
+    """Import incrémental : compare le dataset aux hash stockés en base et n'écrit que les différences"""
+
+    def __init__(self, uri: str, user: str, password: str, **kwargs):
+        super().__init__(uri, user, password, **kwargs)
+        self.track_hashes = {}
+        self.changed_tracks = set()
+        self.pending_reset = set()
+
+    def compute_track_hashes(self, csv_path: str, chunk_size: int = CHUNK_SIZE) -> int:
+        """1ère lecture : hash de contenu de chaque track du dataset"""
+        track_ids = []
+        hashes = []
+        total_rows = 0
+        for chunk_df in self.iter_csv_chunks(csv_path, chunk_size):
+            frames = self.prepare_chunk_frames(chunk_df)
+            track_ids.append(frames['tracks']['track_id'])
+            hashes.append(row_hashes(frames))
+            total_rows += len(chunk_df)
+
+        self.track_hashes = combine_track_hashes(
+            pd.concat(track_ids, ignore_index=True), np.concatenate(hashes)
+        )
+        return total_rows
+
+    def fetch_existing_hashes(self) -> Dict[str, str]:
+        """Hash actuellement stockés en base, lus en une seule requête streamée"""
+        with self.driver.session() as session:
+            result = session.run(EXISTING_HASHES_QUERY)
+            return {record['track_id']: record['content_hash'] for record in result}
+
+    def prepare_chunk(self, chunk_df: pd.DataFrame) -> Dict[str, list]:
+        """Ne garde que les lignes des tracks nouvelles ou modifiées, avec leur hash"""
+        track_ids = chunk_df['track_id'].astype(object).where(chunk_df['track_id'].notna(), 'nan')
+        payload = super().prepare_chunk(chunk_df[track_ids.isin(self.changed_tracks).to_numpy()])
+
+        for track in payload['tracks']:
+            track['content_hash'] = self.track_hashes[track['track_id']]
+        payload['reset'] = list({track['track_id'] for track in payload['tracks']} & self.pending_reset)
+        return payload
+
+    def _write_tracks_tx(self, tx, track_ids: List[str], phases: list, payload: Dict[str, list],
+                         statements: list, previous: dict):
+        statements.clear()  # La fonction peut être rejouée par execute_write
+        previous.update(tx.run(PREVIOUS_TRACK_NODES_QUERY, rows=track_ids).single().data())
+        rows_by_key = dict(payload, prune=previous['artists'])
+        for label, key, query in phases:
+            if label:
+                print(f"- {label}...")
+            start = time.perf_counter()
+            statements.append((key, len(rows_by_key[key]), tx.run(query, rows=rows_by_key[key]).consume(),
+                               time.perf_counter() - start))
+
+    def write_in_transaction(self, track_ids: List[str], phases: list, payload: Dict[str, list]):
+        """
+        Exécute les phases dans une seule transaction, précédées de la lecture des anciens genres / artistes
+        des tracks : un échec ne laisse jamais une track sans ses relations ni de PLAYS_GENRE/CREATED périmés
+        """
+        statements = []
+        previous = {}
+        with self.driver.session() as session:
+            session.execute_write(self._write_tracks_tx, track_ids, phases, payload, statements, previous)
+        for key, rows, summary, wall in statements:
+            self.telemetry.record(key, rows, wall, summary)
+        # Les agrégats des anciens genres / artistes changent aussi
+        with self._stats_lock:
+            self.statistics_touched['genres'].update(previous['genres'])
+            self.statistics_touched['artists'].update(previous['artists'])
+
+    def write_payload(self, payload: Dict[str, list]):
+        """Tracks modifiées : reset des relations, réécriture en MERGE et nettoyage dans une seule transaction"""
+        if not payload['reset']:
+            super().write_payload(payload)
+            return
+
+        self.track_statistics(payload)
+        self.write_in_transaction(payload['reset'], RESET_PHASES, payload)
+        self.pending_reset.difference_update(payload['reset'])
+
+    def delete_tracks(self, track_ids: List[str]):
+        start = 0
+        while start < len(track_ids):
+            batch = track_ids[start:start + self.batch_sizer.size('delete')]
+            batch_start = time.perf_counter()
+            self.write_in_transaction(batch, DELETE_PHASES, {'delete': batch})
+            self.batch_sizer.record('delete', len(batch), time.perf_counter() - batch_start)
+            start += len(batch)
+
+    def import_delta(self, csv_path: str, chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+        """Import incrémental complet ; renvoie le résumé inserted/updated/deleted/skipped"""
+        print("=== Hash du dataset... ===")
+        total_rows = self.compute_track_hashes(csv_path, chunk_size)
+
+        print("=== Lecture des hash en base... ===")
+        existing = self.fetch_existing_hashes()
+
+        inserted = {track_id for track_id in self.track_hashes if track_id not in existing}
+        updated = {track_id for track_id, content_hash in self.track_hashes.items()
+                   if track_id in existing and existing[track_id] != content_hash}
+        deleted = [track_id for track_id in existing if track_id not in self.track_hashes]
+
+        self.changed_tracks = inserted | updated
+        self.pending_reset = set(updated)
+        summary = {
+            'inserted': len(inserted),
+            'updated': len(updated),
+            'deleted': len(deleted),
+            'skipped': len(self.track_hashes) - len(self.changed_tracks),
+        }
+        print(f"Delta: {summary}")
+
+        if self.changed_tracks:
+            print("\n=== Écriture des tracks nouvelles/modifiées... ===")
+            for chunk_idx, raw_chunk in enumerate(iter_raw_chunks(csv_path, chunk_size)):
+                chunk_df = raw_chunk.to_dataframe()
+                if not chunk_df['track_id'].isin(self.changed_tracks).any():
+                    continue
+                print(f"\n======== Chunk {chunk_idx + 1} ========")
+                self.import_chunk(chunk_df, f"{chunk_idx + 1}")
+
+        if deleted:
+            print(f"\n=== Suppression de {len(deleted):,} tracks absentes du dataset... ===")
+            self.delete_tracks(deleted)
+
+        if self.changed_tracks or deleted:
+            print("\n=== Agrégats des statistiques... ===")
+            self.refresh_statistics()
+
+        summary['rows'] = total_rows
+        return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import incrémental du dataset Spotify dans Neo4j")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV (.gz/.zst acceptés)")
+    args = parser.parse_args()
+
+    load_dotenv()
+
+    NEO4J_URI = os.getenv('NEO4J_URI')
+    NEO4J_USER = os.getenv('NEO4J_USERNAME')
+    NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]):
+        print("❌ Variables d'environnement manquantes")
+        return
+
+    importer = SpotifyDeltaImporter(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD,
+                                    telemetry_path=f"{args.csv}.telemetry.ndjson")
+
+    try:
+        start_time = time.time()
+        importer.create_constraints_and_indexes()
+        summary = importer.import_delta(args.csv)
+
+        print("\n=== RÉSUMÉ DELTA ===")
+        print(f"Tracks insérées: {summary['inserted']:,}")
+        print(f"Tracks modifiées: {summary['updated']:,}")
+        print(f"Tracks supprimées: {summary['deleted']:,}")
+        print(f"Tracks inchangées (ignorées): {summary['skipped']:,}")
+        importer.batch_sizer.report()
+        importer.telemetry.report()
+        elapsed = time.time() - start_time
+        importer.telemetry.end_run(elapsed_s=round(elapsed, 3), mode='delta', **summary)
+        print(f"\n======== TERMINÉ en {elapsed:.1f} secondes ! ========")
+
+    except Exception as e:
+        print(f"Erreur: {e}")
+
+    finally:
+        importer.close()
+
+
+if __name__ == "__main__":
+    main()
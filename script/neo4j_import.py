@@ -3,21 +3,590 @@ Import ULTRA-OPTIMISÉ avec requêtes UNWIND pour Neo4j
 Version haute performance pour gros datasets
 """
 
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import numpy as np
 import pandas as pd
 from neo4j import GraphDatabase
+from neo4j.exceptions import Neo4jError, TransientError
 import os
-from typing import List
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dotenv import load_dotenv
+import threading
 import time
-from tqdm import tqdm
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from statistics_queries import (REBUILD_ARTIST_STATISTICS_QUERY, REBUILD_GENRE_STATISTICS_QUERY,
+                                REFRESH_ARTIST_STATISTICS_QUERY, REFRESH_GENRE_STATISTICS_QUERY)
+
+CHUNK_SIZE = 10000  # Plus petit pour éviter timeout (réseau ipssi)
+
+# Types des colonnes lues en streaming (instrumentalness reste libre : coercition à la préparation)
+CSV_DTYPES = {
+    'track_id': str,
+    'artists': str,
+    'album_name': str,
+    'track_name': str,
+    'popularity': 'Int64',
+    'duration_ms': 'Int64',
+    'explicit': 'boolean',
+    'danceability': 'float64',
+    'energy': 'float64',
+    'key': 'Int64',
+    'loudness': 'float64',
+    'mode': 'Int64',
+    'speechiness': 'float64',
+    'acousticness': 'float64',
+    'liveness': 'float64',
+    'valence': 'float64',
+    'tempo': 'float64',
+    'time_signature': 'Int64',
+    'track_genre': str,
+}
+
+# Propriétés écrites sur les noeuds Track (SET t = track, le content_hash de l'import delta est conservé)
+TRACK_PROPERTIES = [
+    'track_id', 'name', 'popularity', 'duration_ms', 'explicit', 'danceability',
+    'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness',
+    'instrumentalness', 'liveness', 'valence', 'tempo', 'time_signature', 'genre'
+]
+
+# Phases UNWIND d'un chunk : (libellé affiché, clé du payload, requête)
+IMPORT_PHASES = [
+    ("Tracks", 'tracks', """
+        UNWIND $rows as track
+        MERGE (t:Track {track_id: track.track_id})
+        WITH t, track, t.content_hash as content_hash
+        SET t = track
+        SET t.content_hash = coalesce(track.content_hash, content_hash)
+        """),
+    ("Artists", 'artists', """
+        UNWIND $rows as artist_name
+        MERGE (a:Artist {name: artist_name})
+        """),
+    ("Albums", 'albums', """
+        UNWIND $rows as album_data
+        MERGE (al:Album {name: album_data.name, artist: album_data.artist})
+        """),
+    ("Genres", 'genres', """
+        UNWIND $rows as genre_name
+        MERGE (g:Genre {name: genre_name})
+        """),
+    # Relations (groupées pour éviter timeout)
+    ("Relations", 'performs', """
+        UNWIND $rows as rel
+        MATCH (a:Artist {name: rel.artist})
+        MATCH (t:Track {track_id: rel.track_id})
+        MERGE (a)-[:PERFORMS]->(t)
+        """),
+    (None, 'belongs_to', """
+        UNWIND $rows as rel
+        MATCH (t:Track {track_id: rel.track_id})
+        MATCH (al:Album {name: rel.album, artist: rel.artist})
+        MERGE (t)-[:BELONGS_TO]->(al)
+        """),
+    (None, 'has_genre', """
+        UNWIND $rows as rel
+        MATCH (t:Track {track_id: rel.track_id})
+        MATCH (g:Genre {name: rel.genre})
+        MERGE (t)-[:HAS_GENRE]->(g)
+        """),
+    # Relations dédupliquées
+    (None, 'plays_genre', """
+        UNWIND $rows as rel
+        MATCH (a:Artist {name: rel.artist})
+        MATCH (g:Genre {name: rel.genre})
+        MERGE (a)-[:PLAYS_GENRE]->(g)
+        """),
+    (None, 'created', """
+        UNWIND $rows as rel
+        MATCH (a:Artist {name: rel.artist})
+        MATCH (al:Album {name: rel.album, artist: rel.artist})
+        MERGE (a)-[:CREATED]->(al)
+        """),
+]
+
+# Chargement initial (base vide) : CREATE au lieu de MERGE, exécuté dans une seule
+# transaction par chunk pour qu'un retry ne crée jamais de doublons
+FRESH_PHASES = [
+    ("Artists", 'artists', """
+        UNWIND $rows as artist_name
+        CREATE (:Artist {name: artist_name})
+        """),
+    ("Albums", 'albums', """
+        UNWIND $rows as album_data
+        CREATE (:Album {name: album_data.name, artist: album_data.artist})
+        """),
+    ("Genres", 'genres', """
+        UNWIND $rows as genre_name
+        CREATE (:Genre {name: genre_name})
+        """),
+    # Track + PERFORMS/BELONGS_TO/HAS_GENRE dans le même UNWIND
+    ("Tracks + relations", 'fresh_tracks', """
+        UNWIND $rows as row
+        MATCH (al:Album {name: row.album, artist: row.main_artist})
+        CREATE (t:Track)
+        SET t = row.track
+        CREATE (t)-[:BELONGS_TO]->(al)
+        WITH t, row
+        UNWIND row.genres as genre_name
+        MATCH (g:Genre {name: genre_name})
+        CREATE (t)-[:HAS_GENRE]->(g)
+        WITH DISTINCT t, row
+        UNWIND row.artists as artist_name
+        MATCH (a:Artist {name: artist_name})
+        CREATE (a)-[:PERFORMS]->(t)
+        """),
+    ("Relations", 'plays_genre', """
+        UNWIND $rows as rel
+        MATCH (a:Artist {name: rel.artist})
+        MATCH (g:Genre {name: rel.genre})
+        CREATE (a)-[:PLAYS_GENRE]->(g)
+        """),
+    (None, 'created', """
+        UNWIND $rows as rel
+        MATCH (a:Artist {name: rel.artist})
+        MATCH (al:Album {name: rel.album, artist: rel.artist})
+        CREATE (a)-[:CREATED]->(al)
+        """),
+]
+
+# Lignes répétant une track déjà créée : mêmes MERGE que l'import incrémental
+FRESH_REPEAT_PHASE_KEYS = ('tracks', 'performs', 'belongs_to', 'has_genre')
+
+# Phases créant des noeuds ; les autres sont des relations
+NODE_PHASE_KEYS = ('tracks', 'artists', 'albums', 'genres')
+
+# Mode parallèle : noeuds partagés entre tracks et relations entre eux, écrits par un seul writer
+SHARED_NODE_KEYS = ('artists', 'albums', 'genres')
+SHARED_RELATION_KEYS = ('plays_genre', 'created')
+
+# Tri des lignes d'une partition de workers (partitions par track_id) : tous les workers
+# verrouillent les Artist/Album/Genre partagés dans le même ordre
+LOCK_ORDER_KEYS = {
+    'tracks': lambda row: row['track_id'],
+    'performs': lambda row: (row['artist'], row['track_id']),
+    'belongs_to': lambda row: (row['album'], row['artist'], row['track_id']),
+    'has_genre': lambda row: (row['genre'], row['track_id']),
+}
+
+MAX_DEADLOCK_RETRIES = 5
+
+# Erreurs signalant un batch trop lourd pour le serveur : on réduit la taille au lieu de rejouer
+OVERLOAD_ERROR_CODES = ('TransactionTimedOut', 'MemoryPoolOutOfMemoryError', 'TransactionMemoryLimit')
+
+
+def _is_overload_error(error: Exception) -> bool:
+    return isinstance(error, Neo4jError) and any(code in (error.code or '') for code in OVERLOAD_ERROR_CODES)
+
+
+class AdaptiveBatchSizer:
+    """Taille des batches UNWIND par phase, ajustée selon la latence observée des commits"""
+
+    def __init__(self, initial_size: int = 5000, target_latency: float = 2.0,
+                 min_size: int = 100, max_size: int = 50000):
+        self.initial_size = initial_size
+        self.target_latency = target_latency
+        self.min_size = min(min_size, initial_size)
+        self.max_size = max(max_size, initial_size)
+        self.sizes = {}
+        self.ceilings = {}  # Plafond par phase après un refus du serveur
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def size(self, key: str) -> int:
+        with self._lock:
+            return self.sizes.get(key, self.initial_size)
+
+    def _stats(self, key: str) -> Dict[str, float]:
+        return self.stats.setdefault(key, {'rows': 0, 'seconds': 0.0, 'batches': 0, 'shrinks': 0})
+
+    def record(self, key: str, rows: int, elapsed: float):
+        """Batch committé : agrandit si la latence reste sous la moitié de la cible, réduit au-delà de la cible"""
+        with self._lock:
+            stats = self._stats(key)
+            stats['rows'] += rows
+            stats['seconds'] += elapsed
+            stats['batches'] += 1
+
+            size = self.sizes.get(key, self.initial_size)
+            if elapsed > self.target_latency:
+                size = max(self.min_size, size // 2)
+            elif elapsed < self.target_latency / 2 and rows >= size:
+                # Seul un batch plein renseigne sur la taille courante
+                size = min(self.ceilings.get(key, self.max_size), int(size * 1.5))
+            self.sizes[key] = size
+
+    def shrink(self, key: str, failed_rows: int) -> int:
+        """Batch refusé (timeout, mémoire) : taille divisée par deux par rapport au batch en échec"""
+        with self._lock:
+            self._stats(key)['shrinks'] += 1
+            size = max(self.min_size, failed_rows // 2)
+            self.sizes[key] = size
+            self.ceilings[key] = max(size, failed_rows - 1)
+            return size
+
+    def report(self):
+        """Taille stabilisée et débit de chaque phase"""
+        print("\n=== BATCHES ADAPTATIFS ===")
+        for key, stats in self.stats.items():
+            throughput = stats['rows'] / stats['seconds'] if stats['seconds'] else 0
+            print(f"{key}: batch {self.sizes.get(key, self.initial_size):,} lignes, "
+                  f"{stats['batches']} batches, {stats['rows']:,} lignes en {stats['seconds']:.1f}s "
+                  f"({throughput:,.0f} lignes/s), {stats['shrinks']} réduction(s) sur erreur")
+
+
+class ImportTelemetry:
+    """Mesures de chaque requête UNWIND (temps client, timings serveur, compteurs), agrégées par chunk et par run"""
+
+    COUNTERS = ('nodes_created', 'nodes_deleted', 'relationships_created', 'relationships_deleted',
+                'properties_set', 'labels_added')
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path  # Log NDJSON (une ligne par chunk, stats et fin de run) ; None = en mémoire seulement
+        self.run_id = datetime.now().isoformat(timespec='seconds')
+        self.chunk = None
+        self.chunk_phases = {}
+        self.run_phases = {}
+        self._lock = threading.Lock()
+
+    def _empty(self) -> Dict[str, float]:
+        return {'statements': 0, 'rows': 0, 'wall_s': 0.0, 'available_after_ms': 0, 'consumed_after_ms': 0,
+                **{counter: 0 for counter in self.COUNTERS}}
+
+    def record(self, key: str, rows: int, wall: float, summary):
+        """Ajoute une requête exécutée (résumé renvoyé par consume()) au chunk et au run"""
+        with self._lock:
+            for phases in (self.chunk_phases, self.run_phases):
+                phase = phases.setdefault(key, self._empty())
+                phase['statements'] += 1
+                phase['rows'] += rows
+                phase['wall_s'] += wall
+                phase['available_after_ms'] += summary.result_available_after or 0
+                phase['consumed_after_ms'] += summary.result_consumed_after or 0
+                for counter in self.COUNTERS:
+                    phase[counter] += getattr(summary.counters, counter)
+
+    @staticmethod
+    def _rounded(phases: Dict[str, dict]) -> Dict[str, dict]:
+        return {key: {**phase, 'wall_s': round(phase['wall_s'], 4)} for key, phase in phases.items()}
+
+    def start_chunk(self, label: str):
+        with self._lock:
+            self.chunk = label
+            self.chunk_phases = {}
+
+    def end_chunk(self, rows: int, failed_rows: List[int], **data):
+        self.log('chunk', chunk=self.chunk, rows=rows, failed_rows=len(failed_rows),
+                 phases=self._rounded(self.chunk_phases), **data)
+
+    def end_run(self, **data):
+        self.log('run', phases=self._rounded(self.run_phases), **data)
+
+    def log(self, event: str, **data):
+        if not self.path:
+            return
+        line = json.dumps({'event': event, 'run': self.run_id,
+                           'time': datetime.now().isoformat(timespec='seconds'), **data})
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+    def report(self):
+        """Cumul par requête sur le run : où part le temps, et ce que chaque requête a écrit"""
+        print("\n=== TÉLÉMÉTRIE PAR REQUÊTE ===")
+        total = sum(phase['wall_s'] for phase in self.run_phases.values()) or 1
+        for key, phase in sorted(self.run_phases.items(), key=lambda item: -item[1]['wall_s']):
+            print(f"{key}: {phase['wall_s']:.2f}s ({phase['wall_s'] / total:.0%}), {phase['statements']} requêtes, "
+                  f"serveur {phase['available_after_ms'] + phase['consumed_after_ms']:,} ms, "
+                  f"+{phase['nodes_created']:,} noeuds, +{phase['relationships_created']:,} relations, "
+                  f"{phase['properties_set']:,} propriétés")
+
+
+def statistics_nodes(payload: Dict[str, list]) -> Tuple[Set[str], Set[str]]:
+    """Genres et artistes dont un payload écrit des relations HAS_GENRE / PERFORMS (agrégats à recalculer)"""
+    genres = {row['genre'] for row in payload.get('has_genre', [])}
+    artists = {row['artist'] for row in payload.get('performs', [])}
+    for row in payload.get('fresh_tracks', []):
+        genres.update(row['genres'])
+        artists.update(row['artists'])
+    return genres, artists
+
+
+def _partition(rows: list, key, partitions: int) -> List[list]:
+    """Répartit les lignes en partitions disjointes selon le hash de leur clé"""
+    buckets = [[] for _ in range(partitions)]
+    for row in rows:
+        buckets[hash(key(row)) % partitions].append(row)
+    return buckets
+
+
+def _not_in(values, seen: set) -> np.ndarray:
+    """Masque des valeurs absentes d'un set Python (O(taille du chunk))"""
+    values = list(values)
+    return np.fromiter((value not in seen for value in values), dtype=bool, count=len(values))
+
+
+def coerce_csv_types(raw_df: pd.DataFrame) -> pd.DataFrame:
+    """Typage (CSV_DTYPES) de colonnes lues en texte ; une valeur invalide devient NA au lieu de lever"""
+    typed = raw_df.copy()
+    for column, dtype in CSV_DTYPES.items():
+        if dtype is str or column not in typed:
+            continue
+        values = typed[column]
+        if dtype == 'boolean':
+            typed[column] = values.str.strip().str.lower().map({'true': True, 'false': False}).astype('boolean')
+            continue
+        numeric = pd.to_numeric(values, errors='coerce')
+        # Entiers : une valeur décimale est aussi invalide
+        typed[column] = numeric.where(numeric % 1 == 0).astype(dtype) if dtype == 'Int64' else numeric.astype(dtype)
+    return typed
+
+
+def _drop_rows(chunk, rows: np.ndarray):
+    """Retire d'un chunk (DataFrame ou PreparedChunk) les lignes globales listées (ex. quarantaine)"""
+    keep = ~chunk.index.isin(rows)
+    if keep.all():
+        return chunk
+    if isinstance(chunk, PreparedChunk):
+        tracks = chunk.tracks[keep]
+        return PreparedChunk(tracks, chunk.track_artists[chunk.track_artists['row'].isin(tracks.index)])
+    return chunk[keep]
+
+
+def _explode_genres(tracks: pd.DataFrame) -> pd.DataFrame:
+    """Une ligne par (ligne de track, genre) : une track consolidée porte plusieurs genres séparés par ';'"""
+    genres = tracks['genres'].fillna(tracks['genre'])
+    if genres.str.contains(';', regex=False).any():
+        genres = genres.str.split(';').explode()
+    return pd.DataFrame({
+        'row': genres.index.to_numpy(),
+        'track_id': tracks['track_id'].loc[genres.index].to_numpy(dtype=object),
+        'genre': genres.to_numpy(dtype=object),
+    })
+
+
+def _artist_genres(track_artists: pd.DataFrame, track_genres: pd.DataFrame) -> pd.DataFrame:
+    """Paires (artiste, genre) dédupliquées pour PLAYS_GENRE"""
+    if len(track_genres) == track_genres['row'].nunique():
+        # Un seul genre par ligne : déjà porté par track_artists
+        return track_artists[['artist', 'genre']].drop_duplicates()
+    pairs = track_artists[['row', 'artist']].merge(track_genres[['row', 'genre']], on='row')
+    return pairs[['artist', 'genre']].drop_duplicates()
+
+
+def _track_records(tracks: pd.DataFrame) -> List[dict]:
+    """Propriétés des Track, avec la liste de leurs genres si le dataset est consolidé"""
+    records = _records(tracks[TRACK_PROPERTIES])
+    for record, genres in zip(records, tracks['genres'].tolist()):
+        if isinstance(genres, str):
+            record['genres'] = genres.split(';')
+    return records
+
+
+def _to_str(series: pd.Series) -> pd.Series:
+    """Équivalent colonnaire de str(valeur) (NaN -> 'nan')"""
+    return series.astype(object).where(series.notna(), 'nan').astype(str)
+
+
+def _records(frame: pd.DataFrame) -> List[dict]:
+    """to_dict('records') rapide : une conversion tolist() par colonne puis zip"""
+    columns = list(frame.columns)
+    values = [frame[column].tolist() for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _payloads_equivalent(expected: Dict[str, list], actual: Dict[str, list]) -> bool:
+    """Compare deux payloads : même graphe produit (ordre ignoré sauf pour les tracks)"""
+    def as_set(rows):
+        return {tuple(sorted(r.items())) if isinstance(r, dict) else r for r in rows}
+
+    def track_key(track):
+        return tuple((k, 'nan' if v != v else v) for k, v in track.items())
+
+    if [track_key(t) for t in expected['tracks']] != [track_key(t) for t in actual['tracks']]:
+        return False
+    return all(
+        as_set(expected[key]) == as_set(actual[key])
+        for key in expected if key != 'tracks'
+    )
+
+
+def open_dataset(csv_path: str):
+    """Ouvre le dataset en binaire, décompression gzip/zstd en streaming"""
+    if csv_path.endswith('.gz'):
+        return gzip.open(csv_path, 'rb')
+    if csv_path.endswith(('.zst', '.zstd')):
+        import zstandard
+        return io.BufferedReader(zstandard.open(csv_path, 'rb'))
+    return open(csv_path, 'rb')
+
+
+class RawChunk:
+    """Bloc d'enregistrements CSV bruts, repéré par son offset (octets décompressés) et son hash"""
+
+    def __init__(self, header: bytes, offset: int, data: bytes):
+        self.header = header
+        self.offset = offset
+        self.data = data
+        self.digest = hashlib.sha1(data).hexdigest()
+
+    def to_dataframe(self, first_row: int = 0) -> pd.DataFrame:
+        """Parse typé du bloc ; l'index reprend le numéro de ligne global"""
+        # track_genres n'existe que dans un dataset consolidé
+        usecols = lambda column: column in CSV_DTYPES or column in ('instrumentalness', 'track_genres')
+        try:
+            chunk_df = pd.read_csv(io.BytesIO(self.header + self.data), usecols=usecols,
+                                   dtype={**CSV_DTYPES, 'track_genres': str})
+        except (ValueError, TypeError):
+            # Valeur non typable dans le bloc : lecture texte, les valeurs invalides deviennent NA
+            # (ces lignes échouent ensuite à la préparation et sont isolées par découpage)
+            chunk_df = coerce_csv_types(pd.read_csv(io.BytesIO(self.header + self.data), usecols=usecols, dtype=str))
+        chunk_df.index = pd.RangeIndex(first_row, first_row + len(chunk_df))
+        return chunk_df
+
+
+class PreparedChunk:
+    """Frames préparées d'un chunk (tracks + paires track/artiste), indexées par numéro de ligne global
+    Imite l'interface DataFrame utilisée par le découpage des chunks en échec (len, index, iloc)"""
+
+    def __init__(self, tracks: pd.DataFrame, track_artists: pd.DataFrame):
+        self.tracks = tracks
+        self.track_artists = track_artists
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], first_row: int) -> 'PreparedChunk':
+        tracks = frames['tracks']
+        tracks.index = pd.RangeIndex(first_row, first_row + len(tracks))
+        track_artists = frames['track_artists']
+        track_artists['row'] += first_row
+        return cls(tracks, track_artists)
+
+    @property
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        return {'tracks': self.tracks, 'track_artists': self.track_artists}
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    @property
+    def index(self) -> pd.Index:
+        return self.tracks.index
+
+    @property
+    def iloc(self) -> 'PreparedChunk':
+        return self
+
+    def __getitem__(self, rows: slice) -> 'PreparedChunk':
+        tracks = self.tracks.iloc[rows]
+        return PreparedChunk(tracks, self.track_artists[self.track_artists['row'].isin(tracks.index)])
+
+
+def iter_raw_chunks(csv_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[RawChunk]:
+    """Découpe le CSV en blocs de chunk_size enregistrements sans le charger en entier"""
+    with open_dataset(csv_path) as f:
+        header = f.readline()
+        offset = len(header)
+        lines = []
+        records = 0
+        in_quotes = False
+        
+        for line in f:
+            lines.append(line)
+            # Un champ entre guillemets peut contenir des retours à la ligne
+            if line.count(b'"') % 2:
+                in_quotes = not in_quotes
+            if in_quotes:
+                continue
+            
+            records += 1
+            if records == chunk_size:
+                data = b''.join(lines)
+                yield RawChunk(header, offset, data)
+                offset += len(data)
+                lines = []
+                records = 0
+        
+        if lines:
+            yield RawChunk(header, offset, b''.join(lines))
+
+
+class ImportCheckpoint:
+    """Manifest des chunks committés, écrit à côté du dataset pour pouvoir reprendre un import"""
+
+    def __init__(self, csv_path: str, chunk_size: int, resume: bool = False):
+        self.path = f"{csv_path}.checkpoint.json"
+        self.data = {'source': os.path.basename(csv_path), 'chunk_size': chunk_size, 'chunks': {}}
+        
+        if resume and os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                previous = json.load(f)
+            # Les offsets ne sont comparables qu'avec la même taille de chunk
+            if previous.get('chunk_size') == chunk_size:
+                self.data = previous
+
+    def committed_count(self) -> int:
+        return sum(1 for chunk in self.data['chunks'].values() if chunk['status'] == 'committed')
+
+    def is_committed(self, offset: int, digest: str) -> bool:
+        chunk = self.data['chunks'].get(str(offset))
+        return bool(chunk) and chunk['digest'] == digest and chunk['status'] == 'committed'
+
+    def rows(self, offset: int) -> int:
+        return self.data['chunks'][str(offset)]['rows']
+
+    def record(self, offset: int, digest: str, rows: int, failed_rows: List[int]):
+        """Enregistre un chunk ; 'partial' s'il reste des lignes rejetées (réimporté au --resume)"""
+        self.data['chunks'][str(offset)] = {
+            'digest': digest,
+            'rows': rows,
+            'status': 'partial' if failed_rows else 'committed',
+            'failed_rows': [int(row) for row in failed_rows],
+        }
+        self.save()
+
+    def save(self):
+        """Écriture atomique : un crash pendant l'écriture ne corrompt pas le manifest"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
 
 class SpotifyUltraFastImporter:
     
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(self, uri: str, user: str, password: str, workers: int = 1, min_chunk_size: int = 1,
+                 batch_size: int = 5000, target_latency: float = 2.0, telemetry_path: Optional[str] = None):
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
-        self.batch_size = 5000  # Plus gros batch pour UNWIND
+        self.telemetry = ImportTelemetry(telemetry_path)
+        # Taille des batches UNWIND par phase, ajustée en cours d'import
+        self.batch_sizer = AdaptiveBatchSizer(batch_size, target_latency)
+        self.min_chunk_size = max(1, min_chunk_size)  # Taille minimale lors du découpage d'un chunk en échec
+        
+        # Mode parallèle : un pool de workers, une session par tâche
+        self.workers = max(1, workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        self.deadlock_retries = Counter()
+        self._stats_lock = threading.Lock()
+        
+        # Lignes écartées par la validation (numéros de ligne globaux, voir dataset_validation.py)
+        self.skip_rows = np.array([], dtype=np.int64)
+        
+        # Mode chargement initial (voir enable_fresh_load)
+        self.fresh_load = False
+        self._created = {}
+        
+        # Genres / artistes dont les agrégats sont à recalculer en fin d'import (refresh_statistics)
+        self.statistics_touched = {'genres': set(), 'artists': set()}
+        self.statistics_rebuild = False  # Recalcul complet (reprise : chunks des runs précédents non suivis)
     
     def close(self):
+        if self.executor:
+            self.executor.shutdown()
         self.driver.close()
     
     def create_constraints_and_indexes(self):
@@ -28,15 +597,25 @@ class SpotifyUltraFastImporter:
                 "CREATE CONSTRAINT artist_name_unique IF NOT EXISTS FOR (a:Artist) REQUIRE a.name IS UNIQUE",
                 "CREATE CONSTRAINT album_composite IF NOT EXISTS FOR (al:Album) REQUIRE (al.name, al.artist) IS UNIQUE",
                 "CREATE CONSTRAINT genre_name_unique IF NOT EXISTS FOR (g:Genre) REQUIRE g.name IS UNIQUE",
-                "CREATE INDEX track_popularity IF NOT EXISTS FOR (t:Track) ON (t.popularity)"
+                "CREATE INDEX track_popularity IF NOT EXISTS FOR (t:Track) ON (t.popularity)",
+                # Listes de l'application triées par (popularité, track_id) décroissants, ordre fourni par l'index
+                "CREATE INDEX track_popularity_id IF NOT EXISTS FOR (t:Track) ON (t.popularity, t.track_id)",
+                # Statistiques par artiste de l'application, lues dans les agrégats (stats_track_count >= 2)
+                "CREATE INDEX artist_stats_track_count IF NOT EXISTS FOR (a:Artist) ON (a.stats_track_count)",
+                # Recherche full-text de l'application (SpotifyBackend.search_songs)
+                "CREATE FULLTEXT INDEX track_name_fulltext IF NOT EXISTS FOR (t:Track) ON EACH [t.name]",
+                "CREATE FULLTEXT INDEX artist_name_fulltext IF NOT EXISTS FOR (a:Artist) ON EACH [a.name]",
+                "CREATE FULLTEXT INDEX album_name_fulltext IF NOT EXISTS FOR (al:Album) ON EACH [al.name]",
+                "CREATE FULLTEXT INDEX genre_name_fulltext IF NOT EXISTS FOR (g:Genre) ON EACH [g.name]"
             ]
             
             for cmd in constraints_indexes:
+                name = cmd.split(' IF NOT EXISTS')[0].split()[-1]
                 try:
                     session.run(cmd)
-                    print(f"Validation réussie pour {cmd.split()[2]}")
+                    print(f"Validation réussie pour {name}")
                 except Exception as e:
-                    print(f"ERREUR  {cmd.split()[2]}: {e}")
+                    print(f"ERREUR  {name}: {e}")
 
     def parse_artists(self, artists_str: str) -> List[str]:
         """Parse optimisé des artistes"""
@@ -51,9 +630,517 @@ class SpotifyUltraFastImporter:
         
         return [artists_str.strip()]
 
-    def import_all_data_ultra_fast(self, df: pd.DataFrame):
+    @staticmethod
+    def split_artists(artists: pd.Series) -> pd.Series:
+        """Version colonnaire de parse_artists : une ligne par (index, artiste)"""
+        valid = artists.notna() & (artists != "")
+        values = artists[valid].astype(str)
+
+        # Même priorité que parse_artists : ';' d'abord, sinon ','
+        has_semicolon = values.str.contains(';', regex=False)
+        normalized = values.where(has_semicolon, values.str.replace(',', ';', regex=False))
+
+        return normalized.str.split(';').explode().str.strip()
+
+    @staticmethod
+    def prepare_chunk_frames(chunk_df: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """Préparation colonnaire d'un chunk : tracks + paires track/artiste (sans accès base)"""
+        chunk_df = chunk_df.reset_index(drop=True)
+
+        track_ids = _to_str(chunk_df['track_id'])
+        genre_names = _to_str(chunk_df['track_genre'])
+        # Dataset consolidé (dataset_consolidation.py) : tous les genres de la track. Sinon vide : la propriété
+        # genres ne porterait que le genre de la dernière ligne, elle n'est pas écrite (HAS_GENRE suffit)
+        if 'track_genres' in chunk_df:
+            all_genres = _to_str(chunk_df['track_genres'])
+        else:
+            all_genres = pd.Series(None, index=chunk_df.index, dtype=object)
+
+        # Parse artistes (explode) et artiste principal = premier de la liste
+        exploded = SpotifyUltraFastImporter.split_artists(chunk_df['artists'])
+        first_artists = exploded[~exploded.index.duplicated(keep='first')]
+        main_artists = pd.Series("Unknown", index=chunk_df.index, dtype=object)
+        main_artists[first_artists.index] = first_artists.values
+
+        # instrumentalness : les chaînes non numériques valent 0.0 (comme l'ancien try/except)
+        instrumentalness = pd.to_numeric(chunk_df['instrumentalness'], errors='coerce')
+        instrumentalness = instrumentalness.mask(
+            instrumentalness.isna() & chunk_df['instrumentalness'].notna(), 0.0
+        )
+
+        tracks = pd.DataFrame({
+            'track_id': track_ids,
+            'name': _to_str(chunk_df['track_name']),
+            'popularity': chunk_df['popularity'].astype('int64'),
+            'duration_ms': chunk_df['duration_ms'].astype('int64'),
+            'explicit': chunk_df['explicit'].astype(bool),
+            'danceability': chunk_df['danceability'].astype('float64'),
+            'energy': chunk_df['energy'].astype('float64'),
+            'key': chunk_df['key'].astype('int64'),
+            'loudness': chunk_df['loudness'].astype('float64'),
+            'mode': chunk_df['mode'].astype(bool),
+            'speechiness': chunk_df['speechiness'].astype('float64'),
+            'acousticness': chunk_df['acousticness'].astype('float64'),
+            'instrumentalness': instrumentalness,
+            'liveness': chunk_df['liveness'].astype('float64'),
+            'valence': chunk_df['valence'].astype('float64'),
+            'tempo': chunk_df['tempo'].astype('float64'),
+            'time_signature': chunk_df['time_signature'].astype('int64'),
+            'genre': genre_names,
+            'genres': all_genres,
+            'album': _to_str(chunk_df['album_name']),
+            'main_artist': main_artists,
+        })
+
+        exploded = exploded[exploded != ""]
+        rows = exploded.index.to_numpy()
+        track_artists = pd.DataFrame({
+            'row': rows,
+            'artist': exploded.to_numpy(dtype=object),
+            'track_id': track_ids.to_numpy()[rows],
+            'genre': genre_names.to_numpy()[rows],
+        })
+
+        return {'tracks': tracks, 'track_artists': track_artists}
+
+    def build_chunk_payload(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, list]:
+        """Transforme les frames préparées en paramètres UNWIND"""
+        tracks = frames['tracks']
+        track_artists = frames['track_artists']
+        track_genres = _explode_genres(tracks)
+
+        albums = tracks[['album', 'main_artist']].drop_duplicates()
+
+        return {
+            'tracks': _track_records(tracks),
+            'artists': track_artists['artist'].unique().tolist(),
+            'albums': _records(albums.rename(columns={'album': 'name', 'main_artist': 'artist'})),
+            'genres': track_genres['genre'].unique().tolist(),
+            'performs': _records(track_artists[['artist', 'track_id']]),
+            'belongs_to': _records(tracks[['track_id', 'album', 'main_artist']]
+                                   .rename(columns={'main_artist': 'artist'})),
+            'has_genre': _records(track_genres[['track_id', 'genre']]),
+            'plays_genre': _records(_artist_genres(track_artists, track_genres)),
+            'created': _records(albums.rename(columns={'main_artist': 'artist'})),
+        }
+
+    def build_fresh_payload(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, list]:
+        """Payload du chargement initial : uniquement les noeuds/relations pas encore créés"""
+        tracks = frames['tracks']
+        track_artists = frames['track_artists']
+        created = self._created
+
+        # Première occurrence d'une track jamais vue -> CREATE ; les répétitions passent par MERGE
+        is_new = ~tracks['track_id'].duplicated(keep='first').to_numpy() & _not_in(tracks['track_id'], created['tracks'])
+        new_tracks = tracks[is_new]
+
+        artists_by_row = (track_artists.drop_duplicates(['row', 'artist'])
+                          .groupby('row')['artist'].agg(list))
+        new_artists_lists = artists_by_row.reindex(new_tracks.index)
+
+        fresh_tracks = [
+            {'track': track, 'album': album, 'main_artist': main_artist,
+             'genres': track.get('genres', [track['genre']]),
+             'artists': artists if isinstance(artists, list) else []}
+            for track, album, main_artist, artists in zip(
+                _track_records(new_tracks),
+                new_tracks['album'].tolist(),
+                new_tracks['main_artist'].tolist(),
+                new_artists_lists.tolist(),
+            )
+        ]
+
+        repeat_rows = tracks.index[~is_new]
+        repeat_payload = self.build_chunk_payload({
+            'tracks': tracks.loc[repeat_rows],
+            'track_artists': track_artists[track_artists['row'].isin(repeat_rows)],
+        })
+
+        # Entités et relations dédupliquées, filtrées sur ce qui existe déjà en base
+        artists = pd.Series(track_artists['artist'].unique(), dtype=object)
+        artists = artists[_not_in(artists, created['artists'])]
+        track_genres = _explode_genres(tracks)
+        genres = pd.Series(track_genres['genre'].unique(), dtype=object)
+        genres = genres[_not_in(genres, created['genres'])]
+        albums = tracks[['album', 'main_artist']].drop_duplicates()
+        albums = albums[_not_in(zip(albums['album'], albums['main_artist']), created['albums'])]
+        plays_genre = _artist_genres(track_artists, track_genres)
+        plays_genre = plays_genre[_not_in(zip(plays_genre['artist'], plays_genre['genre']), created['plays_genre'])]
+
+        payload = {key: repeat_payload[key] for key in FRESH_REPEAT_PHASE_KEYS}
+        payload.update({
+            'artists': artists.tolist(),
+            'albums': _records(albums.rename(columns={'album': 'name', 'main_artist': 'artist'})),
+            'genres': genres.tolist(),
+            'fresh_tracks': fresh_tracks,
+            'plays_genre': _records(plays_genre),
+            'created': _records(albums.rename(columns={'main_artist': 'artist'})),
+        })
+        return payload
+
+    def prepare_chunk(self, chunk_df: pd.DataFrame) -> Dict[str, list]:
+        """Préparation vectorisée d'un chunk (pandas/NumPy, sans iterrows) ; un chunk lu du cache est déjà préparé"""
+        if isinstance(chunk_df, PreparedChunk):
+            frames = chunk_df.frames
+        else:
+            frames = self.prepare_chunk_frames(chunk_df)
+        if self.fresh_load:
+            return self.build_fresh_payload(frames)
+        return self.build_chunk_payload(frames)
+
+    def prepare_chunk_rows(self, chunk_df: pd.DataFrame) -> Dict[str, list]:
+        """Ancienne préparation ligne à ligne, gardée pour comparer les timings"""
+        tracks_data = []
+        artists_data = set()
+        albums_data = set()
+        genres_data = set()
+
+        performs_relations = []
+        belongs_to_relations = []
+        has_genre_relations = []
+        plays_genre_relations = set()
+
+        for _, row in chunk_df.iterrows():
+            track_id = str(row['track_id'])
+            album_name = str(row['album_name'])
+            genre_name = str(row['track_genre'])
+            consolidated = 'track_genres' in row
+            genre_names = str(row['track_genres']).split(';') if consolidated else [genre_name]
+
+            artists = self.parse_artists(row['artists'])
+            main_artist = artists[0] if artists else "Unknown"
+
+            instrumentalness = row['instrumentalness']
+            if isinstance(instrumentalness, str):
+                try:
+                    instrumentalness = float(instrumentalness)
+                except ValueError:
+                    instrumentalness = 0.0
+
+            tracks_data.append({
+                'track_id': track_id,
+                'name': str(row['track_name']),
+                'popularity': int(row['popularity']),
+                'duration_ms': int(row['duration_ms']),
+                'explicit': bool(row['explicit']),
+                'danceability': float(row['danceability']),
+                'energy': float(row['energy']),
+                'key': int(row['key']),
+                'loudness': float(row['loudness']),
+                'mode': bool(row['mode']),
+                'speechiness': float(row['speechiness']),
+                'acousticness': float(row['acousticness']),
+                'instrumentalness': instrumentalness,
+                'liveness': float(row['liveness']),
+                'valence': float(row['valence']),
+                'tempo': float(row['tempo']),
+                'time_signature': int(row['time_signature']),
+                'genre': genre_name,
+            })
+            if consolidated:
+                tracks_data[-1]['genres'] = genre_names
+
+            albums_data.add((album_name, main_artist))
+            genres_data.update(genre_names)
+
+            for artist in artists:
+                if artist:
+                    artists_data.add(artist)
+                    performs_relations.append({'artist': artist, 'track_id': track_id})
+                    plays_genre_relations.update((artist, genre) for genre in genre_names)
+
+            belongs_to_relations.append({'track_id': track_id, 'album': album_name, 'artist': main_artist})
+            has_genre_relations.extend({'track_id': track_id, 'genre': genre} for genre in genre_names)
+
+        return {
+            'tracks': tracks_data,
+            'artists': list(artists_data),
+            'albums': [{'name': name, 'artist': artist} for name, artist in albums_data],
+            'genres': list(genres_data),
+            'performs': performs_relations,
+            'belongs_to': belongs_to_relations,
+            'has_genre': has_genre_relations,
+            'plays_genre': [{'artist': a, 'genre': g} for a, g in plays_genre_relations],
+            'created': [{'artist': artist, 'album': name} for name, artist in albums_data],
+        }
+
+    def compare_preparations(self, chunk_df: pd.DataFrame) -> Dict[str, list]:
+        """Exécute les deux préparations, affiche les timings et vérifie qu'elles sont identiques"""
+        start = time.perf_counter()
+        rows_payload = self.prepare_chunk_rows(chunk_df)
+        rows_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        payload = self.build_chunk_payload(self.prepare_chunk_frames(chunk_df))
+        vector_elapsed = time.perf_counter() - start
+
+        speedup = rows_elapsed / vector_elapsed if vector_elapsed > 0 else float('inf')
+        print(f"Préparation: ligne à ligne {rows_elapsed:.3f}s -> colonnaire {vector_elapsed:.3f}s (x{speedup:.1f})")
+
+        if not _payloads_equivalent(rows_payload, payload):
+            raise RuntimeError("La préparation colonnaire diffère de la préparation ligne à ligne")
+
+        return self.prepare_chunk(chunk_df) if self.fresh_load else payload
+
+    def write_chunk(self, session, payload: Dict[str, list]):
+        """Exécute les phases UNWIND d'un chunk dans la session"""
+        for label, key, query in IMPORT_PHASES:
+            if label:
+                print(f"- {label}...")
+            self._run_batched(session, key, query, payload[key])
+
+    def _run_batched(self, session, key: str, query: str, rows: list):
+        """Exécute une phase par batches dont la taille suit la latence observée"""
+        start = 0
+        while start < len(rows):
+            batch = rows[start:start + self.batch_sizer.size(key)]
+            batch_start = time.perf_counter()
+            try:
+                self._run_with_deadlock_retry(session, key, query, batch)
+            except Neo4jError as e:
+                if not _is_overload_error(e) or len(batch) <= self.batch_sizer.min_size:
+                    raise
+                size = self.batch_sizer.shrink(key, len(batch))
+                print(f"Batch {key} de {len(batch):,} lignes refusé ({e.code}), nouvelle taille {size:,}")
+                continue
+            self.batch_sizer.record(key, len(batch), time.perf_counter() - batch_start)
+            start += len(batch)
+
+    def _run_with_deadlock_retry(self, session, key: str, query: str, rows: list):
+        """Exécute une phase, rejouée si Neo4j détecte un deadlock (erreur transitoire)"""
+        for attempt in range(MAX_DEADLOCK_RETRIES + 1):
+            try:
+                start = time.perf_counter()
+                summary = session.run(query, rows=rows).consume()
+                self.telemetry.record(key, len(rows), time.perf_counter() - start, summary)
+                return
+            except TransientError as e:
+                if attempt == MAX_DEADLOCK_RETRIES or _is_overload_error(e):
+                    raise
+                if 'DeadlockDetected' in (e.code or ''):
+                    with self._stats_lock:
+                        self.deadlock_retries[key] += 1
+                time.sleep(0.1 * 2 ** attempt)
+
+    def _write_partition(self, phases: list, partition: Dict[str, list]):
+        """Écrit les phases d'une partition (tâche d'un worker ou writer unique) avec sa propre session"""
+        with self.driver.session() as session:
+            for key, query in phases:
+                if partition[key]:
+                    self._run_batched(session, key, query, partition[key])
+
+    def write_chunk_parallel(self, payload: Dict[str, list]):
+        """
+        Écrit un chunk en trois passes : Artist/Album/Genre par un seul writer, puis les tracks et leurs relations
+        sur le pool de workers (noeuds partagés déjà créés, MATCH seulement), puis PLAYS_GENRE/CREATED
+        """
+        shared_nodes = [(key, query) for _, key, query in IMPORT_PHASES if key in SHARED_NODE_KEYS]
+        shared_relations = [(key, query) for _, key, query in IMPORT_PHASES if key in SHARED_RELATION_KEYS]
+        track_phases = [(key, query) for _, key, query in IMPORT_PHASES if key in LOCK_ORDER_KEYS]
+
+        deadlocks_before = sum(self.deadlock_retries.values())
+
+        print("- Artists/Albums/Genres (1 writer)...")
+        self._write_partition(shared_nodes, payload)
+
+        # Partitions disjointes par track_id, triées pour prendre les verrous partagés dans le même ordre
+        print(f"- Tracks + relations ({self.workers} workers)...")
+        partitions = [{} for _ in range(self.workers)]
+        for key, _ in track_phases:
+            buckets = _partition(payload[key], lambda row: row['track_id'], self.workers)
+            for partition, bucket in zip(partitions, buckets):
+                partition[key] = sorted(bucket, key=LOCK_ORDER_KEYS[key])
+
+        # Barrière : toutes les partitions terminées avant les relations entre noeuds partagés
+        futures = [self.executor.submit(self._write_partition, track_phases, partition) for partition in partitions]
+        for future in futures:
+            future.result()
+
+        print("- PLAYS_GENRE/CREATED (1 writer)...")
+        self._write_partition(shared_relations, payload)
+
+        deadlocks = sum(self.deadlock_retries.values()) - deadlocks_before
+        if deadlocks:
+            print(f"Deadlocks rejoués: {deadlocks}")
+
+    def is_database_empty(self) -> bool:
+        with self.driver.session() as session:
+            return session.run("MATCH (n) RETURN n LIMIT 1").single() is None
+
+    def enable_fresh_load(self):
+        """Active le chargement initial (CREATE + câblage en un seul UNWIND) ; refusé si la base n'est pas vide"""
+        if not self.is_database_empty():
+            raise RuntimeError("Le mode fresh exige une base vide (utiliser l'import MERGE par défaut)")
+        
+        if self.executor:
+            # Une transaction unique par chunk : pas de partitionnement entre workers
+            print("Mode fresh: import séquentiel")
+            self.executor.shutdown()
+            self.executor = None
+            self.workers = 1
+        
+        self.fresh_load = True
+        self._created = {key: set() for key in ('tracks', 'artists', 'albums', 'genres', 'plays_genre')}
+
+    def _write_fresh_tx(self, tx, payload: Dict[str, list], statements: list):
+        statements.clear()  # La fonction peut être rejouée par execute_write
+        for label, key, query in FRESH_PHASES:
+            if label:
+                print(f"- {label}...")
+            start = time.perf_counter()
+            statements.append((key, len(payload[key]), tx.run(query, rows=payload[key]).consume(),
+                               time.perf_counter() - start))
+            
+            # Les lignes répétant une track existante s'appliquent juste après les CREATE
+            if key == 'fresh_tracks':
+                for _, repeat_key, repeat_query in IMPORT_PHASES:
+                    if repeat_key in FRESH_REPEAT_PHASE_KEYS and payload[repeat_key]:
+                        start = time.perf_counter()
+                        summary = tx.run(repeat_query, rows=payload[repeat_key]).consume()
+                        statements.append((repeat_key, len(payload[repeat_key]), summary,
+                                           time.perf_counter() - start))
+
+    def write_fresh_chunk(self, payload: Dict[str, list]):
+        """Écrit un chunk du chargement initial dans une seule transaction"""
+        statements = []
+        with self.driver.session() as session:
+            session.execute_write(self._write_fresh_tx, payload, statements)
+        for key, rows, summary, wall in statements:
+            self.telemetry.record(key, rows, wall, summary)
+        
+        # Mémoriser ce qui existe désormais en base, une fois la transaction committée
+        created = self._created
+        created['tracks'].update(row['track']['track_id'] for row in payload['fresh_tracks'])
+        created['artists'].update(payload['artists'])
+        created['genres'].update(payload['genres'])
+        created['albums'].update((row['name'], row['artist']) for row in payload['albums'])
+        created['plays_genre'].update((row['artist'], row['genre']) for row in payload['plays_genre'])
+
+    def track_statistics(self, payload: Dict[str, list]):
+        """Note les genres / artistes du payload ; noté avant l'écriture, un échec partiel est aussi recalculé"""
+        genres, artists = statistics_nodes(payload)
+        with self._stats_lock:
+            self.statistics_touched['genres'].update(genres)
+            self.statistics_touched['artists'].update(artists)
+
+    def refresh_statistics(self):
+        """
+        Recalcule depuis leurs relations les agrégats des genres / artistes touchés par l'import
+
+        Idempotent (pas de delta par ligne) : les batches rejoués et les workers parallèles ne faussent pas les sommes
+        """
+        start = time.perf_counter()
+        with self.driver.session() as session:
+            if self.statistics_rebuild:
+                print("- Recalcul complet des agrégats...")
+                for query in (REBUILD_GENRE_STATISTICS_QUERY, REBUILD_ARTIST_STATISTICS_QUERY):
+                    session.run(query).consume()
+            else:
+                for key, query in (('genres', REFRESH_GENRE_STATISTICS_QUERY),
+                                   ('artists', REFRESH_ARTIST_STATISTICS_QUERY)):
+                    rows = [{'name': name} for name in sorted(self.statistics_touched[key])]
+                    print(f"- Agrégats de {len(rows):,} {key}...")
+                    self._run_batched(session, f"statistics_{key}", query, rows)
+        print(f"Agrégats des statistiques recalculés en {time.perf_counter() - start:.1f}s")
+        self.statistics_touched = {'genres': set(), 'artists': set()}
+        self.statistics_rebuild = False
+
+    def write_payload(self, payload: Dict[str, list]):
+        """Écrit un payload préparé (séquentiel ou parallèle)"""
+        self.track_statistics(payload)
+        if self.fresh_load:
+            self.write_fresh_chunk(payload)
+        elif self.executor:
+            self.write_chunk_parallel(payload)
+        else:
+            with self.driver.session() as session:
+                self.write_chunk(session, payload)
+
+    def _try_import(self, chunk_df: pd.DataFrame, chunk_label: str, max_retries: int) -> bool:
+        """Prépare et écrit un (sous-)chunk ; False si toutes les tentatives ont échoué"""
+        try:
+            payload = self.prepare_chunk(chunk_df)
+        except Exception as e:
+            print(f"Préparation du chunk {chunk_label} impossible: {e}")
+            return False
+        
+        retry_count = 0
+        while retry_count < max_retries:
+            try:
+                self.write_payload(payload)
+                return True
+            except Exception as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    print(f"Chunk {chunk_label} échoué après {max_retries} tentative(s): {e}")
+                else:
+                    print(f"Retry {retry_count} pour chunk {chunk_label}")
+                    time.sleep(3)
+        return False
+
+    def _import_split(self, chunk_df: pd.DataFrame, chunk_label: str) -> List[int]:
+        """Coupe un chunk en échec en deux et réessaie chaque moitié, jusqu'à min_chunk_size lignes"""
+        if len(chunk_df) <= self.min_chunk_size:
+            print(f"Lignes rejetées ({chunk_label}): {list(chunk_df.index)}")
+            return list(chunk_df.index)
+        
+        middle = len(chunk_df) // 2
+        failed_rows = []
+        for part_idx, part_df in enumerate((chunk_df.iloc[:middle], chunk_df.iloc[middle:])):
+            part_label = f"{chunk_label}.{part_idx + 1}"
+            # Une seule tentative : les erreurs transitoires ont déjà été rejouées sur le chunk entier
+            if not self._try_import(part_df, part_label, max_retries=1):
+                failed_rows += self._import_split(part_df, part_label)
+        return failed_rows
+
+    def import_chunk(self, chunk_df: pd.DataFrame, chunk_label: str, compare_preparation: bool = False) -> List[int]:
+        """Prépare puis écrit un chunk, avec retry ; renvoie les index des lignes rejetées"""
+        self.telemetry.start_chunk(chunk_label)
+        prep_seconds = None
+        
+        # Préparer les données du chunk (colonnaire)
+        try:
+            if compare_preparation and not isinstance(chunk_df, PreparedChunk):
+                payload = self.compare_preparations(chunk_df)
+            else:
+                prep_start = time.perf_counter()
+                payload = self.prepare_chunk(chunk_df)
+                prep_seconds = round(time.perf_counter() - prep_start, 4)
+                print(f"Préparation: {prep_seconds:.3f}s")
+        except Exception as e:
+            print(f"Préparation du chunk {chunk_label} impossible: {e}")
+            payload = None
+        
+        # Import du chunk avec retry
+        retry_count = 0
+        max_retries = 3
+        
+        while payload is not None and retry_count < max_retries:
+            try:
+                self.write_payload(payload)
+                
+                print(f"Chunk {chunk_label} terminé")
+                self.telemetry.end_chunk(len(chunk_df), [], preparation_s=prep_seconds, retries=retry_count)
+                return []  # Succès
+                
+            except Exception as e:
+                retry_count += 1
+                if retry_count >= max_retries:
+                    print(f"Chunk {chunk_label} échoué après {max_retries} tentatives: {e}")
+                else:
+                    print(f"Retry {retry_count} pour chunk {chunk_label}")
+                    time.sleep(3)
+        
+        # Échec persistant : on isole les lignes fautives au lieu de perdre tout le chunk
+        print(f"Découpage du chunk {chunk_label} pour isoler les lignes en erreur")
+        failed_rows = self._import_split(chunk_df, chunk_label)
+        print(f"Chunk {chunk_label} terminé avec {len(failed_rows)} ligne(s) rejetée(s)")
+        self.telemetry.end_chunk(len(chunk_df), failed_rows, preparation_s=prep_seconds, retries=retry_count)
+        return failed_rows
+
+    def import_all_data_ultra_fast(self, df: pd.DataFrame, compare_preparation: bool = False):
         """Import par chunks pour éviter les timeouts"""
-        chunk_size = 10000  # Plus petit pour éviter timeout (réseau ipssi)
+        chunk_size = CHUNK_SIZE
         total_chunks = (len(df) + chunk_size - 1) // chunk_size
         
         print(f"--- Import par chunks de {chunk_size:,} lignes ({total_chunks} chunks)")
@@ -61,173 +1148,72 @@ class SpotifyUltraFastImporter:
         for chunk_idx in range(total_chunks):
             start_idx = chunk_idx * chunk_size
             end_idx = min(start_idx + chunk_size, len(df))
-            chunk_df = df.iloc[start_idx:end_idx]
+            chunk_df = _drop_rows(df.iloc[start_idx:end_idx], self.skip_rows)
             
             print(f"\n======== Chunk {chunk_idx + 1}/{total_chunks} - Lignes {start_idx:,} à {end_idx:,} ========")
+            self.import_chunk(chunk_df, f"{chunk_idx + 1}", compare_preparation)
+        
+        print("\n=== Agrégats des statistiques... ===")
+        self.refresh_statistics()
+
+    def iter_csv_chunks(self, csv_path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Lecture incrémentale et typée du CSV (gzip/zstd décompressés à la volée)"""
+        first_row = 0
+        for raw_chunk in iter_raw_chunks(csv_path, chunk_size):
+            chunk_df = raw_chunk.to_dataframe(first_row)
+            first_row += len(chunk_df)
+            yield chunk_df
+
+    def _iter_chunk_sources(self, csv_path: str, chunk_size: int, use_cache: bool) -> Iterator[tuple]:
+        """(offset, hash, chargement(first_row)) de chaque chunk, lu du CSV ou du cache préparé"""
+        if use_cache:
+            from dataset_cache import PreparedDatasetCache
+            yield from PreparedDatasetCache(csv_path, chunk_size).iter_chunk_sources()
+            return
+        
+        for raw_chunk in iter_raw_chunks(csv_path, chunk_size):
+            yield raw_chunk.offset, raw_chunk.digest, raw_chunk.to_dataframe
+
+    def import_csv_streaming(self, csv_path: str, chunk_size: int = CHUNK_SIZE, compare_preparation: bool = False,
+                             resume: bool = False, use_cache: bool = False) -> int:
+        """Import en streaming : un seul chunk en mémoire à la fois, quelle que soit la taille du fichier"""
+        print(f"--- Import streaming par chunks de {chunk_size:,} lignes")
+        
+        checkpoint = ImportCheckpoint(csv_path, chunk_size, resume)
+        if resume:
+            print(f"Reprise depuis {checkpoint.path} ({checkpoint.committed_count()} chunks déjà importés)")
+        
+        total_rows = 0
+        skipped_chunks = 0
+        chunk_sources = self._iter_chunk_sources(csv_path, chunk_size, use_cache)
+        for chunk_idx, (offset, digest, load_chunk) in enumerate(chunk_sources):
+            # Chunk déjà committé lors d'un run précédent : ni parsing ni écriture
+            if checkpoint.is_committed(offset, digest):
+                total_rows += checkpoint.rows(offset)
+                skipped_chunks += 1
+                continue
             
-            # Préparer les données du chunk
-            tracks_data = []
-            artists_data = set()
-            albums_data = set()
-            genres_data = set()
-            
-            # Relations
-            performs_relations = []
-            belongs_to_relations = []
-            has_genre_relations = []
-            plays_genre_relations = []
-            created_relations = []
-            
-            for _, row in tqdm(chunk_df.iterrows(), total=len(chunk_df), desc="Préparation"):
-                track_id = str(row['track_id'])
-                track_name = str(row['track_name'])
-                album_name = str(row['album_name'])
-                genre_name = str(row['track_genre'])
-                
-                # Parse artistes
-                artists = self.parse_artists(row['artists'])
-                main_artist = artists[0] if artists else "Unknown"
-                
-                # Données tracks
-                instrumentalness = row['instrumentalness']
-                if isinstance(instrumentalness, str):
-                    try:
-                        instrumentalness = float(instrumentalness)
-                    except:
-                        instrumentalness = 0.0
-                
-                tracks_data.append({
-                    'track_id': track_id,
-                    'name': track_name,
-                    'popularity': int(row['popularity']),
-                    'duration_ms': int(row['duration_ms']),
-                    'explicit': bool(row['explicit']),
-                    'danceability': float(row['danceability']),
-                    'energy': float(row['energy']),
-                    'key': int(row['key']),
-                    'loudness': float(row['loudness']),
-                    'mode': bool(row['mode']),
-                    'speechiness': float(row['speechiness']),
-                    'acousticness': float(row['acousticness']),
-                    'instrumentalness': instrumentalness,
-                    'liveness': float(row['liveness']),
-                    'valence': float(row['valence']),
-                    'tempo': float(row['tempo']),
-                    'time_signature': int(row['time_signature']),
-                    'genre': genre_name
-                })
-                
-                # Collecte unique des entités
-                for artist in artists:
-                    if artist:
-                        artists_data.add(artist)
-                
-                albums_data.add((album_name, main_artist))
-                genres_data.add(genre_name)
-                
-                # Relations
-                for artist in artists:
-                    if artist:
-                        performs_relations.append({'artist': artist, 'track_id': track_id})
-                        plays_genre_relations.append({'artist': artist, 'genre': genre_name})
-                
-                belongs_to_relations.append({
-                    'track_id': track_id, 
-                    'album': album_name, 
-                    'artist': main_artist
-                })
-                
-                has_genre_relations.append({'track_id': track_id, 'genre': genre_name})
-                created_relations.append({'artist': main_artist, 'album': album_name})
+            chunk_df = load_chunk(total_rows)
+            start_idx = total_rows
+            total_rows += len(chunk_df)
+            chunk_df = _drop_rows(chunk_df, self.skip_rows)
             
-            # Import du chunk avec retry
-            retry_count = 0
-            max_retries = 3
+            print(f"\n======== Chunk {chunk_idx + 1} - Lignes {start_idx:,} à {total_rows:,} ========")
+            failed_rows = self.import_chunk(chunk_df, f"{chunk_idx + 1}", compare_preparation)
+            checkpoint.record(offset, digest, total_rows - start_idx, failed_rows)
             
-            while retry_count < max_retries:
-                try:
-                    with self.driver.session() as session:
-                        
-                        # 1. Tracks
-                        print("- Tracks...")
-                        session.run("""
-                            UNWIND $tracks as track
-                            MERGE (t:Track {track_id: track.track_id})
-                            SET t = track
-                            """, tracks=tracks_data)
-                        
-                        # 2. Artists  
-                        print("- Artists...")
-                        session.run("""
-                            UNWIND $artists as artist_name
-                            MERGE (a:Artist {name: artist_name})
-                            """, artists=list(artists_data))
-                        
-                        # 3. Albums
-                        print("- Albums...")
-                        session.run("""
-                            UNWIND $albums as album_data
-                            MERGE (al:Album {name: album_data.name, artist: album_data.artist})
-                            """, albums=[{'name': name, 'artist': artist} for name, artist in albums_data])
-                        
-                        # 4. Genres
-                        print("- Genres...")
-                        session.run("""
-                            UNWIND $genres as genre_name
-                            MERGE (g:Genre {name: genre_name})
-                            """, genres=list(genres_data))
-                        
-                        # 5. Relations (groupées pour éviter timeout)
-                        print("- Relations...")
-                        session.run("""
-                            UNWIND $relations as rel
-                            MATCH (a:Artist {name: rel.artist})
-                            MATCH (t:Track {track_id: rel.track_id})
-                            MERGE (a)-[:PERFORMS]->(t)
-                            """, relations=performs_relations)
-                        
-                        session.run("""
-                            UNWIND $relations as rel
-                            MATCH (t:Track {track_id: rel.track_id})
-                            MATCH (al:Album {name: rel.album, artist: rel.artist})
-                            MERGE (t)-[:BELONGS_TO]->(al)
-                            """, relations=belongs_to_relations)
-                        
-                        session.run("""
-                            UNWIND $relations as rel
-                            MATCH (t:Track {track_id: rel.track_id})
-                            MATCH (g:Genre {name: rel.genre})
-                            MERGE (t)-[:HAS_GENRE]->(g)
-                            """, relations=has_genre_relations)
-                        
-                        # Relations dédupliquées
-                        unique_plays_genre = list({(r['artist'], r['genre']) for r in plays_genre_relations})
-                        session.run("""
-                            UNWIND $relations as rel
-                            MATCH (a:Artist {name: rel.artist})
-                            MATCH (g:Genre {name: rel.genre})
-                            MERGE (a)-[:PLAYS_GENRE]->(g)
-                            """, relations=[{'artist': a, 'genre': g} for a, g in unique_plays_genre])
-                        
-                        unique_created = list({(r['artist'], r['album']) for r in created_relations})
-                        session.run("""
-                            UNWIND $relations as rel
-                            MATCH (a:Artist {name: rel.artist})
-                            MATCH (al:Album {name: rel.album, artist: rel.artist})
-                            MERGE (a)-[:CREATED]->(al)
-                            """, relations=[{'artist': a, 'album': al} for a, al in unique_created])
-                    
-                    print(f"Chunk {chunk_idx + 1} terminé")
-                    break  # Succès
-                    
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count >= max_retries:
-                        print(f"Chunk {chunk_idx + 1} échoué après {max_retries} tentatives: {e}")
-                        break
-                    else:
-                        print(f"Retry {retry_count} pour chunk {chunk_idx + 1}")
-                        time.sleep(3)
+            # Libérer le chunk avant de lire le suivant
+            del chunk_df, load_chunk
+        
+        if skipped_chunks:
+            print(f"{skipped_chunks} chunk(s) déjà importé(s) ignoré(s)")
+            # Un run précédent interrompu n'a pas recalculé les agrégats de ses chunks
+            self.statistics_rebuild = True
+        
+        print("\n=== Agrégats des statistiques... ===")
+        self.refresh_statistics()
+        
+        return total_rows
 
     def get_database_stats(self):
         """Statistiques finales"""
@@ -245,15 +1231,50 @@ class SpotifyUltraFastImporter:
             ]
             
             print("\n=== STATISTIQUES FINALES ===")
+            counts = {}
             for name, query in stats_queries:
                 try:
                     result = session.run(query).single()
                     count = result['count'] if result else 0
+                    counts[name] = count
                     print(f"6 {name}: {count:,}")
                 except Exception as e:
                     print(f"❌ Erreur {name}: {e}")
+            
+            self.telemetry.log('database_stats', counts=counts)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import du dataset Spotify dans Neo4j")
+    parser.add_argument('--csv', default="../data/dataset.csv", help="Chemin du dataset CSV")
+    parser.add_argument('--compare-preparation', action='store_true',
+                        help="Compare la préparation ligne à ligne et colonnaire sur chaque chunk")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Nombre de workers parallèles (1 = import séquentiel)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Lecture incrémentale du CSV (mémoire constante, accepte .gz/.zst)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Reprend un import streaming en sautant les chunks du manifest de checkpoint")
+    parser.add_argument('--constraints-only', action='store_true',
+                        help="Crée uniquement contraintes et index (après un neo4j-admin import)")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Chargement initial sur base vide : CREATE au lieu de MERGE")
+    parser.add_argument('--min-chunk-size', type=int, default=1,
+                        help="Taille minimale quand un chunk en échec est coupé en deux")
+    parser.add_argument('--batch-size', type=int, default=5000,
+                        help="Taille initiale des batches UNWIND, ajustée ensuite par phase")
+    parser.add_argument('--target-latency', type=float, default=2.0,
+                        help="Latence cible d'un batch en secondes (agrandi en dessous, réduit au-dessus)")
+    parser.add_argument('--cache', action='store_true',
+                        help="Streaming depuis le cache Arrow du dataset préparé (construit au 1er run)")
+    parser.add_argument('--telemetry', help="Log NDJSON de télémétrie (défaut : <csv>.telemetry.ndjson)")
+    parser.add_argument('--validate', action='store_true',
+                        help="Valide le dataset avant import ; les lignes rejetées vont en quarantaine")
+    parser.add_argument('--consolidate', action='store_true',
+                        help="Importe le dataset consolidé : une ligne par track_id avec la liste de ses genres")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
     load_dotenv()
     
     NEO4J_URI = os.getenv('NEO4J_URI')
@@ -268,28 +1289,66 @@ def main():
     print(f"Connexion URI: {NEO4J_URI}")
     
     # notre path de csv
-    CSV_PATH = "../data/dataset.csv"
+    CSV_PATH = args.csv
     
-    importer = SpotifyUltraFastImporter(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    importer = SpotifyUltraFastImporter(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD,
+                                        workers=args.workers, min_chunk_size=args.min_chunk_size,
+                                        batch_size=args.batch_size, target_latency=args.target_latency,
+                                        telemetry_path=args.telemetry or f"{CSV_PATH}.telemetry.ndjson")
     
     try:
         start_time = time.time()
 
-        print("\n=== Chargement dataset... ===")
-        df = pd.read_csv(CSV_PATH)
-        print(f"{len(df):,} lignes chargées")
-        
         print("\n=== Contraintes et index... ===")
         importer.create_constraints_and_indexes()
+        if args.constraints_only:
+            return
+        
+        if args.fresh:
+            importer.enable_fresh_load()
+            print("Mode fresh: base vide, noeuds et relations créés avec CREATE")
         
-        print("\n=== IMPORT ULTRA-RAPIDE... ===")
-        importer.import_all_data_ultra_fast(df)
+        if args.validate:
+            from dataset_validation import validate_dataset
+            report = validate_dataset(CSV_PATH)
+            importer.skip_rows = report['rejected_row_numbers']
+        
+        if args.consolidate:
+            from dataset_consolidation import consolidate_dataset
+            # Les lignes en quarantaine sont écartées à la consolidation, plus à l'import
+            report = consolidate_dataset(CSV_PATH, skip_rows=importer.skip_rows)
+            CSV_PATH = report['output']
+            importer.skip_rows = np.array([], dtype=np.int64)
+        
+        if args.stream or args.resume or args.cache:
+            print("\n=== IMPORT STREAMING... ===")
+            total_rows = importer.import_csv_streaming(CSV_PATH, compare_preparation=args.compare_preparation,
+                                                       resume=args.resume, use_cache=args.cache)
+        else:
+            print("\n=== Chargement dataset... ===")
+            if args.validate:
+                # Lecture texte : une valeur invalide (ligne en quarantaine) ne fait pas échouer le typage
+                df = coerce_csv_types(pd.read_csv(CSV_PATH, dtype=str))
+            else:
+                df = pd.read_csv(CSV_PATH)
+            total_rows = len(df)
+            print(f"{total_rows:,} lignes chargées")
+            
+            print("\n=== IMPORT ULTRA-RAPIDE... ===")
+            importer.import_all_data_ultra_fast(df, compare_preparation=args.compare_preparation)
         
         importer.get_database_stats()
+        importer.batch_sizer.report()
+        importer.telemetry.report()
         
         elapsed = time.time() - start_time
         print(f"\n======== TERMINÉ en {elapsed:.1f} secondes ! ========")
-        print(f"Performance: {len(df)/elapsed:.0f} lignes/seconde")
+        mode = "fresh (CREATE)" if importer.fresh_load else "MERGE"
+        importer.telemetry.end_run(rows=total_rows, elapsed_s=round(elapsed, 3), workers=importer.workers, mode=mode)
+        print(f"Télémétrie: {importer.telemetry.path}")
+        print(f"Performance: {total_rows/elapsed:.0f} lignes/seconde ({importer.workers} worker(s), mode {mode})")
+        if importer.workers > 1:
+            print(f"Retries sur deadlock: {sum(importer.deadlock_retries.values())} {dict(importer.deadlock_retries)}")
         
     except Exception as e:
         print(f"Erreur: {e}")
@@ -0,0 +1,108 @@
+"""
+Recalcul complet des agrégats par genre et par artiste (stats_* sur les noeuds Genre / Artist)
+
+Les écritures de l'application et les imports les maintiennent ; ce script les initialise sur une base
+importée avant leur ajout (ou via neo4j-admin) et sert de reprise (écriture faite hors du backend,
+import interrompu, dérive des sommes). --check compare seulement les agrégats stockés au recalcul
+depuis les relations, sans rien écrire
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from dotenv import load_dotenv
+from neo4j import GraphDatabase
+
+from statistics_queries import REBUILD_ARTIST_STATISTICS_QUERY, REBUILD_GENRE_STATISTICS_QUERY
+
+# Noeuds dont le nombre de tracks ou la somme des popularités diffère de leurs relations
+DRIFT_QUERY = """
+MATCH (n:{label})
+CALL (n) {{
+    OPTIONAL MATCH {pattern}
+    RETURN count(t) as track_count, sum(t.popularity) as popularity_sum
+}}
+WITH n, track_count, popularity_sum
+WHERE n.stats_track_count IS NULL OR n.stats_track_count <> track_count
+   OR abs(coalesce(n.stats_popularity_sum, 0) - popularity_sum) > 0.001
+RETURN n.name as name, n.stats_track_count as stored_count, track_count,
+       n.stats_popularity_sum as stored_popularity_sum, popularity_sum
+ORDER BY track_count DESC
+"""
+
+DRIFT_CHECKS = {
+    'Genre': "(n)<-[:HAS_GENRE]-(t:Track)",
+    'Artist': "(n)-[:PERFORMS]->(t:Track)",
+}
+
+
+def check_statistics(driver, show: int = 10) -> int:
+    """Affiche les noeuds dont les agrégats ont dérivé ; renvoie leur nombre"""
+    drifted = 0
+    with driver.session() as session:
+        for label, pattern in DRIFT_CHECKS.items():
+            df = pd.DataFrame([record.data() for record in
+                               session.run(DRIFT_QUERY.format(label=label, pattern=pattern))])
+            drifted += len(df)
+            print(f"{'✅' if df.empty else '❌'} {label}: {len(df):,} noeud(s) en écart")
+            for row in df.head(show).itertuples():
+                print(f"   {row.name}: {row.stored_count} tracks stockées / {row.track_count} réelles, "
+                      f"popularité {row.stored_popularity_sum} / {row.popularity_sum}")
+    return drifted
+
+
+def rebuild_statistics(driver) -> dict:
+    """Recalcul complet (CALL ... IN TRANSACTIONS, donc transactions implicites) ; noeuds recalculés par label"""
+    with driver.session() as session:
+        return {
+            label: session.run(query).single()['nodes']
+            for label, query in (('genres', REBUILD_GENRE_STATISTICS_QUERY),
+                                 ('artists', REBUILD_ARTIST_STATISTICS_QUERY))
+        }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Recalcul des agrégats par genre / artiste de l'application")
+    parser.add_argument('--check', action='store_true',
+                        help="Vérifie seulement les agrégats stockés (aucune écriture, code 1 en cas d'écart)")
+    parser.add_argument('--show', type=int, default=10, help="Écarts affichés par label avec --check")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    load_dotenv()
+
+    NEO4J_URI = os.getenv('NEO4J_URI')
+    NEO4J_USER = os.getenv('NEO4J_USERNAME')
+    NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
+
+    if not all([NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD]):
+        print("❌ Variables d'environnement manquantes")
+        sys.exit(1)
+
+    driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    try:
+        start = time.perf_counter()
+        if args.check:
+            print("=== Vérification des agrégats ===")
+            drifted = check_statistics(driver, args.show)
+            print(f"Vérifié en {time.perf_counter() - start:.1f}s")
+            if drifted:
+                print("Relancer sans --check pour recalculer")
+                sys.exit(1)
+            return
+
+        print("=== Recalcul complet des agrégats ===")
+        counts = rebuild_statistics(driver)
+        print(f"Agrégats recalculés : {counts['genres']} genre(s), {counts['artists']} artiste(s) "
+              f"en {time.perf_counter() - start:.1f}s")
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Requêtes Cypher des agrégats par genre / artiste (stats_* sur les noeuds Genre / Artist)
+
+Partagées par le backend de l'application (écritures, lecture des statistiques) et par les imports
+(recalcul des noeuds touchés) ; aucune dépendance, importable des deux côtés
+"""
+
+
+# Chaque Genre / Artist porte les agrégats de ses tracks (une contribution par relation HAS_GENRE / PERFORMS) :
+# stats_track_count, puis pour chaque propriété de STATS_FEATURES sa somme et son nombre de valeurs non nulles.
+# Les écritures du backend les ajustent dans leur transaction, l'import les recalcule pour les noeuds touchés
+# et script/rebuild_statistics.py recalcule tout : les statistiques se lisent en O(#genres), sans parcourir les tracks
+
+STATS_FEATURES = ('popularity', 'energy', 'danceability', 'valence')
+
+
+def stats_delta(node: str, track: str, sign: str) -> str:
+    """Clauses ajoutant (sign='+') ou retirant (sign='-') la contribution de la track aux agrégats du noeud"""
+    increments = [f"{node}.stats_track_count = coalesce({node}.stats_track_count, 0) {sign} 1"]
+    for feature in STATS_FEATURES:
+        increments.append(f"{node}.stats_{feature}_sum = coalesce({node}.stats_{feature}_sum, 0) "
+                          f"{sign} coalesce({track}.{feature}, 0)")
+        increments.append(f"{node}.stats_{feature}_count = coalesce({node}.stats_{feature}_count, 0) "
+                          f"{sign} CASE WHEN {track}.{feature} IS NULL THEN 0 ELSE 1 END")
+    # Verrou d'écriture pris avant de lire les compteurs : pas de mise à jour perdue entre transactions concurrentes
+    return (f"SET {node}._stats_lock = true\n"
+            f"    SET " + ',\n        '.join(increments) + "\n"
+            f"    REMOVE {node}._stats_lock")
+
+
+def track_stats_delta(sign: str) -> str:
+    """Sous-requêtes appliquant stats_delta à tous les genres et artistes de la track t"""
+    return f"""
+CALL (t) {{
+    MATCH (t)-[:HAS_GENRE]->(g:Genre)
+    {stats_delta('g', 't', sign)}
+}}
+CALL (t) {{
+    MATCH (a:Artist)-[:PERFORMS]->(t)
+    {stats_delta('a', 't', sign)}
+}}
+"""
+
+
+TRACK_STATS_ADD = track_stats_delta('+')
+TRACK_STATS_REMOVE = track_stats_delta('-')
+
+# Création d'une chanson : contribution ajoutée juste après chaque nouvelle relation
+GENRE_STATS_ADD = stats_delta('g', 't', '+')
+ARTIST_STATS_ADD = stats_delta('a', 't', '+')
+
+
+def stats_recompute(node: str, pattern: str) -> str:
+    """
+    Sous-requête recalculant les agrégats du noeud depuis ses relations (pattern lie les tracks à t)
+
+    Verrou d'écriture pris avant de lire les relations : une écriture concurrente du backend (relation + delta
+    dans la même transaction) est soit déjà visible, soit appliquée après le recalcul, jamais écrasée
+    """
+    aggregates = ',\n         '.join(f"sum(t.{feature}) as {feature}_sum, count(t.{feature}) as {feature}_count"
+                                      for feature in STATS_FEATURES)
+    assignments = ',\n        '.join(f"{node}.stats_{feature}_sum = {feature}_sum, "
+                                      f"{node}.stats_{feature}_count = {feature}_count"
+                                      for feature in STATS_FEATURES)
+    return f"""CALL ({node}) {{
+    SET {node}._stats_lock = true
+    WITH {node}
+    OPTIONAL MATCH {pattern}
+    WITH {node}, count(t) as track_count,
+         {aggregates}
+    SET {node}.stats_track_count = track_count,
+        {assignments}
+    REMOVE {node}._stats_lock
+}}"""
+
+
+def stats_average(node: str, feature: str) -> str:
+    return (f"CASE WHEN {node}.stats_{feature}_count > 0 "
+            f"THEN round(toFloat({node}.stats_{feature}_sum) / {node}.stats_{feature}_count, 2) END")
+
+
+GENRE_STATS_RECOMPUTE = stats_recompute('g', "(g)<-[:HAS_GENRE]-(t:Track)")
+ARTIST_STATS_RECOMPUTE = stats_recompute('a', "(a)-[:PERFORMS]->(t:Track)")
+
+# Recalcul complet, par lots dans des transactions implicites (session.run, pas execute_write)
+REBUILD_GENRE_STATISTICS_QUERY = "MATCH (g:Genre)\n" + GENRE_STATS_RECOMPUTE + """ IN TRANSACTIONS OF 100 ROWS
+RETURN count(*) as nodes
+"""
+
+REBUILD_ARTIST_STATISTICS_QUERY = "MATCH (a:Artist)\n" + ARTIST_STATS_RECOMPUTE + """ IN TRANSACTIONS OF 1000 ROWS
+RETURN count(*) as nodes
+"""
+
+# Recalcul ciblé (import) : $rows = [{name: ...}], idempotent donc rejouable après un échec de lot
+REFRESH_GENRE_STATISTICS_QUERY = """
+UNWIND $rows as row
+MATCH (g:Genre {name: row.name})
+""" + GENRE_STATS_RECOMPUTE
+
+REFRESH_ARTIST_STATISTICS_QUERY = """
+UNWIND $rows as row
+MATCH (a:Artist {name: row.name})
+""" + ARTIST_STATS_RECOMPUTE
+
+# Genres / artistes sans agrégats : base importée avant leur ajout ou via neo4j-admin (rebuild_statistics.py)
+STATISTICS_MISSING_QUERY = """
+CALL () {
+    MATCH (g:Genre) WHERE g.stats_track_count IS NULL
+    RETURN count(g) as genres
+}
+CALL () {
+    MATCH (a:Artist) WHERE a.stats_track_count IS NULL
+    RETURN count(a) as artists
+}
+RETURN genres, artists
+"""
@@ -0,0 +1,269 @@
+"""
+Backend asynchrone (driver neo4j async) : mêmes lectures que SpotifyBackend, lancées en parallèle
+pour le rendu d'une page, dont la durée devient celle de la requête la plus lente au lieu de la somme
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from neo4j import AsyncGraphDatabase
+from neo4j.exceptions import ClientError
+
+from backend import (
+    ALL_ARTISTS_QUERY, ALL_GENRES_QUERY, ALL_SONGS_QUERY, ARTIST_STATISTICS_QUERY, FULLTEXT_INDEXES,
+    GENRE_STATISTICS_QUERY, POPULAR_SONGS_QUERY, QUICK_STATS_QUERY, SEARCH_CONTAINS_QUERY, SEARCH_FULLTEXT_QUERY,
+    SEARCH_MODES, SIMPLE_COUNT_QUERY, SONG_BY_ID_QUERY, SONGS_BY_ARTIST_QUERY, SONGS_BY_GENRE_QUERY,
+    SONGS_FIRST_PAGE_WHERE, SONGS_NEXT_PAGE_WHERE, SONGS_PAGE_QUERY, QueryCache, Uncached, cached_read, decode_cursor,
+    encode_cursor, get_backend, lucene_query, on_backend_reset, pool_config_from_env, pool_usage,
+    query_metrics_from_env, record_to_song, records_to_songs,
+)
+from query_metrics import QueryMetrics, run_query_async
+
+# Délai maximal d'un rendu de page en parallèle (secondes)
+GATHER_TIMEOUT = 60
+
+
+class AsyncSpotifyBackend:
+    """Lectures de SpotifyBackend sur le driver async ; à utiliser depuis une seule boucle asyncio"""
+
+    def __init__(self, cache: Optional[QueryCache] = None, metrics: Optional[QueryMetrics] = None):
+        self.uri = os.getenv('NEO4J_URI')
+        self.username = os.getenv('NEO4J_USERNAME')
+        self.password = os.getenv('NEO4J_PASSWORD')
+        self.database = os.getenv('NEO4J_DATABASE', 'neo4j')
+
+        if not all([self.uri, self.username, self.password]):
+            raise ValueError("Configuration Neo4j manquante dans .env")
+
+        self.pool_config = pool_config_from_env()
+        self.driver = AsyncGraphDatabase.driver(
+            self.uri,
+            auth=(self.username, self.password),
+            database=self.database,
+            **self.pool_config
+        )
+        # Cache partagé avec SpotifyBackend (mêmes clés) : ses écritures invalident aussi ces lectures
+        self.cache = cache if cache is not None else QueryCache(int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '512')))
+        # Métriques partagées de la même façon : une méthode a les mêmes percentiles quel que soit le driver
+        self.metrics = metrics if metrics is not None else query_metrics_from_env()
+
+    async def close(self):
+        await self.driver.close()
+
+    async def _fetch(self, method: str, query: str, params: Optional[Dict[str, Any]] = None) -> list:
+        async with self.driver.session() as session:
+            return (await run_query_async(session, self.metrics, method, query, params))[1]
+
+    async def ensure_fulltext_indexes(self):
+        for index_name, (label, prop) in FULLTEXT_INDEXES.items():
+            await self._fetch('ensure_fulltext_indexes',
+                              f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON EACH [n.{prop}]")
+
+    @cached_read
+    async def search_songs(self, search_term: str, limit: int = 20, mode: str = 'fulltext',
+                           relevance_weight: float = 0.7) -> List[Dict[str, Any]]:
+        """Voir SpotifyBackend.search_songs"""
+        if not search_term or len(search_term.strip()) < 1:
+            return []
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Mode de recherche inconnu: {mode}")
+
+        search_term = search_term.strip()
+        safe_limit = min(limit, 25)
+
+        if mode == 'fulltext':
+            query = lucene_query(search_term)
+            if not query:
+                return []
+            try:
+                return records_to_songs(await self._fetch('search_songs', SEARCH_FULLTEXT_QUERY, {
+                    'query': query, 'limit': safe_limit, 'candidates': safe_limit * 4,
+                    'relevance_weight': relevance_weight,
+                }))
+            except ClientError as e:
+                if 'no such' in str(e).lower():
+                    await self.ensure_fulltext_indexes()
+                # Repli CONTAINS non mis en cache sous mode='fulltext'
+                return Uncached(await self._search_songs_contains(search_term, safe_limit))
+
+        return await self._search_songs_contains(search_term, safe_limit)
+
+    async def _search_songs_contains(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        return records_to_songs(await self._fetch('search_songs', SEARCH_CONTAINS_QUERY,
+                                                  {'search_term': search_term, 'limit': limit}))
+
+    @cached_read
+    async def get_song_by_id(self, track_id: str) -> Optional[Dict[str, Any]]:
+        records = await self._fetch('get_song_by_id', SONG_BY_ID_QUERY, {'track_id': track_id})
+        return record_to_song(records[0]) if records else None
+
+    @cached_read
+    async def get_all_songs(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        return records_to_songs(await self._fetch('get_all_songs', ALL_SONGS_QUERY,
+                                                  {'limit': max(1, min(limit, 100)), 'offset': offset}))
+
+    @cached_read
+    async def get_songs_page(self, page_size: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Voir SpotifyBackend.get_songs_page"""
+        safe_limit = max(1, min(page_size, 100))
+        if cursor is None:
+            query = SONGS_PAGE_QUERY.replace('{where}', SONGS_FIRST_PAGE_WHERE)
+            params = {}
+        else:
+            popularity, track_id = decode_cursor(cursor)
+            query = SONGS_PAGE_QUERY.replace('{where}', SONGS_NEXT_PAGE_WHERE)
+            params = {'popularity': popularity, 'track_id': track_id}
+
+        songs = records_to_songs(await self._fetch('get_songs_page', query, {'limit': safe_limit, **params}))
+        next_cursor = None
+        if len(songs) == safe_limit:
+            next_cursor = encode_cursor(songs[-1]['popularity'], songs[-1]['id'])
+        return {'songs': songs, 'next_cursor': next_cursor}
+
+    @cached_read
+    async def get_songs_by_genre(self, genre: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return records_to_songs(await self._fetch('get_songs_by_genre', SONGS_BY_GENRE_QUERY,
+                                                  {'genre': genre, 'limit': max(1, min(limit, 100))}))
+
+    @cached_read
+    async def get_songs_by_artist(self, artist_name: str, limit: int = 30) -> List[Dict[str, Any]]:
+        return records_to_songs(await self._fetch('get_songs_by_artist', SONGS_BY_ARTIST_QUERY,
+                                                  {'artist_name': artist_name, 'limit': limit}))
+
+    @cached_read
+    async def get_all_artists(self, limit: int = 100) -> List[Dict[str, Any]]:
+        return [dict(record) for record in await self._fetch('get_all_artists', ALL_ARTISTS_QUERY, {'limit': limit})]
+
+    @cached_read
+    async def get_all_genres(self) -> List[str]:
+        return [record['name'] for record in await self._fetch('get_all_genres', ALL_GENRES_QUERY)]
+
+    @cached_read
+    async def get_genre_statistics(self) -> List[Dict[str, Any]]:
+        return [dict(record) for record in await self._fetch('get_genre_statistics', GENRE_STATISTICS_QUERY)]
+
+    @cached_read
+    async def get_artist_statistics(self) -> List[Dict[str, Any]]:
+        return [dict(record) for record in await self._fetch('get_artist_statistics', ARTIST_STATISTICS_QUERY)]
+
+    @cached_read
+    async def get_popular_songs(self, limit: int = 20) -> List[Dict[str, Any]]:
+        return records_to_songs(await self._fetch('get_popular_songs', POPULAR_SONGS_QUERY, {'limit': limit}))
+
+    @cached_read
+    async def get_quick_stats(self) -> Dict[str, Any]:
+        records = await self._fetch('get_quick_stats', QUICK_STATS_QUERY)
+        return dict(records[0]) if records else {}
+
+    @cached_read
+    async def get_simple_count(self) -> int:
+        records = await self._fetch('get_simple_count', SIMPLE_COUNT_QUERY)
+        return records[0]['count'] if records else 0
+
+
+class AsyncReadRunner:
+    """
+    Boucle asyncio dans un thread démon, propriétaire d'un AsyncSpotifyBackend
+
+    Les pages Streamlit (code synchrone) y soumettent leurs lectures indépendantes via gather()
+    """
+
+    def __init__(self, cache: Optional[QueryCache] = None, metrics: Optional[QueryMetrics] = None):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='neo4j-async-reads', daemon=True)
+        self.thread.start()
+        # Driver async créé dans sa boucle
+        self.backend = self.run(self._open(cache, metrics))
+
+    @staticmethod
+    async def _open(cache: Optional[QueryCache], metrics: Optional[QueryMetrics]) -> AsyncSpotifyBackend:
+        return AsyncSpotifyBackend(cache, metrics)
+
+    def run(self, coroutine: Awaitable, timeout: Optional[float] = GATHER_TIMEOUT):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def gather(self, timeout: Optional[float] = GATHER_TIMEOUT, return_exceptions: bool = False,
+               **calls: Callable[[AsyncSpotifyBackend], Awaitable]) -> Dict[str, Any]:
+        """
+        Lance toutes les lectures en même temps et attend la dernière
+
+        Args:
+            calls: nom -> fonction recevant le backend async et renvoyant la coroutine,
+                   ex. genre_stats=lambda b: b.get_genre_statistics()
+            return_exceptions: renvoyer l'exception d'une lecture en échec à la place de son résultat
+                               (les autres lectures aboutissent)
+
+        Returns:
+            nom -> résultat
+        """
+        async def gather_all():
+            return await asyncio.gather(*(call(self.backend) for call in calls.values()),
+                                        return_exceptions=return_exceptions)
+
+        return dict(zip(calls, self.run(gather_all(), timeout)))
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """pool_usage() du driver async, lu dans sa boucle (le pool async n'est pas partagé entre threads)"""
+        max_size = self.backend.pool_config.get('max_connection_pool_size')
+        if not self.loop.is_running():  # Runner fermé : pool vide
+            return pool_usage(None, max_size)
+
+        async def read_pool():
+            return pool_usage(self.backend.driver, max_size)
+
+        return self.run(read_pool())
+
+    def close(self):
+        if self.loop.is_running():
+            self.run(self.backend.close())
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+
+
+def result_or_raise(value):
+    """Résultat d'un gather(return_exceptions=True) : relève l'exception de la lecture en échec"""
+    if isinstance(value, BaseException):
+        raise value
+    return value
+
+
+# ==================== REGISTRE DU PROCESSUS ====================
+
+_runner: Optional[AsyncReadRunner] = None
+_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncReadRunner:
+    """Runner unique du processus, partageant le cache et les métriques du backend synchrone (get_backend)"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            backend = get_backend()
+            _runner = AsyncReadRunner(cache=backend.cache, metrics=backend.metrics)
+            atexit.register(_runner.close)
+            # Pool du driver async visible dans backend.pool_stats() (page Performance, métriques)
+            backend.pool_sources['async'] = _runner.pool_stats
+        return _runner
+
+
+@on_backend_reset
+def reset_async_runner():
+    """
+    Ferme le runner partagé (appelé par reset_backend) ; le prochain get_async_runner() en recrée un
+    sur le cache et les métriques du nouveau backend, que ses écritures invalident
+    """
+    global _runner
+    with _runner_lock:
+        if _runner is not None:
+            atexit.unregister(_runner.close)
+            _runner.close()
+            _runner = None
+
+
+def gather_reads(timeout: Optional[float] = GATHER_TIMEOUT, return_exceptions: bool = False,
+                 **calls: Callable[[AsyncSpotifyBackend], Awaitable]) -> Dict[str, Any]:
+    """Lectures indépendantes d'une page en parallèle, voir AsyncReadRunner.gather"""
+    return get_async_runner().gather(timeout=timeout, return_exceptions=return_exceptions, **calls)
@@ -1,15 +1,813 @@
+import atexit
+import base64
+import copy
+import functools
+import inspect
+import json
 import os
 import sys
+import threading
+import time
+from collections import Counter, OrderedDict
 from pathlib import Path
 from dotenv import load_dotenv
 from neo4j import GraphDatabase
+from neo4j.exceptions import ClientError
 import pandas as pd
+import pyarrow as pa
 import uuid
-from typing import Optional, List, Dict, Any
+from typing import Optional, Callable, List, Dict, Any
+
+from query_metrics import QueryMetrics, run_query
+
+# Agrégats par genre / artiste : requêtes partagées avec les imports (script/statistics_queries.py)
+sys.path.append(str(Path(__file__).resolve().parent.parent / 'script'))
+from statistics_queries import (ARTIST_STATS_ADD, GENRE_STATS_ADD, STATISTICS_MISSING_QUERY, STATS_FEATURES,
+                                TRACK_STATS_ADD, TRACK_STATS_REMOVE, stats_average)
 
 # Charger les variables d'environnement
 load_dotenv()
 
+# Index full-text (Lucene) utilisés par search_songs(mode='fulltext'), mis à jour par Neo4j à chaque écriture
+FULLTEXT_INDEXES = {
+    'track_name_fulltext': ('Track', 'name'),
+    'artist_name_fulltext': ('Artist', 'name'),
+    'album_name_fulltext': ('Album', 'name'),
+    'genre_name_fulltext': ('Genre', 'name'),
+}
+
+SEARCH_MODES = ('fulltext', 'contains')
+
+# Caractères réservés de la syntaxe de requête Lucene
+LUCENE_SPECIAL_CHARS = set('+-&|!(){}[]^"~*?:\\/')
+
+
+def encode_cursor(popularity: int, track_id: str) -> str:
+    """Curseur opaque de pagination : position (popularité, track_id) de la dernière chanson de la page"""
+    return base64.urlsafe_b64encode(json.dumps([popularity, track_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        popularity, track_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Curseur de pagination invalide")
+    return popularity, track_id
+
+
+def lucene_query(search_term: str) -> str:
+    """Requête Lucene : chaque mot doit apparaître, en entier (boosté) ou comme préfixe (saisie en cours)"""
+    clauses = []
+    for word in search_term.lower().split():  # Minuscules : pas d'opérateur AND/OR/NOT implicite
+        escaped = ''.join(f"\\{char}" if char in LUCENE_SPECIAL_CHARS else char for char in word)
+        clauses.append(f"({escaped}^2 OR {escaped}*)")
+    return ' AND '.join(clauses)
+
+
+# ==================== REQUÊTES DE LISTE ====================
+# Forme commune : sélection des K tracks d'abord (ORDER BY + LIMIT sur t seul), puis lecture des relations
+# uniquement pour ces K tracks. Le tri (popularité, track_id) décroissant est fourni par l'index composite
+# track_popularity_id : le coût ne dépend pas de la taille du catalogue (voir script/check_query_plans.py)
+
+ARTISTS_EXPANSION = """
+CALL (t) {
+    OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
+    RETURN collect(DISTINCT a.name)[..2] as artists_limited
+}
+"""
+
+GENRE_EXPANSION = """
+CALL (t) {
+    OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
+    // Genre principal (t.genre) en premier, puis ordre alphabétique : résultat déterministe
+    RETURN g.name as genre ORDER BY g.name = t.genre DESC, g.name LIMIT 1
+}
+"""
+
+ALBUM_EXPANSION = """
+CALL (t) {
+    OPTIONAL MATCH (t)-[:BELONGS_TO]->(al:Album)
+    RETURN al.name as album LIMIT 1
+}
+"""
+
+TRACK_MAP = """{
+    id: t.track_id,
+    name: t.name,
+    popularity: t.popularity,
+    energy: t.energy,
+    danceability: t.danceability
+} as track"""
+
+POPULAR_SONGS_QUERY = """
+MATCH (t:Track)
+WHERE t.popularity IS NOT NULL AND t.track_id IS NOT NULL
+WITH t
+ORDER BY t.popularity DESC, t.track_id DESC
+LIMIT $limit
+""" + ARTISTS_EXPANSION + GENRE_EXPANSION + ALBUM_EXPANSION + """
+RETURN {
+    id: t.track_id,
+    name: t.name,
+    popularity: t.popularity,
+    energy: t.energy,
+    danceability: t.danceability,
+    valence: t.valence
+} as track,
+artists_limited as artists,
+genre,
+album
+ORDER BY track.popularity DESC, track.id DESC
+"""
+
+ALL_SONGS_QUERY = """
+MATCH (t:Track)
+WHERE t.popularity IS NOT NULL AND t.track_id IS NOT NULL
+WITH t
+ORDER BY t.popularity DESC, t.track_id DESC
+SKIP $offset
+LIMIT $limit
+""" + ARTISTS_EXPANSION + GENRE_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+artists_limited as artists,
+genre
+ORDER BY track.popularity DESC, track.id DESC
+"""
+
+# Pagination keyset : reprise de l'index juste après (popularité, track_id) de la page précédente
+SONGS_PAGE_QUERY = """
+MATCH (t:Track)
+WHERE {where}
+WITH t
+ORDER BY t.popularity DESC, t.track_id DESC
+LIMIT $limit
+""" + ARTISTS_EXPANSION + GENRE_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+artists_limited as artists,
+genre
+ORDER BY track.popularity DESC, track.id DESC
+"""
+
+SONGS_FIRST_PAGE_WHERE = "t.popularity IS NOT NULL AND t.track_id IS NOT NULL"
+
+# Borne <= utilisable par l'index, départage des ex aequo sur track_id
+SONGS_NEXT_PAGE_WHERE = ("t.popularity <= $popularity AND t.track_id IS NOT NULL "
+                         "AND (t.popularity < $popularity OR t.track_id < $track_id)")
+
+SEARCH_CONTAINS_QUERY = """
+MATCH (t:Track)
+WHERE toLower(t.name) CONTAINS toLower($search_term)
+WITH t
+ORDER BY t.popularity DESC
+LIMIT $limit
+""" + ARTISTS_EXPANSION + GENRE_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+artists_limited as artists,
+genre
+ORDER BY track.popularity DESC
+"""
+
+# Chaque index renvoie au plus $candidates noeuds, et chaque artiste/album/genre trouvé
+# au plus $candidates tracks (les plus populaires)
+SEARCH_FULLTEXT_QUERY = """
+CALL () {
+    CALL db.index.fulltext.queryNodes('track_name_fulltext', $query, {limit: $candidates})
+    YIELD node, score
+    RETURN node as t, score
+    UNION ALL
+    CALL db.index.fulltext.queryNodes('artist_name_fulltext', $query, {limit: $candidates})
+    YIELD node, score
+    CALL (node) {
+        MATCH (node)-[:PERFORMS]->(t:Track)
+        RETURN t ORDER BY t.popularity DESC LIMIT $candidates
+    }
+    RETURN t, score
+    UNION ALL
+    CALL db.index.fulltext.queryNodes('album_name_fulltext', $query, {limit: $candidates})
+    YIELD node, score
+    CALL (node) {
+        MATCH (t:Track)-[:BELONGS_TO]->(node)
+        RETURN t ORDER BY t.popularity DESC LIMIT $candidates
+    }
+    RETURN t, score
+    UNION ALL
+    CALL db.index.fulltext.queryNodes('genre_name_fulltext', $query, {limit: $candidates})
+    YIELD node, score
+    CALL (node) {
+        MATCH (t:Track)-[:HAS_GENRE]->(node)
+        RETURN t ORDER BY t.popularity DESC LIMIT $candidates
+    }
+    RETURN t, score
+}
+WITH t, max(score) as score
+
+// Score Lucene normalisé (0-1) mélangé à la popularité (0-100)
+WITH collect({t: t, score: score}) as hits, max(score) as top_score
+UNWIND hits as hit
+WITH hit.t as t,
+     $relevance_weight * hit.score / top_score
+     + (1 - $relevance_weight) * coalesce(hit.t.popularity, 0) / 100.0 as rank
+ORDER BY rank DESC
+LIMIT $limit
+""" + ARTISTS_EXPANSION + GENRE_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+artists_limited as artists,
+genre,
+round(rank, 3) as rank
+ORDER BY rank DESC
+"""
+
+SONGS_BY_GENRE_QUERY = """
+MATCH (:Genre {name: $genre})<-[:HAS_GENRE]-(t:Track)
+WITH t
+ORDER BY t.popularity DESC
+LIMIT $limit
+""" + ARTISTS_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+artists_limited as artists,
+$genre as genre
+ORDER BY track.popularity DESC
+"""
+
+SONGS_BY_ARTIST_QUERY = """
+MATCH (:Artist {name: $artist_name})-[:PERFORMS]->(t:Track)
+WITH t
+ORDER BY t.popularity DESC
+LIMIT $limit
+""" + GENRE_EXPANSION + """
+RETURN """ + TRACK_MAP + """,
+[$artist_name] as artists,
+genre
+ORDER BY track.popularity DESC
+"""
+
+
+# ==================== REQUÊTES DE DÉTAIL ET STATISTIQUES ====================
+
+SONG_BY_ID_QUERY = """
+MATCH (t:Track {track_id: $track_id})
+OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
+OPTIONAL MATCH (t)-[:BELONGS_TO]->(al:Album)
+OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
+
+RETURN t,
+       collect(DISTINCT a.name) as artists,
+       al.name as album,
+       g.name as genre
+"""
+
+ALL_ARTISTS_QUERY = """
+MATCH (a:Artist)
+RETURN a.name as name, 
+       a.followers as followers,
+       coalesce(a.stats_track_count, 0) as track_count
+ORDER BY track_count DESC, a.name
+LIMIT $limit
+"""
+
+ALL_GENRES_QUERY = """
+MATCH (g:Genre)
+RETURN g.name as name
+ORDER BY g.name
+"""
+
+GENRE_STATISTICS_QUERY = """
+MATCH (g:Genre)
+WHERE g.stats_track_count > 0
+RETURN g.name as genre,
+       g.stats_track_count as track_count,
+       """ + stats_average('g', 'popularity') + """ as avg_popularity,
+       """ + stats_average('g', 'energy') + """ as avg_energy,
+       """ + stats_average('g', 'danceability') + """ as avg_danceability
+ORDER BY track_count DESC
+LIMIT 15
+"""
+
+ARTIST_STATISTICS_QUERY = """
+MATCH (a:Artist)
+WHERE a.stats_track_count >= 2
+RETURN a.name as artist,
+       a.stats_track_count as track_count,
+       """ + stats_average('a', 'popularity') + """ as avg_popularity
+ORDER BY track_count DESC
+LIMIT 20
+"""
+
+QUICK_STATS_QUERY = """
+CALL () {
+    MATCH (t:Track) RETURN count(t) as total_tracks
+}
+CALL () {
+    MATCH (g:Genre) RETURN count(g) as total_genres
+}
+CALL () {
+    MATCH (a:Artist) RETURN count(a) as total_artists
+}
+RETURN total_tracks, total_genres, total_artists
+"""
+
+SIMPLE_COUNT_QUERY = "MATCH (t:Track) RETURN count(t) as count"
+
+# Extraction analytique : une colonne par propriété (pas de map par ligne), tracks les plus populaires d'abord
+TRACK_FEATURES_QUERY = """
+MATCH (t:Track)
+WHERE t.popularity IS NOT NULL AND t.track_id IS NOT NULL
+WITH t
+ORDER BY t.popularity DESC, t.track_id DESC
+LIMIT $limit
+RETURN t.track_id as track_id,
+       t.name as name,
+       t.popularity as popularity,
+       t.duration_ms as duration_ms,
+       t.explicit as explicit,
+       t.danceability as danceability,
+       t.energy as energy,
+       t.key as key,
+       t.loudness as loudness,
+       toBoolean(t.mode) as mode,  // Entier 0/1 pour les chansons créées avant l'alignement sur l'import
+       t.speechiness as speechiness,
+       t.acousticness as acousticness,
+       t.instrumentalness as instrumentalness,
+       t.liveness as liveness,
+       t.valence as valence,
+       t.tempo as tempo,
+       t.time_signature as time_signature
+"""
+
+
+# ==================== RÉSULTATS COLONNAIRES ====================
+
+FRAME_FORMATS = ('pandas', 'arrow')
+
+# Types Arrow des colonnes connues ; une colonne absente est inférée par Arrow
+COLUMN_TYPES = {
+    'track_id': pa.string(),
+    'name': pa.string(),
+    'genre': pa.string(),
+    'artist': pa.string(),
+    'track_count': pa.int64(),
+    'avg_popularity': pa.float64(),
+    'avg_energy': pa.float64(),
+    'avg_danceability': pa.float64(),
+    'popularity': pa.int64(),
+    'duration_ms': pa.int64(),
+    'explicit': pa.bool_(),
+    'danceability': pa.float64(),
+    'energy': pa.float64(),
+    'key': pa.int64(),
+    'loudness': pa.float64(),
+    'mode': pa.bool_(),  # Booléen, comme l'écrit l'import
+    'speechiness': pa.float64(),
+    'acousticness': pa.float64(),
+    'instrumentalness': pa.float64(),
+    'liveness': pa.float64(),
+    'valence': pa.float64(),
+    'tempo': pa.float64(),
+    'time_signature': pa.int64(),
+}
+
+def records_to_frame(keys: List[str], records, format: str = 'pandas'):
+    """
+    Enregistrements -> DataFrame pandas ou Table Arrow, sans dictionnaire par ligne
+
+    Les enregistrements neo4j sont des tuples : zip(*records) les transpose en colonnes,
+    converties chacune en un tableau Arrow typé (COLUMN_TYPES)
+    """
+    if format not in FRAME_FORMATS:
+        raise ValueError(f"Format inconnu: {format}")
+    columns = list(zip(*records)) or [()] * len(keys)
+    table = pa.table({key: pa.array(values, type=COLUMN_TYPES.get(key)) for key, values in zip(keys, columns)})
+    if format == 'arrow':
+        return table
+    # Dtypes numpy pour les graphiques (un entier avec valeurs manquantes devient float64, comme read_csv)
+    return table.to_pandas()
+
+
+def pool_usage(driver, max_size: Optional[int]) -> Dict[str, Any]:
+    """Connexions ouvertes / utilisées du pool d'un driver (sync ou async), par serveur et au total"""
+    servers = {}
+    # Le driver n'expose pas de métriques publiques : lecture de l'état interne du pool, au mieux
+    pool = getattr(driver, '_pool', None)
+    try:
+        for address, connections in list(pool.connections.items()):
+            servers[str(address)] = {
+                'open': len(connections),
+                'in_use': pool.in_use_connection_count(address),
+            }
+    except (AttributeError, RuntimeError):
+        servers = None
+    in_use = sum(server['in_use'] for server in servers.values()) if servers else 0
+    return {
+        'max_size': max_size,
+        'open': sum(server['open'] for server in servers.values()) if servers else 0,
+        'in_use': in_use,
+        'saturation': round(in_use / max_size, 3) if servers is not None and max_size else None,
+        'servers': servers,
+    }
+
+
+def records_to_songs(result) -> List[Dict[str, Any]]:
+    """Enregistrements {track, artists, genre, ...} -> dictionnaires de chansons à plat"""
+    songs = []
+    for record in result:
+        track = dict(record['track'])
+        for key in record.keys():
+            if key != 'track':
+                track[key] = record[key]
+        track['artists'] = track.get('artists') or []
+        songs.append(track)
+    return songs
+
+
+def record_to_song(record) -> Dict[str, Any]:
+    """Enregistrement {t, artists, album, genre} de SONG_BY_ID_QUERY -> chanson complète"""
+    track = dict(record['t'])
+    track['artists'] = record['artists']
+    track['album'] = record['album']
+    track['genre'] = record['genre']
+    return track
+
+
+# ==================== CACHE DES LECTURES ====================
+
+# Durée de vie (secondes) des résultats de chaque lecture ; les écritures du backend invalident en plus
+# les entrées concernées (INVALIDATIONS), le TTL ne couvre que les écritures faites hors de l'application
+CACHE_TTLS = {
+    'get_quick_stats': 300,
+    'get_simple_count': 300,
+    'get_genre_statistics': 600,
+    'get_artist_statistics': 600,
+    'get_genre_statistics_frame': 600,
+    'get_artist_statistics_frame': 600,
+    'get_all_genres': 3600,
+    'get_all_artists': 600,
+    'get_popular_songs': 120,
+    'get_all_songs': 120,
+    'get_songs_page': 120,
+    'get_songs_by_genre': 120,
+    'get_songs_by_artist': 120,
+    'get_track_features_frame': 300,
+    'statistics_missing': 300,
+    'search_songs': 60,
+    'get_song_by_id': 60,
+}
+
+SONG_LISTS = ('get_popular_songs', 'get_all_songs', 'get_songs_page', 'get_songs_by_genre',
+              'get_songs_by_artist', 'get_track_features_frame', 'search_songs', 'get_song_by_id')
+GENRE_STATS = ('get_genre_statistics', 'get_genre_statistics_frame')
+ARTIST_STATS = ('get_artist_statistics', 'get_artist_statistics_frame')
+
+# Écriture -> lectures dont le résultat peut changer
+INVALIDATIONS = {
+    'create_song': SONG_LISTS + GENRE_STATS + ARTIST_STATS + ('get_quick_stats', 'get_simple_count',
+                                                              'get_all_genres', 'get_all_artists'),
+    # Propriétés de la track uniquement (artistes, album et genre ne sont pas modifiables)
+    'update_song': SONG_LISTS + GENRE_STATS + ARTIST_STATS,
+    'delete_song': SONG_LISTS + GENRE_STATS + ARTIST_STATS + ('get_quick_stats', 'get_simple_count',
+                                                              'get_all_artists'),
+    'create_artist': ('get_quick_stats', 'get_all_artists'),
+    'update_artist': ('get_all_artists',),
+    'delete_artist': SONG_LISTS + ARTIST_STATS + ('get_quick_stats', 'get_all_artists'),
+}
+# Versions par lot : mêmes lectures invalidées que l'opération unitaire
+INVALIDATIONS['create_songs'] = INVALIDATIONS['create_song']
+INVALIDATIONS['update_songs'] = INVALIDATIONS['update_song']
+INVALIDATIONS['delete_songs'] = INVALIDATIONS['delete_song']
+
+
+class QueryCache:
+    """Cache LRU borné des résultats de lecture, avec une durée de vie par entrée"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (méthode, paramètres) -> (expiration, résultat)
+        self._lock = threading.Lock()  # Sessions Streamlit servies par plusieurs threads
+        self.counters = {name: Counter() for name in CACHE_TTLS}
+
+    def get(self, key: tuple):
+        """(True, résultat) si l'entrée est présente et valide, sinon (False, None)"""
+        method = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.counters[method]['expirations'] += 1
+                entry = None
+            if entry is None:
+                self.counters[method]['misses'] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.counters[method]['hits'] += 1
+            return True, entry[1]
+
+    def set(self, key: tuple, value, ttl: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self.counters[evicted[0]]['evictions'] += 1
+
+    def invalidate(self, methods) -> int:
+        """Supprime toutes les entrées des méthodes données ; renvoie le nombre d'entrées supprimées"""
+        methods = set(methods)
+        with self._lock:
+            keys = [key for key in self._entries if key[0] in methods]
+            for key in keys:
+                del self._entries[key]
+                self.counters[key[0]]['invalidations'] += 1
+        return len(keys)
+
+    def clear(self):
+        self.invalidate(CACHE_TTLS)
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs globaux et par méthode (hits, misses, evictions, expirations, invalidations)"""
+        with self._lock:
+            entries = Counter(key[0] for key in self._entries)
+            methods = {
+                name: {**counter, 'entries': entries[name]}
+                for name, counter in self.counters.items() if counter or entries[name]
+            }
+        totals = Counter()
+        for counter in self.counters.values():
+            totals.update(counter)
+        lookups = totals['hits'] + totals['misses']
+        return {
+            'entries': sum(entries.values()),
+            'max_entries': self.max_entries,
+            **{key: totals[key] for key in ('hits', 'misses', 'evictions', 'expirations', 'invalidations')},
+            'hit_ratio': round(totals['hits'] / lookups, 3) if lookups else None,
+            'methods': methods,
+        }
+
+
+class Uncached:
+    """Résultat d'une lecture cachée renvoyé tel quel sans être stocké (ex. repli CONTAINS d'une recherche)"""
+
+    def __init__(self, value):
+        self.value = value
+
+
+def cached_read(method):
+    """
+    Lecture mise en cache : clé = nom de la méthode + paramètres normalisés (valeurs par défaut incluses)
+    
+    S'applique aussi aux méthodes async (AsyncSpotifyBackend) : mêmes clés, le cache peut être partagé
+    """
+    signature = inspect.signature(method)
+    ttl = CACHE_TTLS[method.__name__]
+
+    def cache_key(args, kwargs) -> tuple:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (method.__name__,) + tuple(
+            (name, value) for name, value in bound.arguments.items() if name != 'self'
+        )
+
+    if inspect.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(self, *args, **kwargs):
+            key = cache_key((self,) + args, kwargs)
+            try:
+                found, value = self.cache.get(key)
+            except TypeError:
+                value = await method(self, *args, **kwargs)
+                return value.value if isinstance(value, Uncached) else value
+            if not found:
+                value = await method(self, *args, **kwargs)
+                if isinstance(value, Uncached):
+                    return value.value
+                self.cache.set(key, value, ttl)
+            return copy.deepcopy(value)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = cache_key((self,) + args, kwargs)
+        try:
+            found, value = self.cache.get(key)
+        except TypeError:  # Paramètre non hashable : pas de cache
+            value = method(self, *args, **kwargs)
+            return value.value if isinstance(value, Uncached) else value
+        if not found:
+            value = method(self, *args, **kwargs)
+            if isinstance(value, Uncached):
+                return value.value
+            self.cache.set(key, value, ttl)
+        # Copie : une page qui modifie le résultat ne doit pas altérer l'entrée partagée
+        return copy.deepcopy(value)
+
+    return wrapper
+
+
+def invalidates(method):
+    """Écriture : invalide les lectures listées dans INVALIDATIONS, même si l'écriture échoue en cours de route"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.cache.invalidate(INVALIDATIONS[method.__name__])
+
+    return wrapper
+
+
+# ==================== DRIVER ET POOL DE CONNEXIONS ====================
+
+# Variable .env -> (option du driver neo4j, type, défaut) ; None = défaut du driver
+POOL_SETTINGS = {
+    'NEO4J_MAX_CONNECTION_POOL_SIZE': ('max_connection_pool_size', int, 50),
+    'NEO4J_MAX_CONNECTION_LIFETIME': ('max_connection_lifetime', float, 1800),  # Sous le délai d'inactivité d'Aura
+    'NEO4J_CONNECTION_ACQUISITION_TIMEOUT': ('connection_acquisition_timeout', float, 30),
+    'NEO4J_KEEP_ALIVE': ('keep_alive', bool, True),
+    'NEO4J_LIVENESS_CHECK_TIMEOUT': ('liveness_check_timeout', float, None),
+}
+
+# Durée (secondes) pendant laquelle un test de connexion réussi reste valable
+HEALTH_CHECK_TTL = float(os.getenv('NEO4J_HEALTH_CHECK_TTL', '30'))
+
+
+def pool_config_from_env() -> Dict[str, Any]:
+    """Options du pool de connexions lues dans le .env (POOL_SETTINGS)"""
+    config = {}
+    for variable, (option, kind, default) in POOL_SETTINGS.items():
+        value = os.getenv(variable)
+        if value is None or value.strip() == '':
+            value = default
+        elif kind is bool:
+            value = value.strip().lower() in ('1', 'true', 'yes', 'on')
+        else:
+            try:
+                value = kind(value)
+            except ValueError:
+                raise ValueError(f"Valeur invalide pour {variable}: {value!r}")
+        if value is not None:
+            config[option] = value
+    return config
+
+
+# ==================== INSTRUMENTATION DES REQUÊTES ====================
+
+def query_metrics_from_env() -> QueryMetrics:
+    """Métriques des requêtes configurées par le .env ; PROFILE échantillonné sur les lectures uniquement"""
+    return QueryMetrics(
+        slow_query_ms=float(os.getenv('QUERY_SLOW_MS', '500')),
+        profile_sample_rate=float(os.getenv('QUERY_PROFILE_SAMPLE_RATE', '0')),
+        profile_methods=CACHE_TTLS,
+        window=int(os.getenv('QUERY_METRICS_WINDOW', '1000')),
+    )
+
+
+# ==================== DONNÉES DES CHANSONS ====================
+
+# Propriétés numériques / booléennes d'une Track : type et valeur par défaut
+# (mêmes conversions pour create_song, create_songs et update_songs)
+TRACK_PROPERTY_TYPES = {
+    'popularity': (int, 0),
+    'duration_ms': (int, 0),
+    'explicit': (bool, False),
+    'danceability': (float, 0.0),
+    'energy': (float, 0.0),
+    'key': (int, 0),
+    'loudness': (float, 0.0),
+    'mode': (bool, False),  # Même type que neo4j_import.py
+    'speechiness': (float, 0.0),
+    'acousticness': (float, 0.0),
+    'instrumentalness': (float, 0.0),
+    'liveness': (float, 0.0),
+    'valence': (float, 0.0),
+    'tempo': (float, 0.0),
+    'time_signature': (int, 4),
+}
+
+# Champs non modifiables par update_song / update_songs (relations)
+NON_UPDATABLE_FIELDS = ('track_id', 'artists', 'album', 'genre')
+
+
+def split_artists(artists) -> List[str]:
+    """Liste d'artistes sans doublon ; une chaîne est découpée sur ';'"""
+    artists = artists or []
+    if isinstance(artists, str):
+        artists = [artist.strip() for artist in artists.split(';') if artist.strip()]
+    # Un artiste cité deux fois n'a qu'une relation PERFORMS : il ne doit compter qu'une fois dans ses agrégats
+    return list(dict.fromkeys(artists))
+
+
+def song_params(song_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Paramètres de création d'une chanson ; ValueError / TypeError si une valeur n'est pas convertible"""
+    params = {
+        'track_id': song_data['track_id'],
+        'track_name': song_data.get('track_name', ''),
+        'album_name': song_data.get('album_name', ''),
+        'genre': song_data.get('track_genre', ''),
+        'artists': split_artists(song_data.get('artists', [])),
+    }
+    # Album identifié par (nom, artiste principal) comme à l'import
+    params['main_artist'] = params['artists'][0] if params['artists'] else "Unknown"
+    for key, (kind, default) in TRACK_PROPERTY_TYPES.items():
+        params[key] = kind(song_data.get(key, default))
+    return params
+
+
+def update_properties(updates: Dict[str, Any]) -> Dict[str, Any]:
+    """Propriétés modifiables d'une mise à jour, converties comme à la création"""
+    properties = {}
+    for key, value in updates.items():
+        if key in NON_UPDATABLE_FIELDS:
+            continue
+        if key in TRACK_PROPERTY_TYPES and value is not None:
+            value = TRACK_PROPERTY_TYPES[key][0](value)
+        properties[key] = value
+    return properties
+
+
+CREATE_SONGS_QUERY = """
+UNWIND $rows as row
+CALL (row) {
+    MERGE (g:Genre {name: row.genre})
+    MERGE (al:Album {name: row.album_name, artist: row.main_artist})
+    CREATE (t:Track {
+        track_id: row.track_id,
+        name: row.track_name,
+        popularity: row.popularity,
+        duration_ms: row.duration_ms,
+        explicit: row.explicit,
+        danceability: row.danceability,
+        energy: row.energy,
+        key: row.key,
+        loudness: row.loudness,
+        mode: row.mode,
+        speechiness: row.speechiness,
+        acousticness: row.acousticness,
+        instrumentalness: row.instrumentalness,
+        liveness: row.liveness,
+        valence: row.valence,
+        tempo: row.tempo,
+        time_signature: row.time_signature
+    })
+    MERGE (t)-[:BELONGS_TO]->(al)
+    MERGE (t)-[:HAS_GENRE]->(g)
+    """ + GENRE_STATS_ADD + """
+    WITH t, al
+    // Sous-requête : une chanson sans artiste est tout de même créée et renvoyée
+    CALL (t, al, row) {
+        UNWIND row.artists as artist_name
+        WITH artist_name WHERE artist_name <> ""
+        MERGE (a:Artist {name: artist_name})
+        MERGE (a)-[:PERFORMS]->(t)
+        FOREACH (_ IN CASE WHEN artist_name = row.main_artist THEN [1] ELSE [] END |
+            MERGE (a)-[:CREATED]->(al)
+        )
+        """ + ARTIST_STATS_ADD + """
+    }
+    RETURN t.track_id as created_id
+}
+RETURN row.index as index, created_id
+"""
+
+UPDATE_SONGS_QUERY = """
+UNWIND $rows as row
+MATCH (t:Track {track_id: row.track_id})
+SET t += row.properties
+RETURN row.index as index, t
+"""
+
+# Mise à jour d'une propriété agrégée : contribution retirée avec les anciennes valeurs, rajoutée avec les nouvelles
+UPDATE_SONGS_WITH_STATS_QUERY = """
+UNWIND $rows as row
+MATCH (t:Track {track_id: row.track_id})
+""" + TRACK_STATS_REMOVE + """
+SET t += row.properties
+""" + TRACK_STATS_ADD + """
+RETURN row.index as index, t
+"""
+
+DELETE_SONGS_QUERY = """
+UNWIND $rows as row
+OPTIONAL MATCH (t:Track {track_id: row.track_id})
+WITH row, t, t IS NOT NULL as found
+""" + TRACK_STATS_REMOVE + """
+DETACH DELETE t
+RETURN row.index as index, found
+"""
+
+
+def batch_report(results: List[Dict[str, Any]], action: str) -> Dict[str, Any]:
+    """Résultat global d'une opération par lot : succès si tous les éléments ont réussi"""
+    succeeded = sum(1 for result in results if result['success'])
+    return {
+        'success': succeeded == len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'results': results,
+        'message': f"{succeeded}/{len(results)} chanson(s) {action}",
+    }
+
+
 class SpotifyBackend:
     """Backend pour les opérations CRUD Spotify avec Neo4j"""
     
@@ -22,27 +820,98 @@ class SpotifyBackend:
         if not all([self.uri, self.username, self.password]):
             raise ValueError("Configuration Neo4j manquante dans .env")
         
+        self.pool_config = pool_config_from_env()
         self.driver = GraphDatabase.driver(
             self.uri, 
             auth=(self.username, self.password),
-            database=self.database
+            database=self.database,
+            **self.pool_config
         )
+        self._healthy_until = 0.0
+        
+        # QUERY_CACHE_MAX_ENTRIES=0 désactive le cache des lectures
+        self.cache = QueryCache(int(os.getenv('QUERY_CACHE_MAX_ENTRIES', '512')))
+        # Toutes les requêtes passent par _fetch / _fetch_tx, qui alimentent ces métriques
+        self.metrics = query_metrics_from_env()
+        # Autres drivers du processus (ex. runner async) : nom -> fonction renvoyant leur pool_usage()
+        self.pool_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
     
     def close(self):
         if self.driver:
             self.driver.close()
     
+    def _fetch(self, method: str, query: str, params: Optional[Dict[str, Any]] = None) -> list:
+        """Exécute une requête dans une nouvelle session et renvoie ses enregistrements (instrumentée)"""
+        with self.driver.session() as session:
+            return run_query(session, self.metrics, method, query, params)[1]
+    
+    def _fetch_tx(self, tx, method: str, query: str, params: Optional[Dict[str, Any]] = None) -> list:
+        """_fetch dans une transaction gérée (execute_write)"""
+        return run_query(tx, self.metrics, method, query, params)[1]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Compteurs du cache des lectures (taux de hits à vérifier sous trafic réel)"""
+        return self.cache.stats()
+    
+    def clear_cache(self):
+        self.cache.clear()
+    
+    def query_stats(self) -> Dict[str, Any]:
+        """Latences (moyenne, p50/p95/p99), lignes et erreurs par méthode du backend"""
+        return self.metrics.stats()
+    
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Dernières requêtes au-delà de QUERY_SLOW_MS (méthode, durées, forme des paramètres, requête)"""
+        return self.metrics.slow_queries(limit)
+    
+    def query_profiles(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Derniers plans PROFILE échantillonnés (QUERY_PROFILE_SAMPLE_RATE) avec leurs db hits"""
+        return self.metrics.profiles(limit)
+    
+    def ensure_fulltext_indexes(self):
+        """Crée les index full-text manquants (peuplés en arrière-plan par Neo4j)"""
+        with self.driver.session() as session:
+            for index_name, (label, prop) in FULLTEXT_INDEXES.items():
+                run_query(session, self.metrics, 'ensure_fulltext_indexes',
+                          f"CREATE FULLTEXT INDEX {index_name} IF NOT EXISTS FOR (n:{label}) ON EACH [n.{prop}]")
+    
     def test_connection(self) -> bool:
         """Test la connexion à Neo4j"""
         try:
-            with self.driver.session() as session:
-                session.run("RETURN 1")
-                return True
+            self._fetch('test_connection', "RETURN 1")
+            return True
         except Exception:
             return False
     
+    def is_healthy(self) -> bool:
+        """test_connection() mis en cache HEALTH_CHECK_TTL secondes ; un échec est re-testé à l'appel suivant"""
+        if time.monotonic() < self._healthy_until:
+            return True
+        healthy = self.test_connection()
+        self._healthy_until = time.monotonic() + HEALTH_CHECK_TTL if healthy else 0.0
+        return healthy
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Connexions ouvertes / utilisées des pools de chaque driver du processus (synchrone et ceux de
+        pool_sources, ex. runner async), par serveur et au total ; saturation = celle du pool le plus chargé
+        """
+        drivers = {'sync': pool_usage(self.driver, self.pool_config.get('max_connection_pool_size'))}
+        for name, source in list(self.pool_sources.items()):
+            drivers[name] = source()
+        saturations = [driver['saturation'] for driver in drivers.values() if driver['saturation'] is not None]
+        return {
+            'max_size': sum(driver['max_size'] or 0 for driver in drivers.values()),
+            'open': sum(driver['open'] for driver in drivers.values()),
+            'in_use': sum(driver['in_use'] for driver in drivers.values()),
+            'saturation': max(saturations) if saturations else None,
+            'drivers': drivers,
+            'config': dict(self.pool_config),
+        }
+    
     # ==================== CREATE OPERATIONS ====================
     
+    @invalidates
     def create_song(self, song_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Crée une nouvelle chanson avec toutes ses relations
@@ -62,8 +931,8 @@ class SpotifyBackend:
             // Créer ou récupérer le genre
             MERGE (g:Genre {name: $genre})
             
-            // Créer ou récupérer l'album
-            MERGE (al:Album {name: $album_name})
+            // Créer ou récupérer l'album (nom + artiste principal, comme à l'import)
+            MERGE (al:Album {name: $album_name, artist: $main_artist})
             
             // Créer la nouvelle track
             CREATE (t:Track {
@@ -89,6 +958,7 @@ class SpotifyBackend:
             // Créer les relations
             MERGE (t)-[:BELONGS_TO]->(al)
             MERGE (t)-[:HAS_GENRE]->(g)
+            """ + GENRE_STATS_ADD + """
             
             // Traiter les artistes
             WITH t, al, g, $artists as artists_list
@@ -96,41 +966,18 @@ class SpotifyBackend:
             WITH t, al, g, artist_name WHERE artist_name <> ""
             MERGE (a:Artist {name: artist_name})
             MERGE (a)-[:PERFORMS]->(t)
-            MERGE (a)-[:CREATED]->(al)
+            FOREACH (_ IN CASE WHEN artist_name = $main_artist THEN [1] ELSE [] END |
+                MERGE (a)-[:CREATED]->(al)
+            )
+            """ + ARTIST_STATS_ADD + """
             
             RETURN t.track_id as created_id
             """
             
             # Nettoyer et valider les données
-            artists_list = song_data.get('artists', [])
-            if isinstance(artists_list, str):
-                artists_list = [artist.strip() for artist in artists_list.split(';') if artist.strip()]
+            params = song_params(song_data)
             
-            params = {
-                'track_id': song_data['track_id'],
-                'track_name': song_data.get('track_name', ''),
-                'album_name': song_data.get('album_name', ''),
-                'genre': song_data.get('track_genre', ''),
-                'artists': artists_list,
-                'popularity': int(song_data.get('popularity', 0)),
-                'duration_ms': int(song_data.get('duration_ms', 0)),
-                'explicit': bool(song_data.get('explicit', False)),
-                'danceability': float(song_data.get('danceability', 0.0)),
-                'energy': float(song_data.get('energy', 0.0)),
-                'key': int(song_data.get('key', 0)),
-                'loudness': float(song_data.get('loudness', 0.0)),
-                'mode': int(song_data.get('mode', 0)),
-                'speechiness': float(song_data.get('speechiness', 0.0)),
-                'acousticness': float(song_data.get('acousticness', 0.0)),
-                'instrumentalness': float(song_data.get('instrumentalness', 0.0)),
-                'liveness': float(song_data.get('liveness', 0.0)),
-                'valence': float(song_data.get('valence', 0.0)),
-                'tempo': float(song_data.get('tempo', 0.0)),
-                'time_signature': int(song_data.get('time_signature', 4))
-            }
-            
-            result = session.run(query, **params)
-            record = result.single()
+            record = run_query(session, self.metrics, 'create_song', query, params)[1][0]
             
             return {
                 'success': True,
@@ -138,6 +985,7 @@ class SpotifyBackend:
                 'message': f"Chanson '{song_data.get('track_name')}' créée avec succès"
             }
     
+    @invalidates
     def create_artist(self, name: str, followers: Optional[int] = None) -> Dict[str, Any]:
         """Crée un nouvel artiste"""
         with self.driver.session() as session:
@@ -147,8 +995,9 @@ class SpotifyBackend:
             ON MATCH SET a.followers = COALESCE($followers, a.followers)
             RETURN a
             """
-            result = session.run(query, name=name, followers=followers)
-            record = result.single()
+            records = run_query(session, self.metrics, 'create_artist', query,
+                                {'name': name, 'followers': followers})[1]
+            record = records[0] if records else None
             
             if record:
                 return {
@@ -168,8 +1017,9 @@ class SpotifyBackend:
             ON MATCH SET al.release_date = COALESCE($release_date, al.release_date)
             RETURN al
             """
-            result = session.run(query, name=name, release_date=release_date)
-            record = result.single()
+            records = run_query(session, self.metrics, 'create_album', query,
+                                {'name': name, 'release_date': release_date})[1]
+            record = records[0] if records else None
             
             if record:
                 return {
@@ -182,13 +1032,18 @@ class SpotifyBackend:
     
     # ==================== READ OPERATIONS ====================
     
-    def search_songs(self, search_term: str, limit: int = 20) -> List[Dict[str, Any]]:
+    @cached_read
+    def search_songs(self, search_term: str, limit: int = 20, mode: str = 'fulltext',
+                     relevance_weight: float = 0.7) -> List[Dict[str, Any]]:
         """
-        Recherche des chansons par nom, artiste ou album - Version optimisée mémoire
+        Recherche des chansons par nom, artiste, album ou genre
         
         Args:
             search_term: Terme de recherche
             limit: Nombre maximum de résultats (max 25 pour éviter problèmes mémoire)
+            mode: 'fulltext' (index Lucene, classement pertinence + popularité)
+                  ou 'contains' (ancien scan CONTAINS sur le nom des tracks)
+            relevance_weight: Part de la pertinence dans le classement full-text (le reste = popularité)
         
         Returns:
             Liste des chansons trouvées avec leurs détails
@@ -196,224 +1051,128 @@ class SpotifyBackend:
         # Vérification de sécurité
         if not search_term or len(search_term.strip()) < 1:
             return []
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Mode de recherche inconnu: {mode}")
         
         search_term = search_term.strip()
         
         # Forcer une limite basse pour éviter les problèmes de mémoire
         safe_limit = min(limit, 25)
         
-        with self.driver.session() as session:
-            # Version ultra-simple pour debug
-            cypher_query = """
-            MATCH (t:Track)
-            WHERE toLower(t.name) CONTAINS toLower($search_term)
-            
-            OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
-            OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
-            
-            WITH t, 
-                 collect(DISTINCT a.name)[..2] as artists_limited,
-                 g.name as genre
-            
-            RETURN {
-                id: t.id,
-                name: t.name,
-                popularity: t.popularity,
-                energy: t.energy,
-                danceability: t.danceability
-            } as track,
-            artists_limited as artists,
-            genre
-            ORDER BY t.popularity DESC
-            LIMIT $limit
-            """
-            
-            result = session.run(cypher_query, search_term=search_term, limit=safe_limit)
-            
-            songs = []
-            for record in result:
-                track = dict(record['track'])
-                track['artists'] = record['artists'] or []
-                track['genre'] = record['genre']
-                songs.append(track)
-            
-            return songs
+        if mode == 'fulltext':
+            query = lucene_query(search_term)
+            if not query:
+                return []
+            try:
+                return self._search_songs_fulltext(query, safe_limit, relevance_weight)
+            except ClientError as e:
+                # Requête refusée par Lucene ou index absents (base importée avant leur ajout) : CONTAINS,
+                # pas mis en cache sous mode='fulltext' (les index viennent peut-être d'être créés)
+                if 'no such' in str(e).lower():
+                    self.ensure_fulltext_indexes()
+                return Uncached(self._search_songs_contains(search_term, safe_limit))
+        
+        return self._search_songs_contains(search_term, safe_limit)
+    
+    def _search_songs_fulltext(self, query: str, limit: int, relevance_weight: float) -> List[Dict[str, Any]]:
+        """Recherche via les index full-text : tracks trouvées par leur nom, leurs artistes, leur album ou leur genre"""
+        return records_to_songs(self._fetch('search_songs', SEARCH_FULLTEXT_QUERY, {
+            'query': query, 'limit': limit, 'candidates': limit * 4, 'relevance_weight': relevance_weight,
+        }))
     
+    def _search_songs_contains(self, search_term: str, limit: int) -> List[Dict[str, Any]]:
+        """Ancienne recherche : scan de toutes les Track avec CONTAINS sur le nom"""
+        return records_to_songs(self._fetch('search_songs', SEARCH_CONTAINS_QUERY,
+                                            {'search_term': search_term, 'limit': limit}))
+    
+    @cached_read
     def get_song_by_id(self, track_id: str) -> Optional[Dict[str, Any]]:
         """Récupère une chanson par son ID avec tous ses détails"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (t:Track {track_id: $track_id})
-            OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
-            OPTIONAL MATCH (t)-[:BELONGS_TO]->(al:Album)
-            OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
-            
-            RETURN t,
-                   collect(DISTINCT a.name) as artists,
-                   al.name as album,
-                   g.name as genre
-            """
-            
-            result = session.run(query, track_id=track_id)
-            record = result.single()
-            
-            if record:
-                track = dict(record['t'])
-                track['artists'] = record['artists']
-                track['album'] = record['album']
-                track['genre'] = record['genre']
-                return track
-            
-            return None
+        records = self._fetch('get_song_by_id', SONG_BY_ID_QUERY, {'track_id': track_id})
+        return record_to_song(records[0]) if records else None
     
+    @cached_read
     def get_all_songs(self, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
-        """Récupère toutes les chansons avec pagination - Version optimisée mémoire"""
-        # Forcer des limites très basses pour éviter les problèmes de mémoire
-        safe_limit = min(limit, 20)  # Max 20 chansons à la fois
+        """Récupère toutes les chansons avec pagination SKIP/LIMIT (voir get_songs_page pour les pages profondes)"""
+        safe_limit = max(1, min(limit, 100))
+        return records_to_songs(self._fetch('get_all_songs', ALL_SONGS_QUERY,
+                                            {'limit': safe_limit, 'offset': offset}))
+    
+    @cached_read
+    def get_songs_page(self, page_size: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Page de chansons par popularité décroissante, paginée par curseur (keyset)
         
-        with self.driver.session() as session:
-            query = """
-            MATCH (t:Track)
-            OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
-            OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
-            
-            WITH t, 
-                 collect(DISTINCT a.name)[..2] as artists_limited,  // Max 2 artistes
-                 g.name as genre
-            
-            RETURN {
-                id: t.id,
-                name: t.name,
-                popularity: t.popularity,
-                energy: t.energy,
-                danceability: t.danceability
-            } as track,
-            artists_limited as artists,
-            genre
-            ORDER BY t.popularity DESC
-            SKIP $offset
-            LIMIT $limit
-            """
-            
-            result = session.run(query, limit=safe_limit, offset=offset)
-            
-            songs = []
-            for record in result:
-                track = dict(record['track'])
-                track['artists'] = record['artists'] or []
-                track['genre'] = record['genre']
-                songs.append(track)
-            
-            return songs
+        Chaque page reprend l'index track_popularity_id juste après la dernière chanson de la page
+        précédente : le coût ne dépend pas de la profondeur, contrairement à SKIP
+        
+        Args:
+            page_size: Nombre de chansons par page (max 100)
+            cursor: Curseur renvoyé par la page précédente (None pour la première page)
+        
+        Returns:
+            {'songs': [...], 'next_cursor': curseur de la page suivante ou None si dernière page}
+        """
+        safe_limit = max(1, min(page_size, 100))
+        
+        if cursor is None:
+            query = SONGS_PAGE_QUERY.replace('{where}', SONGS_FIRST_PAGE_WHERE)
+            params = {}
+        else:
+            popularity, track_id = decode_cursor(cursor)
+            query = SONGS_PAGE_QUERY.replace('{where}', SONGS_NEXT_PAGE_WHERE)
+            params = {'popularity': popularity, 'track_id': track_id}
+        
+        songs = records_to_songs(self._fetch('get_songs_page', query, {'limit': safe_limit, **params}))
+        
+        next_cursor = None
+        if len(songs) == safe_limit:
+            last = songs[-1]
+            next_cursor = encode_cursor(last['popularity'], last['id'])
+        
+        return {'songs': songs, 'next_cursor': next_cursor}
     
+    @cached_read
     def get_songs_by_genre(self, genre: str, limit: int = 50) -> List[Dict[str, Any]]:
-        """Récupère les chansons d'un genre spécifique - Version optimisée mémoire"""
-        # Forcer une limite basse pour éviter les problèmes de mémoire
-        safe_limit = min(limit, 30)
-        
-        with self.driver.session() as session:
-            query = """
-            MATCH (g:Genre {name: $genre})<-[:HAS_GENRE]-(t:Track)
-            OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
-            
-            WITH t, collect(DISTINCT a.name)[..2] as artists_limited, g.name as genre
-            
-            RETURN {
-                id: t.id,
-                name: t.name,
-                popularity: t.popularity,
-                energy: t.energy,
-                danceability: t.danceability
-            } as track,
-            artists_limited as artists,
-            genre
-            ORDER BY t.popularity DESC
-            LIMIT $limit
-            """
-            
-            result = session.run(query, genre=genre, limit=safe_limit)
-            
-            songs = []
-            for record in result:
-                track = dict(record['track'])
-                track['artists'] = record['artists'] or []
-                track['genre'] = record['genre']
-                songs.append(track)
-            
-            return songs
+        """Récupère les chansons les plus populaires d'un genre"""
+        safe_limit = max(1, min(limit, 100))
+        return records_to_songs(self._fetch('get_songs_by_genre', SONGS_BY_GENRE_QUERY,
+                                            {'genre': genre, 'limit': safe_limit}))
     
+    @cached_read
     def get_songs_by_artist(self, artist_name: str, limit: int = 30) -> List[Dict[str, Any]]:
-        """Récupère les chansons d'un artiste - Version optimisée mémoire"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (a:Artist {name: $artist_name})-[:PERFORMS]->(t:Track)
-            OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
-            
-            RETURN {
-                id: t.id,
-                name: t.name,
-                popularity: t.popularity,
-                energy: t.energy,
-                danceability: t.danceability
-            } as track,
-            [a.name] as artists,
-            g.name as genre
-            ORDER BY t.popularity DESC
-            LIMIT $limit
-            """
-            
-            result = session.run(query, artist_name=artist_name, limit=limit)
-            
-            songs = []
-            for record in result:
-                track = dict(record['track'])
-                track['artists'] = record['artists']
-                track['genre'] = record['genre']
-                songs.append(track)
-            
-            return songs
+        """Récupère les chansons les plus populaires d'un artiste"""
+        return records_to_songs(self._fetch('get_songs_by_artist', SONGS_BY_ARTIST_QUERY,
+                                            {'artist_name': artist_name, 'limit': limit}))
     
+    @cached_read
     def get_all_artists(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Récupère tous les artistes"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (a:Artist)
-            OPTIONAL MATCH (a)-[:PERFORMS]->(t:Track)
-            RETURN a.name as name, 
-                   a.followers as followers,
-                   count(t) as track_count
-            ORDER BY track_count DESC, a.name
-            LIMIT $limit
-            """
-            
-            result = session.run(query, limit=limit)
-            return [dict(record) for record in result]
+        return [dict(record) for record in self._fetch('get_all_artists', ALL_ARTISTS_QUERY, {'limit': limit})]
     
+    @cached_read
     def get_all_genres(self) -> List[str]:
         """Récupère tous les genres disponibles"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (g:Genre)
-            RETURN g.name as name
-            ORDER BY g.name
-            """
-            
-            result = session.run(query)
-            return [record['name'] for record in result]
+        return [record['name'] for record in self._fetch('get_all_genres', ALL_GENRES_QUERY)]
     
     # ==================== UPDATE OPERATIONS ====================
     
+    @invalidates
     def update_song(self, track_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Met à jour une chanson existante"""
+        try:
+            # Exclure les champs spéciaux, convertir comme à la création (ex. mode booléen)
+            properties = update_properties(updates)
+        except (ValueError, TypeError) as e:
+            return {'success': False, 'message': f"Donnée invalide: {e}"}
         with self.driver.session() as session:
             # Construire la requête de mise à jour dynamiquement
             set_clauses = []
             params = {'track_id': track_id}
             
-            for key, value in updates.items():
-                if key not in ['track_id', 'artists', 'album', 'genre']:  # Exclure les champs spéciaux
-                    set_clauses.append(f"t.{key} = ${key}")
-                    params[key] = value
+            for key, value in properties.items():
+                set_clauses.append(f"t.{key} = ${key}")
+                params[key] = value
             
             if not set_clauses:
                 return {'success': False, 'message': 'Aucune mise à jour fournie'}
@@ -423,9 +1182,18 @@ class SpotifyBackend:
             SET {', '.join(set_clauses)}
             RETURN t
             """
+            if any(key in STATS_FEATURES for key in params):
+                # Agrégats des genres / artistes : ancienne contribution retirée, nouvelle ajoutée
+                query = f"""
+                MATCH (t:Track {{track_id: $track_id}})
+                {TRACK_STATS_REMOVE}
+                SET {', '.join(set_clauses)}
+                {TRACK_STATS_ADD}
+                RETURN t
+                """
             
-            result = session.run(query, **params)
-            record = result.single()
+            records = run_query(session, self.metrics, 'update_song', query, params)[1]
+            record = records[0] if records else None
             
             if record:
                 return {
@@ -436,6 +1204,7 @@ class SpotifyBackend:
             else:
                 return {'success': False, 'message': 'Chanson non trouvée'}
     
+    @invalidates
     def update_artist(self, artist_name: str, updates: Dict[str, Any]) -> Dict[str, Any]:
         """Met à jour un artiste"""
         with self.driver.session() as session:
@@ -445,10 +1214,9 @@ class SpotifyBackend:
             RETURN a
             """
             
-            result = session.run(query, 
-                               artist_name=artist_name, 
-                               followers=updates.get('followers'))
-            record = result.single()
+            records = run_query(session, self.metrics, 'update_artist', query,
+                                {'artist_name': artist_name, 'followers': updates.get('followers')})[1]
+            record = records[0] if records else None
             
             if record:
                 return {
@@ -461,17 +1229,19 @@ class SpotifyBackend:
     
     # ==================== DELETE OPERATIONS ====================
     
+    @invalidates
     def delete_song(self, track_id: str) -> Dict[str, Any]:
         """Supprime une chanson et ses relations"""
         with self.driver.session() as session:
             query = """
             MATCH (t:Track {track_id: $track_id})
+            """ + TRACK_STATS_REMOVE + """
             DETACH DELETE t
             RETURN count(t) as deleted_count
             """
             
-            result = session.run(query, track_id=track_id)
-            deleted_count = result.single()['deleted_count']
+            deleted_count = run_query(session, self.metrics, 'delete_song', query,
+                                      {'track_id': track_id})[1][0]['deleted_count']
             
             if deleted_count > 0:
                 return {
@@ -481,6 +1251,7 @@ class SpotifyBackend:
             else:
                 return {'success': False, 'message': 'Chanson non trouvée'}
     
+    @invalidates
     def delete_artist(self, artist_name: str) -> Dict[str, Any]:
         """Supprime un artiste et ses relations"""
         with self.driver.session() as session:
@@ -490,8 +1261,8 @@ class SpotifyBackend:
             RETURN count(a) as deleted_count
             """
             
-            result = session.run(query, artist_name=artist_name)
-            deleted_count = result.single()['deleted_count']
+            deleted_count = run_query(session, self.metrics, 'delete_artist', query,
+                                      {'artist_name': artist_name})[1][0]['deleted_count']
             
             if deleted_count > 0:
                 return {
@@ -501,111 +1272,245 @@ class SpotifyBackend:
             else:
                 return {'success': False, 'message': 'Artiste non trouvé'}
     
+    # ==================== BATCH OPERATIONS ====================
+    
+    @invalidates
+    def create_songs(self, songs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Crée plusieurs chansons en une seule transaction (UNWIND), mêmes règles que create_song
+        
+        Les éléments invalides (valeur non convertible, track_id déjà présent en base ou dans le lot)
+        sont rejetés individuellement, les autres sont créés ensemble.
+        
+        Returns:
+            {'success', 'succeeded', 'failed', 'message', 'results': [{'index', 'success', 'track_id', 'message'}]}
+        """
+        results = []
+        rows = []
+        seen = set()
+        for index, song_data in enumerate(songs):
+            if 'track_id' not in song_data or not song_data['track_id']:
+                song_data['track_id'] = str(uuid.uuid4())
+            result = {'index': index, 'success': False, 'track_id': song_data['track_id']}
+            results.append(result)
+            try:
+                params = song_params(song_data)
+            except (ValueError, TypeError) as e:
+                result['message'] = f"Donnée invalide: {e}"
+                continue
+            if params['track_id'] in seen:
+                result['message'] = "track_id en double dans le lot"
+                continue
+            seen.add(params['track_id'])
+            result['message'] = "Chanson non créée"
+            rows.append({**params, 'index': index})
+        
+        def create(tx):
+            existing = {
+                record['track_id'] for record in self._fetch_tx(
+                    tx, 'create_songs', "MATCH (t:Track) WHERE t.track_id IN $ids RETURN t.track_id as track_id",
+                    {'ids': [row['track_id'] for row in rows]}
+                )
+            }
+            for row in rows:
+                if row['track_id'] in existing:
+                    results[row['index']]['message'] = "Une chanson avec ce track_id existe déjà"
+            new_rows = [row for row in rows if row['track_id'] not in existing]
+            return [record['index'] for record in self._fetch_tx(tx, 'create_songs', CREATE_SONGS_QUERY,
+                                                                  {'rows': new_rows})]
+        
+        if rows:
+            with self.driver.session() as session:
+                created = session.execute_write(create)
+            for index in created:
+                results[index]['success'] = True
+                results[index]['message'] = f"Chanson '{songs[index].get('track_name')}' créée avec succès"
+        
+        return batch_report(results, 'créée(s)')
+    
+    @invalidates
+    def update_songs(self, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Met à jour plusieurs chansons en une seule transaction
+        
+        Args:
+            updates: Liste de dictionnaires {'track_id': ..., <propriété>: <valeur>, ...}
+                     (artistes, album et genre ignorés comme dans update_song)
+        
+        Returns:
+            {'success', 'succeeded', 'failed', 'message', 'results': [{'index', 'success', 'track_id', 'track', 'message'}]}
+            (un track_id présent deux fois dans le lot n'est mis à jour qu'à sa première occurrence)
+        """
+        results = []
+        rows = []
+        seen = set()
+        for index, update in enumerate(updates):
+            result = {'index': index, 'success': False, 'track_id': update.get('track_id')}
+            results.append(result)
+            try:
+                properties = update_properties(update)
+            except (ValueError, TypeError) as e:
+                result['message'] = f"Donnée invalide: {e}"
+                continue
+            if not result['track_id']:
+                result['message'] = 'track_id manquant'
+            elif not properties:
+                result['message'] = 'Aucune mise à jour fournie'
+            elif result['track_id'] in seen:
+                # Les deltas d'agrégats d'un même lot seraient appliqués deux fois
+                result['message'] = "track_id en double dans le lot"
+            else:
+                seen.add(result['track_id'])
+                result['message'] = 'Chanson non trouvée'
+                rows.append({'index': index, 'track_id': result['track_id'], 'properties': properties})
+        
+        if rows:
+            touches_stats = any(key in STATS_FEATURES for row in rows for key in row['properties'])
+            query = UPDATE_SONGS_WITH_STATS_QUERY if touches_stats else UPDATE_SONGS_QUERY
+            with self.driver.session() as session:
+                updated = session.execute_write(
+                    lambda tx: [(record['index'], dict(record['t']))
+                                for record in self._fetch_tx(tx, 'update_songs', query, {'rows': rows})]
+                )
+            for index, track in updated:
+                results[index].update({'success': True, 'track': track, 'message': 'Chanson mise à jour avec succès'})
+        
+        return batch_report(results, 'mise(s) à jour')
+    
+    @invalidates
+    def delete_songs(self, track_ids: List[str]) -> Dict[str, Any]:
+        """
+        Supprime plusieurs chansons et leurs relations en une seule transaction
+        
+        Returns:
+            {'success', 'succeeded', 'failed', 'message', 'results': [{'index', 'success', 'track_id', 'message'}]}
+        """
+        # Un track_id en double verrait ses agrégats retirés deux fois : seule la première occurrence est supprimée
+        first_index = {}
+        for index, track_id in enumerate(track_ids):
+            first_index.setdefault(track_id, index)
+        rows = [{'index': index, 'track_id': track_id} for track_id, index in first_index.items()]
+        found = {}
+        if rows:
+            with self.driver.session() as session:
+                found = session.execute_write(
+                    lambda tx: {record['index']: record['found']
+                                for record in self._fetch_tx(tx, 'delete_songs', DELETE_SONGS_QUERY, {'rows': rows})}
+                )
+        
+        results = []
+        for index, track_id in enumerate(track_ids):
+            success = bool(found.get(index))
+            if first_index[track_id] != index:
+                message = "track_id en double dans le lot"
+            else:
+                message = 'Chanson supprimée avec succès' if success else 'Chanson non trouvée'
+            results.append({'index': index, 'success': success, 'track_id': track_id, 'message': message})
+        return batch_report(results, 'supprimée(s)')
+    
+    # ==================== STATISTICS AGGREGATES ====================
+    
+    @cached_read
+    def statistics_missing(self) -> Dict[str, int]:
+        """
+        Nombre de genres / artistes sans agrégats (base importée avant leur ajout ou via neo4j-admin)
+        
+        Aucun recalcul ici : il parcourt toutes les tracks, il se lance avec script/rebuild_statistics.py
+        """
+        records = self._fetch('statistics_missing', STATISTICS_MISSING_QUERY)
+        return dict(records[0])  # Une seule ligne : {genres, artists}
+    
     # ==================== ANALYTICS OPERATIONS ====================
     
+    @cached_read
     def get_genre_statistics(self) -> List[Dict[str, Any]]:
-        """Statistiques par genre (requête GROUP BY) - Version optimisée mémoire"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (g:Genre)<-[:HAS_GENRE]-(t:Track)
-            WITH g.name as genre, t
-            RETURN genre,
-                   count(t) as track_count,
-                   round(avg(t.popularity), 2) as avg_popularity,
-                   round(avg(t.energy), 2) as avg_energy,
-                   round(avg(t.danceability), 2) as avg_danceability
-            ORDER BY track_count DESC
-            LIMIT 15
-            """
-            
-            result = session.run(query)
-            return [dict(record) for record in result]
+        """Statistiques par genre, lues dans les agrégats des noeuds Genre (sans parcourir les tracks)"""
+        return [dict(record) for record in self._fetch('get_genre_statistics', GENRE_STATISTICS_QUERY)]
     
+    @cached_read
     def get_artist_statistics(self) -> List[Dict[str, Any]]:
-        """Statistiques par artiste - Version optimisée mémoire"""
-        with self.driver.session() as session:
-            query = """
-            MATCH (a:Artist)-[:PERFORMS]->(t:Track)
-            WITH a, count(t) as track_count, avg(t.popularity) as avg_popularity
-            WHERE track_count >= 2
-            RETURN a.name as artist,
-                   track_count,
-                   round(avg_popularity, 2) as avg_popularity
-            ORDER BY track_count DESC
-            LIMIT 20
-            """
-            
-            result = session.run(query)
-            return [dict(record) for record in result]
+        """Statistiques par artiste, lues dans les agrégats des noeuds Artist"""
+        return [dict(record) for record in self._fetch('get_artist_statistics', ARTIST_STATISTICS_QUERY)]
     
+    @cached_read
     def get_popular_songs(self, limit: int = 20) -> List[Dict[str, Any]]:
-        """Récupère les chansons les plus populaires - Version optimisée mémoire"""
-        with self.driver.session() as session:
-            # Requête optimisée pour éviter les problèmes de mémoire
-            query = """
-            MATCH (t:Track)
-            OPTIONAL MATCH (a:Artist)-[:PERFORMS]->(t)
-            OPTIONAL MATCH (t)-[:HAS_GENRE]->(g:Genre)
-            
-            WITH t, 
-                 collect(DISTINCT a.name)[..2] as artists_limited,  // Limiter à 2 artistes
-                 g.name as genre
-            
-            RETURN {
-                id: t.id,
-                name: t.name,
-                popularity: t.popularity,
-                energy: t.energy,
-                danceability: t.danceability,
-                valence: t.valence
-            } as track,
-            artists_limited as artists,
-            genre
-            ORDER BY t.popularity DESC
-            LIMIT $limit
-            """
-            
-            result = session.run(query, limit=limit)
-            
-            songs = []
-            for record in result:
-                track = dict(record['track'])
-                track['artists'] = record['artists'] or []
-                track['genre'] = record['genre']
-                songs.append(track)
-            
-            return songs
+        """Récupère les chansons les plus populaires (parcours de l'index track_popularity_id)"""
+        return records_to_songs(self._fetch('get_popular_songs', POPULAR_SONGS_QUERY, {'limit': limit}))
         
+    @cached_read
     def get_quick_stats(self) -> Dict[str, Any]:
         """Statistiques rapides avec requêtes optimisées pour éviter les problèmes de mémoire"""
-        with self.driver.session() as session:
-            query = """
-            CALL () {
-                MATCH (t:Track) RETURN count(t) as total_tracks
-            }
-            CALL () {
-                MATCH (g:Genre) RETURN count(g) as total_genres
-            }
-            CALL () {
-                MATCH (a:Artist) RETURN count(a) as total_artists
-            }
-            RETURN total_tracks, total_genres, total_artists
-            """
-            
-            result = session.run(query)
-            record = result.single()
-            if record:
-                return {
-                    'total_tracks': record['total_tracks'],
-                    'total_genres': record['total_genres'],
-                    'total_artists': record['total_artists']
-                }
-            return {}
+        records = self._fetch('get_quick_stats', QUICK_STATS_QUERY)
+        return dict(records[0]) if records else {}
     
+    @cached_read
     def get_simple_count(self) -> int:
         """Compte simple des chansons"""
+        records = self._fetch('get_simple_count', SIMPLE_COUNT_QUERY)
+        return records[0]['count'] if records else 0
+    
+    # ==================== COLUMNAR READS ====================
+    
+    def fetch_frame(self, query: str, format: str = 'pandas', **params):
+        """Résultat d'une requête en colonnes typées : DataFrame pandas ou Table Arrow (format='arrow')"""
+        return self._fetch_frame('fetch_frame', query, format, params)
+    
+    def _fetch_frame(self, method: str, query: str, format: str, params: Optional[Dict[str, Any]] = None):
         with self.driver.session() as session:
-            query = "MATCH (t:Track) RETURN count(t) as count"
-            result = session.run(query)
-            record = result.single()
-            return record['count'] if record else 0
\ No newline at end of file
+            keys, records = run_query(session, self.metrics, method, query, params)
+        return records_to_frame(keys, records, format)
+    
+    @cached_read
+    def get_genre_statistics_frame(self, format: str = 'pandas'):
+        """get_genre_statistics() en colonnes"""
+        return self._fetch_frame('get_genre_statistics_frame', GENRE_STATISTICS_QUERY, format)
+    
+    @cached_read
+    def get_artist_statistics_frame(self, format: str = 'pandas'):
+        """get_artist_statistics() en colonnes"""
+        return self._fetch_frame('get_artist_statistics_frame', ARTIST_STATISTICS_QUERY, format)
+    
+    @cached_read
+    def get_track_features_frame(self, limit: int = 1000, format: str = 'pandas'):
+        """Propriétés (popularité, caractéristiques audio) des `limit` tracks les plus populaires, une colonne par propriété"""
+        return self._fetch_frame('get_track_features_frame', TRACK_FEATURES_QUERY, format, {'limit': limit})
+
+
+# ==================== REGISTRE DU PROCESSUS ====================
+
+_backend: Optional[SpotifyBackend] = None
+_backend_lock = threading.Lock()
+_reset_hooks: List[Callable[[], None]] = []
+
+
+def get_backend() -> SpotifyBackend:
+    """Backend unique du processus : un seul driver (et un seul pool) partagé par toutes les pages et sessions"""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = SpotifyBackend()
+            atexit.register(_backend.close)
+        return _backend
+
+
+def reset_backend():
+    """
+    Ferme le backend partagé ; le prochain get_backend() en recrée un (ex. après modification du .env)
+    
+    Les fermetures enregistrées par on_backend_reset suivent (ex. runner async qui partage son cache
+    et ses métriques), hors du verrou : elles peuvent rappeler get_backend()
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            atexit.unregister(_backend.close)
+            _backend.close()
+            _backend = None
+    for hook in list(_reset_hooks):
+        hook()
+
+
+def on_backend_reset(hook: Callable[[], None]) -> Callable[[], None]:
+    """Enregistre une fonction appelée à chaque reset_backend() ; utilisable en décorateur"""
+    _reset_hooks.append(hook)
+    return hook
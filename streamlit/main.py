@@ -4,7 +4,9 @@ from pathlib import Path
 
 # Ajouter le chemin du backend
 sys.path.append(str(Path(__file__).parent))
-from backend import SpotifyBackend
+from backend import get_backend
+from async_backend import gather_reads, result_or_raise
+from metrics_exporter import start_metrics_exporter
 
 # Configuration de la page
 st.set_page_config(
@@ -17,14 +19,9 @@ st.set_page_config(
 st.title("🎵 Spotify Neo4j Dashboard")
 st.markdown("### Gestion et analyse de données musicales avec Neo4j")
 
-# Test de connexion
-@st.cache_resource
-def get_backend():
-    return SpotifyBackend()
-
 try:
     backend = get_backend()
-    connection_status = backend.test_connection()
+    connection_status = backend.is_healthy()
     
     if connection_status:
         st.success("✅ Connexion à Neo4j Aura réussie")
@@ -32,11 +29,21 @@ try:
         st.error("❌ Erreur de connexion à Neo4j Aura")
         st.info("Vérifiez votre fichier .env et votre connexion internet")
         st.stop()
+    
+    # Métriques Prometheus sur un port local (une seule fois par processus)
+    start_metrics_exporter(backend)
         
 except Exception as e:
     st.error(f"❌ Erreur d'initialisation: {e}")
     st.stop()
 
+# Lectures indépendantes de la page, lancées en parallèle (chaque bloc gère ensuite sa propre erreur)
+page_reads = gather_reads(
+    return_exceptions=True,
+    quick_stats=lambda b: b.get_quick_stats(),
+    popular_songs=lambda b: b.get_popular_songs(limit=5),
+)
+
 # Sidebar avec navigation
 st.sidebar.markdown("---")
 
@@ -44,7 +51,7 @@ st.sidebar.markdown("---")
 try:
     with st.sidebar.expander("📊 Statistiques rapides", expanded=True):
         # Utiliser une requête plus légère pour les statistiques de base
-        quick_stats = backend.get_quick_stats()
+        quick_stats = result_or_raise(page_reads['quick_stats'])
         
         if quick_stats:
             st.metric("Chansons", f"{quick_stats.get('total_tracks', 0):,}")
@@ -59,6 +66,23 @@ except Exception as e:
     else:
         st.sidebar.error("Erreur statistiques")
 
+# Efficacité du cache des lectures (partagé par toutes les sessions du processus)
+with st.sidebar.expander("⚡ Cache des requêtes", expanded=False):
+    cache_stats = backend.cache_stats()
+    hit_ratio = cache_stats['hit_ratio']
+    st.metric("Taux de hits", f"{hit_ratio:.0%}" if hit_ratio is not None else "N/A")
+    st.caption(f"{cache_stats['hits']:,} hits, {cache_stats['misses']:,} misses, "
+               f"{cache_stats['evictions']:,} évictions, {cache_stats['invalidations']:,} invalidations "
+               f"({cache_stats['entries']}/{cache_stats['max_entries']} entrées)")
+
+# Pool de connexions du driver unique (partagé par toutes les pages)
+with st.sidebar.expander("🔌 Pool de connexions", expanded=False):
+    pool_stats = backend.pool_stats()
+    saturation = pool_stats['saturation']
+    st.metric("Saturation", f"{saturation:.0%}" if saturation is not None else "N/A")
+    st.caption(f"{pool_stats['in_use']} utilisée(s), {pool_stats['open']} ouverte(s), "
+               f"max {pool_stats['max_size']}")
+
 st.sidebar.markdown("---")
 
 # Navigation principale
@@ -77,6 +101,9 @@ with col2:
 if st.sidebar.button("📊 Analytics", use_container_width=True):
     st.switch_page("pages/analytics.py")
 
+if st.sidebar.button("⏱️ Performance", use_container_width=True):
+    st.switch_page("pages/performance.py")
+
 st.sidebar.markdown("---")
 
 # Contenu principal
@@ -122,7 +149,7 @@ st.subheader("📋 Aperçu des données récentes")
 try:
     with st.spinner("Chargement des données..."):
         # Récupérer moins de chansons pour éviter les problèmes de mémoire
-        popular_songs = backend.get_popular_songs(limit=5)
+        popular_songs = result_or_raise(page_reads['popular_songs'])
         
     if popular_songs:
         import pandas as pd
@@ -0,0 +1,234 @@
+"""
+Export des métriques de l'application au format texte Prometheus, sur un port local
+
+Latences par méthode du backend (QueryMetrics), pool de connexions, cache des lectures
+et débit du dernier import (télémétrie NDJSON de neo4j_import.py)
+"""
+
+import atexit
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from backend import SpotifyBackend
+
+# Télémétrie écrite par neo4j_import.py (défaut : <csv>.telemetry.ndjson), relative au dossier streamlit
+IMPORT_TELEMETRY_PATH = os.getenv('IMPORT_TELEMETRY_PATH', '../data/dataset.csv.telemetry.ndjson')
+
+CACHE_COUNTERS = ('hits', 'misses', 'evictions', 'expirations', 'invalidations')
+
+
+def last_import_run(path: str = IMPORT_TELEMETRY_PATH) -> Optional[Dict[str, Any]]:
+    """Dernier événement 'run' de la télémétrie d'import (lignes, durée, phases), None si aucun"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = f.readlines()
+    except OSError:
+        return None
+    for line in reversed(lines):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get('event') == 'run':
+            return event
+    return None
+
+
+def import_throughput(run: Dict[str, Any]) -> Dict[str, Any]:
+    """Débit global et par requête UNWIND d'un run d'import"""
+    elapsed = run.get('elapsed_s') or 0
+    return {
+        'run': run.get('run'),
+        'time': run.get('time'),
+        'rows': run.get('rows', 0),
+        'elapsed_s': elapsed,
+        'rows_per_s': round(run.get('rows', 0) / elapsed) if elapsed else None,
+        'phases': {
+            key: {
+                'rows': phase['rows'],
+                'wall_s': phase['wall_s'],
+                'rows_per_s': round(phase['rows'] / phase['wall_s']) if phase['wall_s'] else None,
+            }
+            for key, phase in run.get('phases', {}).items()
+        },
+    }
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _sample(name: str, value, **labels) -> str:
+    label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    if value is None:
+        value = 'NaN'
+    elif value == float('inf'):
+        value = '+Inf'
+    return f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}"
+
+
+class _Family:
+    """Une famille de métriques : en-têtes HELP / TYPE puis ses échantillons"""
+
+    def __init__(self, lines: List[str], name: str, kind: str, help_text: str):
+        self.lines = lines
+        self.name = name
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def add(self, value, suffix: str = '', **labels):
+        self.lines.append(_sample(self.name + suffix, value, **labels))
+
+
+def render_prometheus(backend: SpotifyBackend, import_path: Optional[str] = IMPORT_TELEMETRY_PATH) -> str:
+    """Toutes les métriques au format texte Prometheus (version 0.0.4)"""
+    lines: List[str] = []
+
+    # Latences des requêtes : histogramme complet + percentiles et maximum de la fenêtre récente
+    histograms = backend.metrics.histograms()
+    query_stats = backend.query_stats()['methods']
+    family = _Family(lines, 'spotify_backend_query_duration_seconds', 'histogram',
+                     "Durée client des requêtes Neo4j par méthode du backend")
+    for method, histogram in histograms.items():
+        for bound, count in histogram['buckets']:
+            family.add(count, '_bucket', method=method, le='+Inf' if bound == float('inf') else bound / 1000)
+        family.add(histogram['sum_ms'] / 1000, '_sum', method=method)
+        family.add(histogram['count'], '_count', method=method)
+
+    family = _Family(lines, 'spotify_backend_query_recent_seconds', 'gauge',
+                     "Percentiles de la durée des dernières requêtes (fenêtre QUERY_METRICS_WINDOW)")
+    for method, stats in query_stats.items():
+        for stat in ('p50', 'p95', 'p99', 'max'):
+            value = stats[f"{stat}_ms"]
+            family.add(value / 1000 if value is not None else None, method=method, stat=stat)
+
+    family = _Family(lines, 'spotify_backend_query_server_seconds', 'gauge',
+                     "Temps serveur moyen (available = premier résultat, consumed = lecture complète)")
+    for method, stats in query_stats.items():
+        for phase in ('available', 'consumed'):
+            value = stats[f"server_{phase}_ms"]
+            family.add(value / 1000 if value is not None else None, method=method, phase=phase)
+
+    family = _Family(lines, 'spotify_backend_query_rows_total', 'counter', "Lignes renvoyées par méthode")
+    for method, stats in query_stats.items():
+        family.add(stats['rows'], method=method)
+
+    family = _Family(lines, 'spotify_backend_query_errors_total', 'counter', "Requêtes en erreur par méthode et erreur")
+    for method, stats in query_stats.items():
+        for error, count in stats['error_names'].items():
+            family.add(count, method=method, error=error)
+
+    # Pools de connexions des drivers partagés (synchrone et async)
+    drivers = backend.pool_stats()['drivers']
+    family = _Family(lines, 'spotify_neo4j_pool_connections', 'gauge', "Connexions du pool du driver")
+    for name, pool in drivers.items():
+        family.add(pool['in_use'], driver=name, state='in_use')
+        family.add(pool['open'], driver=name, state='open')
+    family = _Family(lines, 'spotify_neo4j_pool_max_size', 'gauge', "Taille maximale du pool")
+    for name, pool in drivers.items():
+        family.add(pool['max_size'], driver=name)
+    family = _Family(lines, 'spotify_neo4j_pool_saturation', 'gauge', "Connexions utilisées / taille maximale")
+    for name, pool in drivers.items():
+        family.add(pool['saturation'], driver=name)
+
+    # Cache des lectures
+    cache = backend.cache_stats()
+    for counter in CACHE_COUNTERS:
+        family = _Family(lines, f'spotify_query_cache_{counter}_total', 'counter', f"Cache des lectures : {counter}")
+        for method, stats in cache['methods'].items():
+            family.add(stats.get(counter, 0), method=method)
+    _Family(lines, 'spotify_query_cache_entries', 'gauge', "Entrées du cache des lectures").add(cache['entries'])
+    _Family(lines, 'spotify_query_cache_hit_ratio', 'gauge', "Hits / (hits + misses)").add(cache['hit_ratio'])
+
+    # Dernier import
+    run = last_import_run(import_path) if import_path else None
+    if run is not None:
+        throughput = import_throughput(run)
+        _Family(lines, 'spotify_import_rows', 'gauge', "Lignes du dernier import").add(throughput['rows'])
+        _Family(lines, 'spotify_import_duration_seconds', 'gauge',
+                "Durée du dernier import").add(throughput['elapsed_s'])
+        _Family(lines, 'spotify_import_rows_per_second', 'gauge',
+                "Débit du dernier import").add(throughput['rows_per_s'])
+        family = _Family(lines, 'spotify_import_phase_rows_per_second', 'gauge',
+                         "Débit du dernier import par requête UNWIND")
+        for key, phase in throughput['phases'].items():
+            family.add(phase['rows_per_s'], phase=key)
+
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsExporter:
+    """Serveur HTTP (thread démon) exposant render_prometheus() sur /metrics"""
+
+    def __init__(self, backend: SpotifyBackend, host: str = '127.0.0.1', port: int = 9464):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = render_prometheus(exporter.backend).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # Pas de log par scrape
+                pass
+
+        self.backend = backend
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}/metrics"
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-exporter', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+# ==================== REGISTRE DU PROCESSUS ====================
+
+_exporter: Optional[MetricsExporter] = None
+_exporter_error: Optional[str] = None
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_exporter(backend: SpotifyBackend) -> Optional[MetricsExporter]:
+    """
+    Exporteur unique du processus (METRICS_EXPORTER_HOST / METRICS_EXPORTER_PORT, port vide ou 0 = désactivé)
+
+    Returns:
+        L'exporteur, ou None s'il est désactivé ou si le port est indisponible (voir exporter_status())
+    """
+    global _exporter, _exporter_error
+    with _exporter_lock:
+        if _exporter is not None or _exporter_error is not None:
+            return _exporter
+        port = os.getenv('METRICS_EXPORTER_PORT', '9464').strip()
+        if not port or port == '0':
+            _exporter_error = "désactivé (METRICS_EXPORTER_PORT)"
+            return None
+        try:
+            _exporter = MetricsExporter(backend, os.getenv('METRICS_EXPORTER_HOST', '127.0.0.1'), int(port))
+        except (OSError, ValueError) as e:
+            _exporter_error = str(e)
+            print(f"⚠️ Exporteur de métriques non démarré: {e}")
+            return None
+        atexit.register(_exporter.close)
+        print(f"=== Métriques Prometheus sur {_exporter.url} ===")
+        return _exporter
+
+
+def exporter_status() -> str:
+    """URL de l'exporteur, ou raison de son absence"""
+    with _exporter_lock:
+        if _exporter is not None:
+            return _exporter.url
+        return _exporter_error or "non démarré"
@@ -7,24 +7,29 @@ import plotly.graph_objects as go
 
 # Ajouter le chemin du backend
 sys.path.append(str(Path(__file__).parent))
-from backend import SpotifyBackend
+from backend import get_backend
+from async_backend import gather_reads
 
 st.title("📊 Analytics et Statistiques")
 
-# Initialiser le backend
-@st.cache_resource
-def get_backend():
-    return SpotifyBackend()
-
 try:
     backend = get_backend()
-    if not backend.test_connection():
+    if not backend.is_healthy():
         st.error("Erreur de connexion à la base de données Neo4j")
         st.stop()
 except Exception as e:
     st.error(f"Erreur d'initialisation: {e}")
     st.stop()
 
+# Base importée sans agrégats (avant leur ajout ou via neo4j-admin) : recalcul explicite, trop long pour une page
+try:
+    missing = backend.statistics_missing()
+    if missing['genres'] or missing['artists']:
+        st.warning(f"⚠️ {missing['genres']:,} genre(s) et {missing['artists']:,} artiste(s) sans agrégats : "
+                   "statistiques incomplètes. Lancer `python rebuild_statistics.py` (dossier script)")
+except Exception:
+    pass  # Vérification indicative, les analyses restent affichées
+
 # Sidebar pour sélection des analyses
 st.sidebar.header("Types d'analyses")
 analysis_type = st.sidebar.selectbox(
@@ -45,9 +50,13 @@ if analysis_type == "Vue d'ensemble":
     try:
         col1, col2, col3, col4 = st.columns(4)
         
-        # Statistiques générales
-        genre_stats = backend.get_genre_statistics()
-        artist_stats = backend.get_artist_statistics()
+        # Statistiques générales (requêtes indépendantes, lancées en parallèle)
+        overview = gather_reads(
+            genre_stats=lambda b: b.get_genre_statistics(),
+            artist_stats=lambda b: b.get_artist_statistics(),
+        )
+        genre_stats = overview['genre_stats']
+        artist_stats = overview['artist_stats']
         
         total_tracks = sum(stat['track_count'] for stat in genre_stats)
         total_genres = len(genre_stats)
@@ -107,10 +116,9 @@ elif analysis_type == "Statistiques par Genre":
     
     try:
         with st.spinner("Chargement des statistiques par genre..."):
-            genre_stats = backend.get_genre_statistics()
+            df_genres = backend.get_genre_statistics_frame()
         
-        if genre_stats:
-            df_genres = pd.DataFrame(genre_stats)
+        if not df_genres.empty:
             
             # Métriques principales
             col1, col2, col3 = st.columns(3)
@@ -196,10 +204,9 @@ elif analysis_type == "Statistiques par Artiste":
     
     try:
         with st.spinner("Chargement des statistiques par artiste..."):
-            artist_stats = backend.get_artist_statistics()
+            df_artists = backend.get_artist_statistics_frame()
         
-        if artist_stats:
-            df_artists = pd.DataFrame(artist_stats)
+        if not df_artists.empty:
             
             # Métriques
             col1, col2, col3 = st.columns(3)
@@ -284,11 +291,10 @@ elif analysis_type == "Analyse de Popularité":
     try:
         # Récupérer les chansons populaires et les statistiques
         popular_songs = backend.get_popular_songs(50)
-        genre_stats = backend.get_genre_statistics()
+        df_genres = backend.get_genre_statistics_frame()
         
-        if popular_songs and genre_stats:
+        if popular_songs and not df_genres.empty:
             df_popular = pd.DataFrame(popular_songs)
-            df_genres = pd.DataFrame(genre_stats)
             
             # Distribution de popularité
             st.subheader("Distribution de la popularité par genre")
@@ -361,10 +367,9 @@ elif analysis_type == "Caractéristiques Audio":
     
     try:
         # Utiliser un petit échantillon pour éviter les problèmes de mémoire
-        sample_songs = backend.get_popular_songs(limit=50)  # Réduire drastiquement
+        df_audio = backend.get_track_features_frame(limit=50)  # Réduire drastiquement
         
-        if sample_songs:
-            df_audio = pd.DataFrame(sample_songs)
+        if not df_audio.empty:
             
             # Sélectionner seulement les caractéristiques audio principales
             audio_features = ['danceability', 'energy', 'valence']  # Réduire le nombre
@@ -420,10 +425,9 @@ elif analysis_type == "Corrélations":
     
     try:
         # Utiliser un échantillon très réduit pour éviter les problèmes de mémoire
-        songs_data = backend.get_popular_songs(limit=30)  # Très réduit
+        df = backend.get_track_features_frame(limit=30)  # Très réduit
         
-        if songs_data:
-            df = pd.DataFrame(songs_data)
+        if not df.empty:
             
             # Sélectionner seulement les variables principales
             numeric_cols = ['popularity', 'danceability', 'energy', 'valence']
@@ -4,18 +4,13 @@ from pathlib import Path
 
 # Ajouter le chemin du backend
 sys.path.append(str(Path(__file__).parent))
-from backend import SpotifyBackend
+from backend import get_backend
 
 st.title("✏️ Modifier une chanson")
 
-# Initialiser le backend
-@st.cache_resource
-def get_backend():
-    return SpotifyBackend()
-
 try:
     backend = get_backend()
-    if not backend.test_connection():
+    if not backend.is_healthy():
         st.error("Erreur de connexion à la base de données Neo4j")
         st.stop()
 except Exception as e:
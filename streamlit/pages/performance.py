@@ -0,0 +1,190 @@
+import streamlit as st
+import sys
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+import plotly.express as px
+
+# Ajouter le chemin du backend
+sys.path.append(str(Path(__file__).parent))
+from backend import get_backend
+from metrics_exporter import exporter_status, import_throughput, last_import_run, start_metrics_exporter
+from query_metrics import LATENCY_BUCKETS_MS
+
+st.title("⏱️ Performance")
+st.markdown("Latences des requêtes, pool de connexions, cache et import : métriques du processus Streamlit")
+
+try:
+    backend = get_backend()
+    start_metrics_exporter(backend)
+except Exception as e:
+    st.error(f"Erreur d'initialisation: {e}")
+    st.stop()
+
+# Actions
+col1, col2, col3 = st.columns([1, 1, 3])
+with col1:
+    if st.button("🔄 Rafraîchir", use_container_width=True):
+        st.rerun()
+with col2:
+    if st.button("🧹 Réinitialiser", use_container_width=True, help="Remet à zéro les latences et le journal"):
+        backend.metrics.reset()
+        st.rerun()
+with col3:
+    st.caption(f"Export Prometheus : {exporter_status()}")
+
+query_stats = backend.query_stats()
+cache_stats = backend.cache_stats()
+pool_stats = backend.pool_stats()
+
+# Indicateurs globaux
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Requêtes", f"{query_stats['queries']:,}")
+with col2:
+    st.metric("Erreurs", f"{query_stats['errors']:,}")
+with col3:
+    hit_ratio = cache_stats['hit_ratio']
+    st.metric("Hits du cache", f"{hit_ratio:.0%}" if hit_ratio is not None else "N/A")
+with col4:
+    saturation = pool_stats['saturation']
+    st.metric("Saturation du pool", f"{saturation:.0%}" if saturation is not None else "N/A")
+
+st.caption(f"Depuis le {datetime.fromtimestamp(query_stats['since']).strftime('%d/%m/%Y %H:%M:%S')} - "
+           f"seuil des requêtes lentes {query_stats['slow_query_ms']:.0f} ms, "
+           f"PROFILE échantillonné {query_stats['profile_sample_rate']:.0%}")
+
+# ==================== LATENCES ====================
+st.markdown("---")
+st.subheader("📈 Latences par méthode")
+
+if query_stats['methods']:
+    df_methods = pd.DataFrame([
+        {'Méthode': method, **stats} for method, stats in query_stats['methods'].items()
+    ]).sort_values('p95_ms', ascending=False)
+
+    df_long = df_methods.melt(id_vars='Méthode', value_vars=['p50_ms', 'p95_ms', 'p99_ms'],
+                              var_name='Percentile', value_name='ms')
+    fig_latency = px.bar(df_long, x='ms', y='Méthode', color='Percentile', barmode='group', orientation='h',
+                         title="p50 / p95 / p99 (ms, dernières requêtes)")
+    fig_latency.update_layout(yaxis={'categoryorder': 'array', 'categoryarray': df_methods['Méthode'].tolist()[::-1]})
+    st.plotly_chart(fig_latency, use_container_width=True)
+
+    st.dataframe(
+        df_methods[['Méthode', 'count', 'errors', 'rows', 'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms',
+                    'server_available_ms', 'server_consumed_ms']].rename(columns={
+            'count': 'Appels', 'errors': 'Erreurs', 'rows': 'Lignes', 'mean_ms': 'Moyenne (ms)',
+            'p50_ms': 'p50 (ms)', 'p95_ms': 'p95 (ms)', 'p99_ms': 'p99 (ms)', 'max_ms': 'Max (ms)',
+            'server_available_ms': 'Serveur 1er résultat (ms)', 'server_consumed_ms': 'Serveur lecture (ms)',
+        }),
+        use_container_width=True, hide_index=True
+    )
+
+    # Histogramme complet d'une méthode (toutes les requêtes depuis le démarrage)
+    histograms = backend.metrics.histograms()
+    method = st.selectbox("Histogramme de la méthode", df_methods['Méthode'].tolist())
+    buckets = histograms[method]['buckets']
+    labels = [f"≤ {bound} ms" for bound in LATENCY_BUCKETS_MS] + [f"> {LATENCY_BUCKETS_MS[-1]} ms"]
+    counts = [count - (buckets[i - 1][1] if i else 0) for i, (_, count) in enumerate(buckets)]
+    fig_histogram = px.bar(x=labels, y=counts, labels={'x': 'Durée', 'y': 'Requêtes'},
+                           title=f"Distribution des durées - {method}")
+    st.plotly_chart(fig_histogram, use_container_width=True)
+
+    errors = [
+        {'Méthode': method, 'Erreur': error, 'Nombre': count}
+        for method, stats in query_stats['methods'].items() for error, count in stats['error_names'].items()
+    ]
+    if errors:
+        st.write("**Erreurs par méthode**")
+        st.dataframe(pd.DataFrame(errors), use_container_width=True, hide_index=True)
+else:
+    st.info("Aucune requête exécutée depuis le démarrage : ouvrez les autres pages puis rafraîchissez")
+
+# ==================== REQUÊTES LENTES ====================
+st.markdown("---")
+st.subheader("🐢 Requêtes lentes récentes")
+
+slow_queries = backend.slow_queries()
+if slow_queries:
+    df_slow = pd.DataFrame([
+        {
+            'Heure': datetime.fromtimestamp(entry['time']).strftime('%H:%M:%S'),
+            'Méthode': entry['method'],
+            'Durée (ms)': entry['wall_ms'],
+            'Serveur (ms)': (entry['server_available_ms'] or 0) + (entry['server_consumed_ms'] or 0)
+            if entry['server_available_ms'] is not None else None,
+            'Lignes': entry['rows'],
+            'Erreur': entry['error'] or '',
+            'Paramètres': ', '.join(f"{name}: {kind}" for name, kind in entry['params'].items()),
+            'Requête': entry['query'],
+        }
+        for entry in sorted(slow_queries, key=lambda entry: -entry['wall_ms'])[:20]
+    ])
+    st.dataframe(df_slow, use_container_width=True, hide_index=True)
+else:
+    st.success(f"Aucune requête au-delà de {query_stats['slow_query_ms']:.0f} ms")
+
+profiles = backend.query_profiles(10)
+if profiles:
+    with st.expander(f"🔬 Plans PROFILE échantillonnés ({len(profiles)})"):
+        for entry in profiles:
+            st.write(f"**{entry['method']}** - {entry['db_hits']:,} db hits, {entry['wall_ms']:.0f} ms, "
+                     f"{entry['rows']} ligne(s)")
+            st.caption(" → ".join(reversed(entry['operators'])))
+
+# ==================== POOL ET CACHE ====================
+st.markdown("---")
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("🔌 Pool de connexions")
+    st.write(f"• Utilisées : {pool_stats['in_use']}")
+    st.write(f"• Ouvertes : {pool_stats['open']}")
+    st.write(f"• Taille max : {pool_stats['max_size']}")
+    # Un pool par driver : synchrone (écritures, pages) et async (lectures parallèles de gather_reads)
+    servers = [
+        {'Driver': name, 'Serveur': address, 'Ouvertes': server['open'], 'Utilisées': server['in_use'],
+         'Taille max': driver['max_size']}
+        for name, driver in pool_stats['drivers'].items()
+        for address, server in (driver['servers'] or {}).items()
+    ]
+    if servers:
+        st.dataframe(pd.DataFrame(servers), use_container_width=True, hide_index=True)
+
+with col2:
+    st.subheader("⚡ Cache des lectures")
+    st.write(f"• Entrées : {cache_stats['entries']}/{cache_stats['max_entries']}")
+    st.write(f"• Hits / misses : {cache_stats['hits']:,} / {cache_stats['misses']:,}")
+    if cache_stats['methods']:
+        df_cache = pd.DataFrame([
+            {'Méthode': method, 'Hits': stats.get('hits', 0), 'Misses': stats.get('misses', 0),
+             'Entrées': stats['entries']}
+            for method, stats in cache_stats['methods'].items()
+        ])
+        lookups = df_cache['Hits'] + df_cache['Misses']
+        df_cache['Taux de hits'] = (df_cache['Hits'] / lookups.where(lookups > 0)).round(2)
+        st.dataframe(df_cache, use_container_width=True, hide_index=True)
+
+# ==================== IMPORT ====================
+st.markdown("---")
+st.subheader("⚡ Dernier import")
+
+run = last_import_run()
+if run:
+    throughput = import_throughput(run)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Lignes", f"{throughput['rows']:,}")
+    with col2:
+        st.metric("Durée", f"{throughput['elapsed_s']:.1f} s")
+    with col3:
+        st.metric("Débit", f"{throughput['rows_per_s']:,} lignes/s" if throughput['rows_per_s'] else "N/A")
+    if throughput['phases']:
+        df_phases = pd.DataFrame([
+            {'Requête': key, 'Lignes': phase['rows'], 'Durée (s)': phase['wall_s'], 'Lignes/s': phase['rows_per_s']}
+            for key, phase in throughput['phases'].items()
+        ]).sort_values('Durée (s)', ascending=False)
+        st.dataframe(df_phases, use_container_width=True, hide_index=True)
+    st.caption(f"Run du {throughput['run']}")
+else:
+    st.info("Aucune télémétrie d'import trouvée (IMPORT_TELEMETRY_PATH, écrite par script/neo4j_import.py)")
@@ -5,18 +5,13 @@ import pandas as pd
 
 # Ajouter le chemin du backend
 sys.path.append(str(Path(__file__).parent))
-from backend import SpotifyBackend
+from backend import get_backend
 
 st.title("🔍 Recherche de chansons")
 
-# Initialiser le backend
-@st.cache_resource
-def get_backend():
-    return SpotifyBackend()
-
 try:
     backend = get_backend()
-    if not backend.test_connection():
+    if not backend.is_healthy():
         st.error("Erreur de connexion à la base de données Neo4j")
         st.stop()
 except Exception as e:
@@ -37,6 +32,13 @@ if search_type == "Recherche générale":
         'Rechercher une chanson, un artiste, un album ou un genre',
         placeholder="Entrez votre recherche..."
     )
+    search_mode = st.radio(
+        "Moteur de recherche",
+        ["fulltext", "contains"],
+        format_func=lambda mode: "Index full-text (titre, artiste, album, genre)" if mode == "fulltext"
+        else "CONTAINS sur le titre (ancien)",
+        horizontal=True
+    )
     
     search_button = st.button("🔍 Rechercher", key="general_search_btn")
     
@@ -45,7 +47,7 @@ if search_type == "Recherche générale":
         with st.spinner("Recherche en cours..."):
             try:
                 # Limiter encore plus pour éviter les problèmes de mémoire
-                results = backend.search_songs(search_query, limit=15)
+                results = backend.search_songs(search_query, limit=15, mode=search_mode)
                 
                 if results:
                     st.success(f"{len(results)} résultat(s) trouvé(s)")
@@ -267,16 +269,20 @@ elif search_type == "Chansons populaires":
 
 elif search_type == "Toutes les chansons":
     st.subheader("Toutes les chansons")
-    st.warning("⚠️ Mode optimisé pour économiser la mémoire - Pagination limitée")
     
-    # Pagination très limitée
-    page_size = st.selectbox("Chansons par page", [10, 15, 20], index=1)  # Très réduit
-    page_number = st.number_input("Page", min_value=1, value=1, step=1)
-    offset = (page_number - 1) * page_size
+    page_size = st.selectbox("Chansons par page", [10, 20, 50, 100], index=1)
+    
+    # Pagination par curseur : pile des curseurs des pages visitées (None = 1ère page)
+    if st.session_state.get('songs_page_size') != page_size:
+        st.session_state.songs_page_size = page_size
+        st.session_state.songs_cursors = [None]
+    cursors = st.session_state.songs_cursors
+    page_number = len(cursors)
     
     with st.spinner("Chargement..."):
         try:
-            results = backend.get_all_songs(limit=page_size, offset=offset)
+            page = backend.get_songs_page(page_size=page_size, cursor=cursors[-1])
+            results = page['songs']
             
             if results:
                 st.success(f"{len(results)} chanson(s) sur la page {page_number}")
@@ -295,6 +301,18 @@ elif search_type == "Toutes les chansons":
                 st.dataframe(df_display, use_container_width=True, hide_index=True)
             else:
                 st.info("Aucune chanson trouvée sur cette page")
+            
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("← Précédente", disabled=page_number == 1):
+                    cursors.pop()
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {page_number}")
+            with col3:
+                if st.button("Suivante →", disabled=page['next_cursor'] is None):
+                    cursors.append(page['next_cursor'])
+                    st.rerun()
                 
         except Exception as e:
             if "MemoryPoolOutOfMemoryError" in str(e):
@@ -4,18 +4,13 @@ from pathlib import Path
 
 # Ajouter le chemin du backend
 sys.path.append(str(Path(__file__).parent))
-from backend import SpotifyBackend
+from backend import get_backend
 
 st.title("Upload a Song")
 
-# Initialiser le backend
-@st.cache_resource
-def get_backend():
-    return SpotifyBackend()
-
 try:
     backend = get_backend()
-    if not backend.test_connection():
+    if not backend.is_healthy():
         st.error("Erreur de connexion à la base de données Neo4j")
         st.stop()
 except Exception as e:
@@ -119,12 +114,11 @@ with st.form("upload_song_form"):
 if st.checkbox("Afficher les statistiques de la base"):
     try:
         with st.spinner("Chargement des statistiques..."):
-            genre_stats = backend.get_genre_statistics()
+            df_stats = backend.get_genre_statistics_frame()
             
         st.subheader("Statistiques par genre")
-        if genre_stats:
-            import pandas as pd
-            df_stats = pd.DataFrame(genre_stats[:10])  # Top 10
+        if not df_stats.empty:
+            df_stats = df_stats.head(10)  # Top 10
             st.dataframe(df_stats[['genre', 'track_count', 'avg_popularity']].round(2))
         else:
             st.info("Aucune donnée disponible")
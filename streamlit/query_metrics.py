@@ -0,0 +1,261 @@
+"""
+Instrumentation des requêtes Neo4j du backend : chaque requête passe par run_query (ou run_query_async),
+qui mesure durée client, temps serveur, nombre de lignes et erreur, et alimente QueryMetrics
+(histogrammes et percentiles par méthode, journal des requêtes lentes, plans PROFILE échantillonnés)
+"""
+
+import bisect
+import math
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Bornes (ms) des histogrammes de latence, cumulatifs comme ceux de Prometheus
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def param_shape(params: Dict[str, Any]) -> Dict[str, str]:
+    """Forme des paramètres (types et tailles des listes), jamais les valeurs"""
+    shape = {}
+    for name, value in sorted(params.items()):
+        if isinstance(value, (list, tuple)):
+            shape[name] = f"list[{len(value)}]"
+        elif isinstance(value, dict):
+            shape[name] = f"map[{len(value)}]"
+        else:
+            shape[name] = type(value).__name__
+    return shape
+
+
+def error_name(error: BaseException) -> str:
+    """Nom court de l'erreur : code Neo4j si disponible (ex. MemoryPoolOutOfMemoryError), sinon la classe"""
+    code = getattr(error, 'code', None)
+    if isinstance(code, str) and code:
+        return code.rsplit('.', 1)[-1]
+    return type(error).__name__
+
+
+def total_db_hits(plan: Dict) -> int:
+    return plan.get('dbHits', 0) + sum(total_db_hits(child) for child in plan.get('children', []))
+
+
+def plan_operators(plan: Dict) -> List[str]:
+    found = [plan.get('operatorType', '?').split('@')[0]]
+    for child in plan.get('children', []):
+        found.extend(plan_operators(child))
+    return found
+
+
+def percentile(sorted_values: List[float], fraction: float) -> Optional[float]:
+    """Percentile au rang le plus proche d'une liste triée"""
+    if not sorted_values:
+        return None
+    rank = min(max(1, math.ceil(fraction * len(sorted_values))), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def compact_query(query: str, max_length: int = 300) -> str:
+    query = ' '.join(query.split())
+    return query if len(query) <= max_length else query[:max_length] + '…'
+
+
+class MethodMetrics:
+    """Compteurs d'une méthode du backend : histogramme cumulatif complet + fenêtre des dernières durées"""
+
+    def __init__(self, window: int):
+        self.count = 0
+        self.rows = 0
+        self.wall_ms_sum = 0.0
+        self.available_ms_sum = 0
+        self.consumed_ms_sum = 0
+        self.server_samples = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)  # Dernier = au-delà de la plus grande borne
+        self.errors = Counter()
+        self.recent = deque(maxlen=window)
+
+    def observe(self, wall_ms: float, available_ms: Optional[int], consumed_ms: Optional[int], rows: int,
+                error: Optional[str]):
+        self.count += 1
+        self.rows += rows
+        self.wall_ms_sum += wall_ms
+        if available_ms is not None and consumed_ms is not None:
+            self.available_ms_sum += available_ms
+            self.consumed_ms_sum += consumed_ms
+            self.server_samples += 1
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, wall_ms)] += 1
+        if error:
+            self.errors[error] += 1
+        self.recent.append(wall_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            'count': self.count,
+            'errors': sum(self.errors.values()),
+            'error_names': dict(self.errors),
+            'rows': self.rows,
+            'mean_ms': round(self.wall_ms_sum / self.count, 2) if self.count else None,
+            **{f"p{int(q * 100)}_ms": round(percentile(recent, q), 2) if recent else None
+               for q in (0.5, 0.95, 0.99)},
+            'max_ms': round(recent[-1], 2) if recent else None,
+            # Temps serveur moyens : attente du premier résultat / lecture complète côté serveur
+            'server_available_ms': round(self.available_ms_sum / self.server_samples, 2) if self.server_samples else None,
+            'server_consumed_ms': round(self.consumed_ms_sum / self.server_samples, 2) if self.server_samples else None,
+        }
+
+
+class QueryMetrics:
+    """
+    Métriques des requêtes d'un backend, partagées par toutes les sessions du processus
+
+    Args:
+        slow_query_ms: Seuil (ms, durée client) du journal des requêtes lentes (0 = désactivé)
+        profile_sample_rate: Part des exécutions des méthodes profile_methods lancées en PROFILE (0 à 1)
+        profile_methods: Méthodes éligibles au PROFILE (lectures uniquement : PROFILE exécute la requête)
+        window: Nombre de durées récentes conservées par méthode pour les percentiles
+    """
+
+    def __init__(self, slow_query_ms: float = 500, profile_sample_rate: float = 0.0,
+                 profile_methods: Iterable[str] = (), window: int = 1000, slow_log_size: int = 100,
+                 profile_log_size: int = 50):
+        self.slow_query_ms = slow_query_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.profile_methods = frozenset(profile_methods)
+        self.window = window
+        self._methods: Dict[str, MethodMetrics] = {}
+        self._slow = deque(maxlen=slow_log_size)
+        self._profiles = deque(maxlen=profile_log_size)
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def sample_profile(self, method: str) -> bool:
+        return (self.profile_sample_rate > 0 and method in self.profile_methods
+                and random.random() < self.profile_sample_rate)
+
+    def observe(self, method: str, query: str, params: Dict[str, Any], wall_ms: float, summary, rows: int,
+                error: Optional[BaseException] = None):
+        available_ms = getattr(summary, 'result_available_after', None)
+        consumed_ms = getattr(summary, 'result_consumed_after', None)
+        name = error_name(error) if error is not None else None
+        slow = self.slow_query_ms > 0 and wall_ms >= self.slow_query_ms
+        profile = getattr(summary, 'profile', None)
+
+        entry = None
+        if slow or profile:
+            entry = {
+                'time': time.time(),
+                'method': method,
+                'wall_ms': round(wall_ms, 2),
+                'server_available_ms': available_ms,
+                'server_consumed_ms': consumed_ms,
+                'rows': rows,
+                'error': name,
+                'params': param_shape(params),
+                'query': compact_query(query),
+            }
+
+        with self._lock:
+            metrics = self._methods.get(method)
+            if metrics is None:
+                metrics = self._methods[method] = MethodMetrics(self.window)
+            metrics.observe(wall_ms, available_ms, consumed_ms, rows, name)
+            if slow:
+                self._slow.append(entry)
+            if profile:
+                self._profiles.append({**entry, 'db_hits': total_db_hits(profile),
+                                       'operators': plan_operators(profile), 'plan': profile})
+
+        if slow:
+            server = f", serveur {available_ms}+{consumed_ms} ms" if available_ms is not None else ""
+            print(f"⚠️ Requête lente {method}: {wall_ms:.0f} ms{server}, {rows} ligne(s)"
+                  f"{f', erreur {name}' if name else ''} {entry['params']}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Totaux et, par méthode : nombre d'appels, erreurs, lignes, moyenne et p50/p95/p99 (ms)"""
+        with self._lock:
+            methods = {name: metrics.summary() for name, metrics in sorted(self._methods.items())}
+        return {
+            'queries': sum(method['count'] for method in methods.values()),
+            'errors': sum(method['errors'] for method in methods.values()),
+            'slow_query_ms': self.slow_query_ms,
+            'profile_sample_rate': self.profile_sample_rate,
+            'since': self.started_at,
+            'methods': methods,
+        }
+
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Histogramme cumulatif par méthode : {'buckets': [(borne ms, nombre <= borne)...], 'count', 'sum_ms'}"""
+        with self._lock:
+            histograms = {}
+            for name, metrics in sorted(self._methods.items()):
+                cumulative, running = [], 0
+                for bound, count in zip(LATENCY_BUCKETS_MS + (float('inf'),), metrics.buckets):
+                    running += count
+                    cumulative.append((bound, running))
+                histograms[name] = {'buckets': cumulative, 'count': metrics.count, 'sum_ms': metrics.wall_ms_sum}
+            return histograms
+
+    def slow_queries(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Requêtes lentes, de la plus récente à la plus ancienne"""
+        with self._lock:
+            entries = list(reversed(self._slow))
+        return entries[:limit] if limit else entries
+
+    def profiles(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Plans PROFILE échantillonnés (db hits, opérateurs, plan complet), du plus récent au plus ancien"""
+        with self._lock:
+            entries = list(reversed(self._profiles))
+        return entries[:limit] if limit else entries
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._slow.clear()
+            self._profiles.clear()
+            self.started_at = time.time()
+
+
+def run_query(runner, metrics: QueryMetrics, method: str, query: str, params: Optional[Dict[str, Any]] = None):
+    """
+    Exécute une requête sur une session ou une transaction et enregistre ses métriques
+
+    Returns:
+        (clés, enregistrements) ; le résultat est entièrement lu avant de rendre la main
+    """
+    params = params or {}
+    profiled = metrics.sample_profile(method)
+    records, summary, error = [], None, None
+    start = time.perf_counter()
+    try:
+        result = runner.run(f"PROFILE {query}" if profiled else query, params)
+        keys = result.keys()
+        records = list(result)
+        summary = result.consume()
+        return keys, records
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        metrics.observe(method, query, params, (time.perf_counter() - start) * 1000, summary, len(records), error)
+
+
+async def run_query_async(runner, metrics: QueryMetrics, method: str, query: str,
+                          params: Optional[Dict[str, Any]] = None):
+    """run_query pour une session async"""
+    params = params or {}
+    profiled = metrics.sample_profile(method)
+    records, summary, error = [], None, None
+    start = time.perf_counter()
+    try:
+        result = await runner.run(f"PROFILE {query}" if profiled else query, params)
+        keys = result.keys()  # Synchrone sur AsyncResult (tuple)
+        records = [record async for record in result]
+        summary = await result.consume()
+        return keys, records
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        metrics.observe(method, query, params, (time.perf_counter() - start) * 1000, summary, len(records), error)
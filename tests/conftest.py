@@ -0,0 +1,8 @@
+"""Modules de l'application (streamlit/) et des scripts (script/) importables depuis les tests"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'streamlit'))
+sys.path.insert(0, str(ROOT / 'script'))
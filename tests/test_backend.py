@@ -0,0 +1,328 @@
+"""Tests du backend Streamlit (sans base Neo4j)"""
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from neo4j import Record
+from neo4j.exceptions import ClientError
+
+from backend import (QueryCache, SpotifyBackend, decode_cursor, encode_cursor, lucene_query, records_to_frame,
+                     song_params, update_properties)
+from query_metrics import QueryMetrics
+
+
+def test_lucene_query_escapes_special_characters():
+    """Chaque mot est requis, entier ou préfixe ; la syntaxe Lucene saisie est échappée"""
+    assert lucene_query('Love me') == '(love^2 OR love*) AND (me^2 OR me*)'
+    assert lucene_query('AC/DC (live)') == '(ac\\/dc^2 OR ac\\/dc*) AND (\\(live\\)^2 OR \\(live\\)*)'
+    assert lucene_query('   ') == ''
+
+
+def test_search_fallback_is_not_cached():
+    """Index full-text absents : création des index et repli CONTAINS, non mis en cache sous mode='fulltext'"""
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    indexes = {'created': False}
+    calls = []
+
+    def search_fulltext(query, limit, relevance_weight):
+        calls.append('fulltext')
+        if not indexes['created']:
+            raise ClientError("There is no such fulltext schema index: track_name_fulltext")
+        return [{'id': 't1', 'name': 'love'}]
+
+    def search_contains(search_term, limit):
+        calls.append('contains')
+        return [{'id': 't1', 'name': search_term}]
+
+    backend._search_songs_fulltext = search_fulltext
+    backend._search_songs_contains = search_contains
+    backend.ensure_fulltext_indexes = lambda: indexes.update(created=True)
+    assert backend.search_songs('love') == [{'id': 't1', 'name': 'love'}]
+    assert calls == ['fulltext', 'contains']
+
+    # Index créés par le repli : la recherche suivante passe par le full-text, puis est servie par le cache
+    backend.search_songs('love')
+    backend.search_songs('love')
+    assert calls == ['fulltext', 'contains', 'fulltext']
+
+
+class FakeResult:
+    """Résultat neo4j simulé : clés, itération et résumé, comme le lit run_query"""
+
+    def __init__(self, records):
+        self.records = list(records)
+
+    def keys(self):
+        return self.records[0].keys() if self.records else []
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def consume(self):
+        return None
+
+
+class FakeReadSession:
+    """Session neo4j simulée : enregistre les paramètres et renvoie des records fixes"""
+
+    def __init__(self, records, calls):
+        self.records, self.calls = records, calls
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, params=None):
+        self.calls.append(params)
+        return FakeResult(self.records)
+
+
+def fake_driver(make_session):
+    return type('FakeDriver', (), {'session': lambda self: make_session()})()
+
+
+def test_songs_page_cursor_round_trip():
+    """Le curseur renvoie la position (popularité, track_id) de la dernière chanson ; curseur invalide refusé"""
+    cursor = encode_cursor(42, 'é-track/1')
+    assert decode_cursor(cursor) == (42, 'é-track/1')
+    with pytest.raises(ValueError):
+        decode_cursor('pas un curseur')
+
+    records = [Record({'track': {'id': 't2', 'name': 'B', 'popularity': 42, 'energy': 0.5, 'danceability': 0.5},
+                       'artists': ['A'], 'genre': 'pop'})]
+    calls = []
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics()
+    backend.driver = fake_driver(lambda: FakeReadSession(records, calls))
+
+    page = backend.get_songs_page(page_size=1, cursor=cursor)
+    assert calls == [{'limit': 1, 'popularity': 42, 'track_id': 'é-track/1'}]
+    assert decode_cursor(page['next_cursor']) == (42, 't2')
+
+
+def test_list_queries_return_primary_genre_first():
+    """Track à plusieurs genres : les listes renvoient toujours le même genre, le genre principal d'abord"""
+    from backend import (ALL_SONGS_QUERY, GENRE_EXPANSION, POPULAR_SONGS_QUERY, SEARCH_CONTAINS_QUERY,
+                         SEARCH_FULLTEXT_QUERY, SONGS_BY_ARTIST_QUERY, SONGS_PAGE_QUERY)
+
+    assert 'ORDER BY g.name = t.genre DESC, g.name LIMIT 1' in GENRE_EXPANSION
+    for query in (ALL_SONGS_QUERY, POPULAR_SONGS_QUERY, SEARCH_CONTAINS_QUERY, SEARCH_FULLTEXT_QUERY,
+                  SONGS_BY_ARTIST_QUERY, SONGS_PAGE_QUERY):
+        assert GENRE_EXPANSION in query
+
+
+def test_writes_invalidate_cached_reads():
+    """Une écriture invalide les lectures listées dans INVALIDATIONS, même si elle échoue"""
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics()
+    calls = []
+    reading = fake_driver(lambda: FakeReadSession([], calls))
+
+    def unavailable():
+        raise RuntimeError("base indisponible")
+
+    def read_all():
+        backend.driver = reading
+        backend.search_songs('love', mode='contains')
+        backend.get_all_genres()
+
+    read_all()
+    read_all()
+    assert len(calls) == 2
+
+    # Mise à jour en échec : les listes de chansons sont relues, pas les genres
+    backend.driver = fake_driver(unavailable)
+    with pytest.raises(RuntimeError):
+        backend.update_song('a', {'popularity': 10})
+    read_all()
+    assert [('search_term' in params) for params in calls[2:]] == [True]
+
+    # Création en échec : les genres sont aussi invalidés
+    backend.driver = fake_driver(unavailable)
+    with pytest.raises(RuntimeError):
+        backend.create_song({'track_id': 'b', 'artists': 'X'})
+    read_all()
+    assert [('search_term' in params) for params in calls[3:]] == [True, False]
+
+
+class FakeWriteSession:
+    """Session d'écriture simulée : execute_write sur une transaction qui renvoie des records fixes"""
+
+    def __init__(self, run):
+        self.tx = type('FakeTx', (), {'run': lambda tx, query, params=None: FakeResult(run(query, params))})()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work, *args):
+        return work(self.tx, *args)
+
+
+def test_create_songs_keys_album_by_main_artist():
+    """Création en lot : Album identifié par (nom, artiste principal) et CREATED comme à l'import"""
+    from backend import CREATE_SONGS_QUERY
+
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics()
+    written = []
+
+    def run(query, params):
+        if query != CREATE_SONGS_QUERY:
+            return []
+        written.extend(params['rows'])
+        return [Record({'index': row['index']}) for row in params['rows']]
+
+    backend.driver = fake_driver(lambda: FakeWriteSession(run))
+    report = backend.create_songs([{'track_id': 'a', 'artists': 'X;Y', 'album_name': 'Album'},
+                                   {'track_id': 'b', 'album_name': 'Album'}])
+    assert report['succeeded'] == 2
+    assert [row['main_artist'] for row in written] == ['X', 'Unknown']
+    assert 'MERGE (al:Album {name: row.album_name, artist: row.main_artist})' in CREATE_SONGS_QUERY
+    assert 'artist_name = row.main_artist' in CREATE_SONGS_QUERY
+
+
+def test_reset_backend_resets_async_runner(monkeypatch):
+    """reset_backend ferme aussi le runner async : il ne garde pas le cache de l'ancien backend"""
+    import async_backend
+    import backend
+
+    closed = []
+    old_backend = type('FakeBackend', (), {'close': lambda self: closed.append('sync')})()
+    old_runner = type('FakeRunner', (), {'close': lambda self: closed.append('async')})()
+    monkeypatch.setattr(backend, '_backend', old_backend)
+    monkeypatch.setattr(async_backend, '_runner', old_runner)
+
+    backend.reset_backend()
+    assert closed == ['sync', 'async']
+    assert backend._backend is None and async_backend._runner is None
+
+
+def test_pool_stats_include_async_driver():
+    """pool_stats : pool synchrone et pools enregistrés dans pool_sources (runner async)"""
+    sync_backend = SpotifyBackend.__new__(SpotifyBackend)
+    sync_backend.driver = None
+    sync_backend.pool_config = {'max_connection_pool_size': 10}
+    sync_backend.pool_sources = {'async': lambda: {'max_size': 10, 'open': 4, 'in_use': 3, 'saturation': 0.3,
+                                                   'servers': {'localhost:7687': {'open': 4, 'in_use': 3}}}}
+
+    stats = sync_backend.pool_stats()
+    assert set(stats['drivers']) == {'sync', 'async'}
+    assert (stats['open'], stats['in_use'], stats['max_size']) == (4, 3, 20)
+    assert stats['saturation'] == 0.3
+
+
+def test_async_search_fallback_is_not_cached():
+    """Backend async : même repli CONTAINS non mis en cache que SpotifyBackend.search_songs"""
+    import asyncio
+
+    from async_backend import AsyncSpotifyBackend
+    from backend import SEARCH_CONTAINS_QUERY, SEARCH_FULLTEXT_QUERY
+
+    async_backend = AsyncSpotifyBackend.__new__(AsyncSpotifyBackend)
+    async_backend.cache = QueryCache()
+    queries = []
+
+    async def fake_fetch(method, query, params=None):
+        queries.append(query)
+        if query == SEARCH_FULLTEXT_QUERY and len(queries) == 1:
+            raise ClientError("There is no such fulltext schema index: track_name_fulltext")
+        return []
+
+    async def ensure_indexes():
+        pass
+
+    async_backend._fetch = fake_fetch
+    async_backend.ensure_fulltext_indexes = ensure_indexes
+
+    async def search_three_times():
+        for _ in range(3):
+            await async_backend.search_songs('love')
+
+    asyncio.run(search_three_times())
+    assert queries == [SEARCH_FULLTEXT_QUERY, SEARCH_CONTAINS_QUERY, SEARCH_FULLTEXT_QUERY]
+
+
+def test_records_to_frame_bool_mode():
+    """mode est écrit en booléen par l'import : la colonne doit l'accepter"""
+    keys = ['track_id', 'mode', 'popularity']
+    records = [('a', True, 10), ('b', False, 20)]
+
+    table = records_to_frame(keys, records, format='arrow')
+    assert table.schema.field('mode').type == pa.bool_()
+    assert table.column('mode').to_pylist() == [True, False]
+
+    df = records_to_frame(keys, records)
+    assert df['mode'].dtype == bool
+    assert pd.api.types.is_integer_dtype(df['popularity'])
+
+
+def test_written_mode_is_bool():
+    """Création et mise à jour écrivent mode comme l'import (booléen, pas 0/1)"""
+    params = song_params({'track_id': 'a', 'artists': 'X', 'mode': 1})
+    assert params['mode'] is True
+    assert update_properties({'track_id': 'a', 'mode': 0}) == {'mode': False}
+
+
+def test_statistics_missing_checks_genres_and_artists():
+    """Vérification sans recalcul : genres et artistes sans agrégats, lue une fois puis en cache"""
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics()
+    queries = []
+
+    def fake_fetch(method, query, params=None):
+        queries.append(query)
+        return [{'genres': 0, 'artists': 3}]
+
+    backend._fetch = fake_fetch
+    assert backend.statistics_missing() == {'genres': 0, 'artists': 3}
+    assert backend.statistics_missing() == {'genres': 0, 'artists': 3}
+    assert len(queries) == 1
+    assert 'Genre' in queries[0] and 'Artist' in queries[0]
+
+
+def test_stats_recompute_locks_node_before_reading():
+    """Le recalcul verrouille le noeud avant de lire ses relations (écritures concurrentes du backend)"""
+    from statistics_queries import REFRESH_GENRE_STATISTICS_QUERY
+
+    assert REFRESH_GENRE_STATISTICS_QUERY.index('_stats_lock') < REFRESH_GENRE_STATISTICS_QUERY.index('OPTIONAL MATCH')
+
+
+def test_rebuild_statistics_script_uses_plain_driver():
+    """Script de recalcul : requêtes de statistics_queries sur un driver simple, écarts comptés par label"""
+    from types import SimpleNamespace
+
+    import rebuild_statistics
+    from statistics_queries import REBUILD_ARTIST_STATISTICS_QUERY, REBUILD_GENRE_STATISTICS_QUERY
+
+    drift = {'name': 'pop', 'stored_count': 3, 'track_count': 4, 'stored_popularity_sum': 30, 'popularity_sum': 40}
+    queries = []
+
+    class FakeSession:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def run(self, query):
+            queries.append(query)
+            if query in (REBUILD_GENRE_STATISTICS_QUERY, REBUILD_ARTIST_STATISTICS_QUERY):
+                nodes = 2 if query == REBUILD_GENRE_STATISTICS_QUERY else 5
+                return SimpleNamespace(single=lambda: {'nodes': nodes})
+            rows = [drift] if ':Genre' in query else []
+            return [SimpleNamespace(data=lambda row=row: row) for row in rows]
+
+    driver = fake_driver(FakeSession)
+    assert rebuild_statistics.check_statistics(driver) == 1
+    assert rebuild_statistics.rebuild_statistics(driver) == {'genres': 2, 'artists': 5}
+    assert not hasattr(rebuild_statistics, 'SpotifyBackend')
@@ -0,0 +1,316 @@
+"""Tests des scripts d'import (sans base Neo4j)"""
+
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+from neo4j import Record
+
+from dataset_consolidation import DatasetConsolidator
+from neo4j_bulk_export import SpotifyBulkExporter
+from neo4j_delta_import import (DELETE_TRACKS_QUERY, PREVIOUS_TRACK_NODES_QUERY, PRUNE_ARTIST_RELATIONS_QUERY,
+                                RESET_TRACK_RELATIONS_QUERY, SpotifyDeltaImporter)
+from neo4j_import import (IMPORT_PHASES, SHARED_NODE_KEYS, SHARED_RELATION_KEYS, AdaptiveBatchSizer, ImportCheckpoint,
+                          ImportTelemetry, SpotifyUltraFastImporter, _payloads_equivalent, statistics_nodes)
+
+COLUMNS = ['track_id', 'artists', 'album_name', 'track_name', 'popularity', 'duration_ms', 'explicit',
+           'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness',
+           'instrumentalness', 'liveness', 'valence', 'tempo', 'time_signature', 'track_genre']
+
+
+def make_row(track_id, genre, popularity, artists='A;B'):
+    return [track_id, artists, 'Album', f"Titre {track_id}", popularity, 1000, False,
+            0.5, 0.5, 1, -5.0, 1, 0.1, 0.1, 0.0, 0.1, 0.5, 120.0, 4, genre]
+
+
+def write_dataset(path, rows):
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+
+
+def test_vectorized_preparation_matches_row_preparation():
+    """Préparation colonnaire et ancienne préparation ligne à ligne produisent le même payload"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    rows = [make_row('t1', 'pop', 10, 'A;B'), make_row('t2', 'rock', 20, 'C, D'), make_row('t3', 'jazz', 30, None),
+            make_row('t4', 'pop', 40, ' E ;A'), make_row('t1', 'rock', 50, 'A;B'), make_row('t5', 'pop', 60, '')]
+    chunk_df = pd.DataFrame(rows, columns=COLUMNS)
+    chunk_df['instrumentalness'] = [0.0, '0.5', 'n/a', 0.1, 0.0, 1.0]  # Chaînes non numériques : 0.0
+
+    payload = importer.build_chunk_payload(importer.prepare_chunk_frames(chunk_df))
+    assert _payloads_equivalent(importer.prepare_chunk_rows(chunk_df), payload)
+    assert [track['instrumentalness'] for track in payload['tracks']] == [0.0, 0.5, 0.0, 0.1, 0.0, 1.0]
+    assert {row['artist'] for row in payload['albums']} == {'A', 'C', 'E', 'Unknown'}
+
+
+class FakeResult:
+    def consume(self):
+        counters = SimpleNamespace(**{counter: 0 for counter in ImportTelemetry.COUNTERS})
+        return SimpleNamespace(result_available_after=0, result_consumed_after=0, counters=counters)
+
+    def single(self):
+        # Anciens genres / artistes des tracks, lus en début de transaction par l'import delta
+        return Record({'genres': ['old-genre'], 'artists': ['Old Artist']})
+
+
+class RecordingDriver:
+    """Driver (et session) factice : note (thread, clé de phase, lignes) de chaque requête"""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def session(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        key = next(key for _, key, phase_query in IMPORT_PHASES if phase_query == query)
+        with self.lock:
+            self.calls.append((threading.current_thread().name, key, params['rows']))
+        return FakeResult()
+
+
+def test_parallel_write_creates_shared_nodes_with_a_single_writer():
+    """Artist/Album/Genre puis PLAYS_GENRE/CREATED par le thread appelant, tracks et relations par les workers"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    importer.workers = 2
+    importer.executor = ThreadPoolExecutor(max_workers=2)
+    importer.batch_sizer = AdaptiveBatchSizer()
+    importer.telemetry = ImportTelemetry()
+    importer.deadlock_retries = Counter()
+    importer._stats_lock = threading.Lock()
+    importer.driver = RecordingDriver()
+
+    rows = [make_row(f"t{i}", genre, 10, artists)
+            for i, (genre, artists) in enumerate([('pop', 'B;A'), ('rock', 'A'), ('jazz', 'C;B'), ('pop', 'A;C')])]
+    payload = importer.build_chunk_payload(importer.prepare_chunk_frames(pd.DataFrame(rows, columns=COLUMNS)))
+    importer.write_chunk_parallel(payload)
+    importer.executor.shutdown()
+
+    main = threading.current_thread().name
+    keys = [key for _, key, _ in importer.driver.calls]
+    assert keys[:3] == ['artists', 'albums', 'genres'] and keys[-2:] == ['plays_genre', 'created']
+    shared_keys = SHARED_NODE_KEYS + SHARED_RELATION_KEYS
+    assert all(thread == main for thread, key, _ in importer.driver.calls if key in shared_keys)
+
+    worker_calls = importer.driver.calls[3:-2]
+    assert all(thread != main for thread, _, _ in worker_calls)
+    assert sorted(row['track_id'] for _, key, rows in worker_calls if key == 'tracks' for row in rows) == \
+        ['t0', 't1', 't2', 't3']
+    for _, key, rows in worker_calls:
+        if key == 'performs':
+            assert [row['artist'] for row in rows] == sorted(row['artist'] for row in rows)
+
+
+def test_failed_chunk_is_split_down_to_faulty_rows():
+    """Chunk en échec persistant : coupé en deux jusqu'à isoler les lignes fautives, le reste est écrit"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    importer.min_chunk_size = 1
+    importer.prepare_chunk = lambda chunk_df: chunk_df
+    written = []
+
+    def write_payload(chunk_df):
+        if 't3' in chunk_df['track_id'].tolist():
+            raise RuntimeError("ligne invalide")
+        written.extend(chunk_df['track_id'])
+
+    importer.write_payload = write_payload
+    chunk_df = pd.DataFrame({'track_id': [f"t{i}" for i in range(6)]}, index=range(100, 106))
+    assert importer._import_split(chunk_df, "1") == [103]
+    assert sorted(written) == ['t0', 't1', 't2', 't4', 't5']
+
+
+def test_checkpoint_resumes_only_committed_chunks(tmp_path):
+    """Manifest : chunk partiel réimporté au --resume, taille de chunk différente = nouveau manifest"""
+    csv_path = str(tmp_path / 'dataset.csv')
+    checkpoint = ImportCheckpoint(csv_path, chunk_size=2)
+    checkpoint.record(0, 'aaa', 2, [])
+    checkpoint.record(2, 'bbb', 2, [3])
+
+    resumed = ImportCheckpoint(csv_path, chunk_size=2, resume=True)
+    assert resumed.is_committed(0, 'aaa')
+    assert not resumed.is_committed(0, 'changé')
+    assert not resumed.is_committed(2, 'bbb')
+    assert resumed.committed_count() == 1
+    assert ImportCheckpoint(csv_path, chunk_size=3, resume=True).committed_count() == 0
+
+
+def test_bulk_export_stable_ids_and_deduplicated_relationships(tmp_path):
+    """Export neo4j-admin : IDs par ordre d'apparition, Track de la dernière ligne, relations écrites une fois"""
+    csv_path = tmp_path / 'dataset.csv'
+    write_dataset(csv_path, [make_row('t1', 'pop', 10, 'A;B'), make_row('t2', 'pop', 20, 'B'),
+                             make_row('t1', 'rock', 30, 'A;B'), make_row('t3', 'rock', 40, 'C')])
+    out_dir = tmp_path / 'export'
+    SpotifyBulkExporter(str(out_dir), chunk_size=2).export(str(csv_path))
+
+    def read(name):
+        return pd.read_csv(out_dir / name)
+
+    tracks = read('nodes_track.csv')
+    assert tracks[':ID(Track)'].tolist() == [1, 0, 2]  # t2 (chunk 1), t1 (dernière ligne, chunk 2), t3
+    assert tracks.set_index('track_id')['popularity:long'].to_dict() == {'t1': 30, 't2': 20, 't3': 40}
+    assert read('nodes_artist.csv')['name'].tolist() == ['A', 'B', 'C']
+    assert read('nodes_genre.csv')['name'].tolist() == ['pop', 'rock']
+
+    performs = read('rels_performs.csv')
+    assert len(performs) == len(performs.drop_duplicates()) == 4
+    plays_genre = read('rels_plays_genre.csv')
+    assert sorted(map(tuple, plays_genre.to_numpy().tolist())) == [(0, 0), (0, 1), (1, 0), (1, 1), (2, 1)]
+    assert len(read('rels_created.csv')) == 3
+
+
+class FakeTx:
+    """Transaction factice : note les requêtes, échoue sur celle qui contient fail_on"""
+
+    def __init__(self, fail_on=None):
+        self.queries = []
+        self.fail_on = fail_on
+
+    def run(self, query, **params):
+        if self.fail_on and self.fail_on in query:
+            raise RuntimeError("échec du lot")
+        self.queries.append(query)
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self, tx):
+        self.tx = tx
+        self.autocommit = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, **params):
+        self.autocommit.append(query)
+        return FakeResult()
+
+    def execute_write(self, work, *args):
+        return work(self.tx, *args)
+
+
+def test_delta_reset_and_rewrite_share_one_transaction():
+    """Tracks modifiées : reset des relations, réécriture et nettoyage dans la même transaction"""
+    importer = SpotifyDeltaImporter.__new__(SpotifyDeltaImporter)
+    importer.telemetry = ImportTelemetry()
+    importer._stats_lock = threading.Lock()
+    importer.statistics_touched = {'genres': set(), 'artists': set()}
+    importer.pending_reset = {'t1'}
+    importer.track_hashes = {'t1': '0' * 16}
+    importer.changed_tracks = {'t1'}
+    importer.fresh_load = False
+    importer.executor = None
+
+    chunk_df = pd.DataFrame([make_row('t1', 'pop', 10)], columns=COLUMNS)
+    payload = importer.prepare_chunk(chunk_df)
+    assert payload['reset'] == ['t1']
+
+    # Échec de la transaction : rien n'a été écrit hors transaction, le reset reste à faire
+    session = FakeSession(FakeTx(fail_on='MERGE (t)-[:HAS_GENRE]->(g)'))
+    importer.driver = type('Driver', (), {'session': lambda self: session})()
+    try:
+        importer.write_payload(payload)
+    except RuntimeError:
+        pass
+    assert session.autocommit == []
+    assert importer.pending_reset == {'t1'}
+
+    session = FakeSession(FakeTx())
+    importer.write_payload(payload)
+    assert session.tx.queries[:2] == [PREVIOUS_TRACK_NODES_QUERY, RESET_TRACK_RELATIONS_QUERY]
+    assert any('MERGE (t)-[:HAS_GENRE]->(g)' in query for query in session.tx.queries)
+    assert session.tx.queries[-1] == PRUNE_ARTIST_RELATIONS_QUERY
+    assert importer.pending_reset == set()
+    # Agrégats à recalculer : nouveaux et anciens genres / artistes de la track
+    assert importer.statistics_touched == {'genres': {'pop', 'old-genre'}, 'artists': {'A', 'B', 'Old Artist'}}
+
+
+def test_delta_delete_prunes_artist_relations_in_same_transaction():
+    """Suppression : tracks et PLAYS_GENRE/CREATED devenus injustifiés nettoyés dans la même transaction"""
+    importer = SpotifyDeltaImporter.__new__(SpotifyDeltaImporter)
+    importer.telemetry = ImportTelemetry()
+    importer._stats_lock = threading.Lock()
+    importer.statistics_touched = {'genres': set(), 'artists': set()}
+    importer.batch_sizer = AdaptiveBatchSizer(initial_size=2)
+    session = FakeSession(FakeTx())
+    importer.driver = type('Driver', (), {'session': lambda self: session})()
+
+    importer.delete_tracks(['t1', 't2', 't3'])
+    assert session.tx.queries == [PREVIOUS_TRACK_NODES_QUERY, DELETE_TRACKS_QUERY, PRUNE_ARTIST_RELATIONS_QUERY] * 2
+    assert session.autocommit == []
+    assert importer.statistics_touched == {'genres': {'old-genre'}, 'artists': {'Old Artist'}}
+
+
+def test_import_keeps_content_hash_of_rewritten_tracks():
+    """SET t = track ne doit pas effacer le content_hash posé par l'import delta"""
+    tracks_query = dict((key, query) for _, key, query in IMPORT_PHASES)['tracks']
+    assert 'coalesce(track.content_hash, content_hash)' in tracks_query
+
+
+def test_batch_sizer_follows_latency():
+    """Batch plein et rapide : x1.5 ; lent : /2 ; refus serveur : /2 et plafond pour la phase"""
+    sizer = AdaptiveBatchSizer(initial_size=1000, target_latency=2.0, min_size=100, max_size=10000)
+    sizer.record('tracks', 1000, 0.5)
+    assert sizer.size('tracks') == 1500
+    sizer.record('tracks', 200, 0.1)  # Batch partiel : taille inchangée
+    assert sizer.size('tracks') == 1500
+    sizer.record('tracks', 1500, 3.0)
+    assert sizer.size('tracks') == 750
+
+    assert sizer.shrink('performs', 1000) == 500
+    for _ in range(5):
+        sizer.record('performs', sizer.size('performs'), 0.1)
+    assert sizer.size('performs') == 999
+    assert sizer.size('genres') == 1000
+
+
+def test_consolidation_keeps_last_row(tmp_path):
+    """Comme l'import UNWIND (SET t = track) : propriétés et genre principal de la dernière ligne"""
+    src, out = tmp_path / 'dataset.csv', tmp_path / 'dataset.consolidated.csv'
+    write_dataset(src, [make_row('t1', 'pop', 10), make_row('t2', 'jazz', 5), make_row('t1', 'rock', 30)])
+
+    report = DatasetConsolidator().consolidate(str(src), str(out))
+    df = pd.read_csv(out).set_index('track_id')
+
+    assert report['tracks'] == 2
+    assert df.loc['t1', 'popularity'] == 30
+    assert df.loc['t1', 'track_genre'] == 'rock'
+    assert df.loc['t1', 'track_genres'] == 'rock;pop'
+    assert df.loc['t2', 'track_genres'] == 'jazz'
+
+
+def test_genres_written_only_for_consolidated_dataset():
+    """Hors dataset consolidé, la propriété genres ne porterait que le genre d'une ligne : pas écrite"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    chunk_df = pd.DataFrame([make_row('t1', 'pop', 10), make_row('t1', 'rock', 30)], columns=COLUMNS)
+
+    frames = SpotifyUltraFastImporter.prepare_chunk_frames(chunk_df)
+    payload = importer.build_chunk_payload(frames)
+    assert all('genres' not in track for track in payload['tracks'])
+    assert {row['genre'] for row in payload['has_genre']} == {'pop', 'rock'}
+    assert _payloads_equivalent(importer.prepare_chunk_rows(chunk_df), payload)
+
+    consolidated = chunk_df.iloc[[1]].assign(track_genres='rock;pop')
+    payload = importer.build_chunk_payload(SpotifyUltraFastImporter.prepare_chunk_frames(consolidated))
+    assert payload['tracks'][0]['genres'] == ['rock', 'pop']
+    assert {row['genre'] for row in payload['has_genre']} == {'pop', 'rock'}
+
+
+def test_statistics_nodes_cover_regular_and_fresh_payloads():
+    """Genres / artistes dont les agrégats sont à recalculer : relations écrites, en mode normal comme initial"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    chunk_df = pd.DataFrame([make_row('t1', 'pop', 10, 'A;B'), make_row('t2', 'rock', 20, 'C')], columns=COLUMNS)
+    payload = importer.build_chunk_payload(importer.prepare_chunk_frames(chunk_df))
+    assert statistics_nodes(payload) == ({'pop', 'rock'}, {'A', 'B', 'C'})
+
+    fresh = {'fresh_tracks': [{'genres': ['jazz'], 'artists': ['D', 'E']}]}
+    assert statistics_nodes(fresh) == ({'jazz'}, {'D', 'E'})
@@ -0,0 +1,103 @@
+"""Tests des mesures de requêtes et du backend async (sans base Neo4j)"""
+
+import asyncio
+
+from query_metrics import QueryMetrics, run_query_async
+
+
+class FakeAsyncResult:
+    """Comme neo4j.AsyncResult : keys() synchrone, itération et consume() asynchrones"""
+
+    def __init__(self, keys, rows):
+        self._keys = tuple(keys)
+        self._rows = list(rows)
+
+    def keys(self):
+        return self._keys
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self._rows:
+            yield row
+
+    async def consume(self):
+        return None
+
+
+class FakeAsyncSession:
+    def __init__(self, result):
+        self.result = result
+        self.queries = []
+
+    async def run(self, query, params=None):
+        self.queries.append((query, params))
+        return self.result
+
+
+def test_run_query_async_reads_keys_and_records():
+    session = FakeAsyncSession(FakeAsyncResult(['genre', 'track_count'], [('pop', 2), ('rock', 1)]))
+    metrics = QueryMetrics(slow_query_ms=0)
+
+    keys, records = asyncio.run(run_query_async(session, metrics, 'get_genre_statistics', "RETURN 1", {'limit': 2}))
+
+    assert keys == ('genre', 'track_count')
+    assert records == [('pop', 2), ('rock', 1)]
+    stats = metrics.stats()['methods']['get_genre_statistics']
+    assert stats['count'] == 1 and stats['rows'] == 2 and stats['errors'] == 0
+
+
+class FakeAsyncDriver:
+    def __init__(self, result):
+        self.session_ = FakeAsyncSession(result)
+
+    def session(self):
+        driver = self
+
+        class Context:
+            async def __aenter__(self):
+                return driver.session_
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Context()
+
+
+def test_async_backend_read_through_fake_session():
+    from neo4j import Record
+    from async_backend import AsyncSpotifyBackend
+    from backend import QueryCache
+
+    record = Record({'total_tracks': 3, 'total_genres': 2, 'total_artists': 1})
+    backend = AsyncSpotifyBackend.__new__(AsyncSpotifyBackend)
+    backend.driver = FakeAsyncDriver(FakeAsyncResult(record.keys(), [record]))
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics(slow_query_ms=0)
+
+    assert asyncio.run(backend.get_quick_stats()) == {'total_tracks': 3, 'total_genres': 2, 'total_artists': 1}
+    assert backend.metrics.stats()['methods']['get_quick_stats']['rows'] == 1
+
+
+def test_prometheus_export_labels_pools_by_driver(tmp_path):
+    """Export Prometheus : un pool par driver (sync / async) et débit du dernier import"""
+    import json
+
+    from backend import QueryCache, SpotifyBackend
+    from metrics_exporter import render_prometheus
+
+    backend = SpotifyBackend.__new__(SpotifyBackend)
+    backend.cache = QueryCache()
+    backend.metrics = QueryMetrics(slow_query_ms=0)
+    backend.driver = None
+    backend.pool_config = {'max_connection_pool_size': 10}
+    backend.pool_sources = {'async': lambda: {'max_size': 10, 'open': 4, 'in_use': 3, 'saturation': 0.3,
+                                              'servers': {'localhost:7687': {'open': 4, 'in_use': 3}}}}
+    telemetry = tmp_path / 'telemetry.ndjson'
+    telemetry.write_text(json.dumps({'event': 'run', 'rows': 100, 'elapsed_s': 2.0, 'phases': {}}) + '\n')
+
+    text = render_prometheus(backend, str(telemetry))
+    assert 'spotify_neo4j_pool_connections{driver="async",state="in_use"} 3' in text
+    assert 'spotify_neo4j_pool_max_size{driver="sync"} 10' in text
+    assert 'spotify_import_rows_per_second 50' in text
@@ -0,0 +1,40 @@
+"""Tests de la validation du dataset (sans base Neo4j)"""
+
+import pandas as pd
+
+from dataset_validation import validate_dataset
+from neo4j_import import SpotifyUltraFastImporter
+
+COLUMNS = ['track_id', 'artists', 'album_name', 'track_name', 'popularity', 'duration_ms', 'explicit',
+           'danceability', 'energy', 'key', 'loudness', 'mode', 'speechiness', 'acousticness',
+           'instrumentalness', 'liveness', 'valence', 'tempo', 'time_signature', 'track_genre']
+
+
+def make_row(track_id, genre, popularity):
+    return [track_id, 'A;B', 'Album', f"Titre {track_id}", popularity, 1000, False,
+            0.5, 0.5, 1, -5.0, 1, 0.1, 0.1, 0.0, 0.1, 0.5, 120.0, 4, genre]
+
+
+def stored_popularity(chunk_df):
+    """Popularité écrite pour chaque track : SET t = track dans l'ordre du payload, la dernière ligne gagne"""
+    importer = SpotifyUltraFastImporter.__new__(SpotifyUltraFastImporter)
+    payload = importer.build_chunk_payload(SpotifyUltraFastImporter.prepare_chunk_frames(chunk_df))
+    return {track['track_id']: track['popularity'] for track in payload['tracks']}
+
+
+def test_conflicting_track_id_keeps_last_row_with_and_without_validation(tmp_path):
+    """Un track_id répété avec des propriétés différentes : avertissement, la dernière ligne est importée"""
+    csv_path = tmp_path / 'dataset.csv'
+    rows = [make_row('t1', 'pop', 10), make_row('t2', 'jazz', 5), make_row('t1', 'rock', 30),
+            make_row('t3', 'rock', 200)]  # popularité hors plage : rejetée
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(csv_path, index=False)
+
+    report = validate_dataset(str(csv_path))
+    assert report['warnings']['conflict:track_id'] == 1
+    assert report['examples']['conflict:track_id'] == [2]
+    assert report['rejected_row_numbers'].tolist() == [3]
+
+    chunk_df = pd.read_csv(csv_path)
+    validated = chunk_df.drop(index=report['rejected_row_numbers'])
+    assert stored_popularity(chunk_df)['t1'] == 30
+    assert stored_popularity(validated)['t1'] == 30